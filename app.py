@@ -1,8 +1,6 @@
-import numpy as np
-import pandas as pd
-from flask import Flask, request, render_template, jsonify
-import pickle
+from flask import Flask, request, render_template, jsonify, g, Response
 import os
+import time
 from pathlib import Path
 import sys
 
@@ -10,7 +8,11 @@ import sys
 project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
-from src.pipeline.predict_pipeline import PredictPipeline, CustomData
+from src.logger import prediction_logger, set_request_id
+from src import metrics
+from src.pipeline.predict_pipeline import PredictPipeline, CustomData, artifact_cache
+from src.pipeline.training_jobs import TrainingJobManager, job_summary
+from src.pipeline.micro_batcher import micro_batcher_from_env
 
 app = Flask(__name__)
 
@@ -23,6 +25,87 @@ if not os.path.exists(model_path) or not os.path.exists(preprocessor_path):
     print("⚠️  Model files not found! Please run the training pipeline first.")
     print("Run: python src/pipeline/train_pipeline.py")
 
+# Shared pipeline: artifacts are loaded once per process and reused across requests
+predict_pipeline = PredictPipeline()
+
+# Opt-in (PREDICT_MICROBATCH=1): concurrent /predict requests are scored together
+micro_batcher = None
+
+# Training runs in a separate worker process; reload the new artifacts once a job succeeds
+training_jobs = TrainingJobManager(on_success=lambda job: predict_pipeline.warm_up())
+
+# Online updates from newly labelled rows; created on first use to keep startup light
+model_updater = None
+
+def get_model_updater():
+    global model_updater
+    if model_updater is None:
+        from src.pipeline.model_updater import ModelUpdater
+        model_updater = ModelUpdater(training_jobs=training_jobs)
+    return model_updater
+
+def _read_records(request):
+    """
+    Rows of a request: an uploaded CSV file ('file') as a DataFrame, or a JSON
+    array of objects (bare or as {"records": [...]}) as a list of dicts
+    """
+    if 'file' in request.files:
+        import pandas as pd
+        return pd.read_csv(request.files['file'])
+    payload = request.get_json(force=True)
+    records = payload.get('records', []) if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of rows")
+    return records
+
+def preload_artifacts():
+    """
+    Load and warm up the model and preprocessor. Under gunicorn with
+    preload_app (see gunicorn.conf.py) this runs once in the master process,
+    so forked workers share the loaded pages instead of each loading a copy.
+    """
+    if os.path.exists(model_path) and os.path.exists(preprocessor_path):
+        try:
+            predict_pipeline.warm_up()
+        except Exception as e:
+            print(f"⚠️  Model warm-up failed: {str(e)}")
+
+def init_worker():
+    """
+    Per-process state that does not survive a fork: the micro-batcher's
+    background thread. Called again in each worker after forking.
+    """
+    global micro_batcher
+    micro_batcher = micro_batcher_from_env(predict_pipeline.predict_records)
+
+def create_app(preload=True, init=True):
+    """
+    Load the artifacts and start the per-process state, then return the app.
+    Importing this module does neither: servers call this (gunicorn.conf.py,
+    asgi_app.py's lifespan startup, __main__ below); without it the artifacts
+    are loaded by the first request and micro-batching stays off.
+    """
+    if preload:
+        preload_artifacts()
+    if init:
+        init_worker()
+    return app
+
+@app.before_request
+def assign_request_id():
+    # Every record logged while handling the request carries this id
+    g.request_id = set_request_id(request.headers.get('X-Request-ID'))
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def add_request_id(response):
+    response.headers['X-Request-ID'] = g.request_id
+    if metrics.METRICS_ENABLED:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+        metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    return response
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -34,25 +117,29 @@ def predict():
         data = request.form
         
         # Create CustomData object
-        custom_data = CustomData(
-            gender=data['gender'],
-            race_ethnicity=data['race_ethnicity'],
-            parental_level_of_education=data['parental_level_of_education'],
-            lunch=data['lunch'],
-            test_preparation_course=data['test_preparation_course'],
-            reading_score=float(data['reading_score']),
-            writing_score=float(data['writing_score'])
-        )
-        
-        # Convert to dataframe
-        df = custom_data.get_data_as_dataframe()
+        with metrics.PREDICT_STAGE_LATENCY.time(stage="parse"):
+            custom_data = CustomData(
+                gender=data['gender'],
+                race_ethnicity=data['race_ethnicity'],
+                parental_level_of_education=data['parental_level_of_education'],
+                lunch=data['lunch'],
+                test_preparation_course=data['test_preparation_course'],
+                reading_score=float(data['reading_score']),
+                writing_score=float(data['writing_score'])
+            )
         
-        # Make prediction
-        pipeline = PredictPipeline()
-        prediction = pipeline.predict(df)
+        # Make prediction (compiled preprocessor fast path, no DataFrame needed)
+        if micro_batcher is not None:
+            prediction = micro_batcher.predict(custom_data.get_data_as_dict(), timeout=30)
+        else:
+            prediction = predict_pipeline.predict_record(custom_data.get_data_as_dict())
         
         # Format the prediction
-        predicted_score = round(prediction[0], 2)
+        predicted_score = round(prediction, 2)
+        prediction_logger.info("prediction", extra={
+            'predicted_math_score': predicted_score,
+            'duration_ms': round((time.perf_counter() - g.request_start) * 1000, 3),
+        })
         
         return jsonify({
             'success': True,
@@ -61,6 +148,33 @@ def predict():
         })
         
     except Exception as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint='/predict')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        # Accept either an uploaded CSV file or a JSON array of rows
+        records = _read_records(request)
+        
+        results = predict_pipeline.predict_many(records)
+        for result in results:
+            if 'prediction' in result:
+                result['prediction'] = round(result['prediction'], 2)
+        
+        n_errors = sum('error' in result for result in results)
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'n_errors': n_errors,
+            'results': results
+        })
+        
+    except Exception as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint='/predict/batch')
         return jsonify({
             'success': False,
             'error': str(e)
@@ -69,15 +183,68 @@ def predict():
 @app.route('/train', methods=['POST'])
 def train_model():
     try:
-        from src.pipeline.train_pipeline import TrainPipeline
+        # ?profile=1 records a time/memory report of the run (returned with the job status)
+        options = {}
+        if request.values.get('profile') in ('1', 'true'):
+            options['profile'] = True
+        job = training_jobs.submit(**options)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job['job_id'],
+            'status': job['status'],
+            'status_url': f"/train/{job['job_id']}",
+            'message': 'Training started'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/train/<job_id>', methods=['GET'])
+def train_status(job_id):
+    try:
+        job = training_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': f'Unknown training job {job_id}'}), 404
+        return jsonify(job_summary(job))
         
-        pipeline = TrainPipeline()
-        r2_score = pipeline.run_pipeline()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/train/<job_id>/cancel', methods=['POST'])
+def cancel_training(job_id):
+    try:
+        job = training_jobs.cancel(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': f'Unknown training job {job_id}'}), 404
+        return jsonify(job_summary(job))
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+@app.route('/update', methods=['POST'])
+def update_model():
+    try:
+        # Newly labelled rows (features plus math_score) as a CSV file or a JSON array
+        records = _read_records(request)
+        
+        report = get_model_updater().update(records)
+        predict_pipeline.warm_up()
         
         return jsonify({
             'success': True,
-            'r2_score': round(r2_score, 4),
-            'message': f'Model trained successfully! R² Score: {r2_score:.4f}'
+            **report,
+            'message': f"Model updated to version {report['version']} ({report['strategy']}, "
+                       f"{report['rows_added']} rows in {report['update_seconds']:.3f}s)"
         })
         
     except Exception as e:
@@ -86,5 +253,26 @@ def train_model():
             'error': str(e)
         })
 
+@app.route('/update/versions', methods=['GET'])
+def model_versions():
+    return jsonify(get_model_updater().list_versions())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(artifact_cache.stats())
+
+@app.route('/predict/batching/stats', methods=['GET'])
+def batching_stats():
+    if micro_batcher is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **micro_batcher.stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if not metrics.METRICS_ENABLED:
+        return jsonify({'success': False, 'error': 'Metrics are disabled'}), 404
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
+    create_app()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,191 @@
+"""
+ASGI entry point for the Student Performance Predictor.
+
+Serves the Flask app from app.py (same routes, handlers and metrics) from an
+asyncio event loop. The event loop only reads request bodies and writes
+responses; each request's Flask handler, including multipart/CSV parsing and
+inference, runs on a bounded thread pool, so one process can hold many
+concurrent keep-alive connections while sharing a single copy of the model.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker asgi_app:app
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+from src.logger import logging
+import app as flask_app
+
+# Threads running the Flask handlers (inference and other blocking work)
+INFERENCE_WORKERS = int(os.environ.get("ASGI_INFERENCE_WORKERS", os.cpu_count() or 1))
+# Requests allowed to wait for a thread before new ones get a 503
+MAX_PENDING = int(os.environ.get("ASGI_MAX_PENDING", 1024))
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class AsgiApp:
+    """
+    Minimal WSGI-to-ASGI bridge: unlike asgiref's WsgiToAsgi, which runs every
+    request on one shared thread by default, requests run concurrently on a
+    pool of INFERENCE_WORKERS threads and are shed with a 503 once MAX_PENDING
+    are waiting for it
+    """
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+        self._pending = None
+
+    async def run_blocking(self, func, *args):
+        """
+        Run blocking work on the bounded pool, shedding load once it is saturated
+        """
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(MAX_PENDING)
+        if self._pending.locked():
+            raise HTTPError(503, "Server is busy, please retry")
+        async with self._pending:
+            call = functools.partial(contextvars.copy_context().run, func, *args)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Load the artifacts and start the micro-batcher off the event loop
+                try:
+                    await asyncio.get_running_loop().run_in_executor(self.executor, flask_app.create_app)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if flask_app.micro_batcher is not None:
+                    flask_app.micro_batcher.close()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPError(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    def build_environ(scope, body):
+        """
+        WSGI environ (PEP 3333) for an ASGI http scope and its request body
+        """
+        server = scope.get("server") or ("localhost", 80)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1] or 80),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        if scope.get("client"):
+            environ["REMOTE_ADDR"] = scope["client"][0]
+        for name, value in scope["headers"]:
+            name = name.decode("latin-1").upper().replace("-", "_")
+            if name == "CONTENT_LENGTH":
+                continue
+            key = name if name == "CONTENT_TYPE" else f"HTTP_{name}"
+            value = value.decode("latin-1")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def call_wsgi(self, environ):
+        """
+        Run the WSGI app on a pool thread; returns (status, headers, body)
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], body
+
+    async def handle_http(self, scope, receive, send):
+        try:
+            environ = self.build_environ(scope, await self.read_body(receive))
+            status, headers, body = await self.run_blocking(self.call_wsgi, environ)
+            headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        except HTTPError as e:
+            body = json.dumps({"success": False, "error": str(e)}).encode()
+            status, headers = e.status, [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+        except Exception as e:
+            logging.info(f"Unhandled error in {scope['method']} {scope['path']}: {e}")
+            body = json.dumps({"success": False, "error": "Internal server error"}).encode()
+            status, headers = 500, [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ]
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+app = AsgiApp(flask_app.app)
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ uvicorn is not installed. Run: pip install uvicorn")
+        sys.exit(1)
+    uvicorn.run("asgi_app:app", host='0.0.0.0', port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pipeline hot paths.
+
+Benchmarks (select with --only):
+  predict    PredictPipeline.predict at several batch sizes, plus predict_record
+  artifacts  save_object / load_object for every model family of ModelTrainer
+  transform  DataTransformation.initiate_data_transformation (default and lean mode)
+  search     evaluate_models at increasing training-set sizes
+  scale      ingestion + transformation of synthetic datasets (--scale-rows)
+
+Everything runs in a temporary copy of artifact/, so the trained model is not
+touched. Results are written as JSON with the commit, library versions and
+machine; compare two result files to flag regressions:
+
+    python benchmark_pipeline.py --output bench_before.json
+    git checkout <other commit>
+    python benchmark_pipeline.py --output bench_after.json --compare bench_before.json
+    python benchmark_pipeline.py --compare bench_before.json bench_after.json   # no rerun
+
+--compare exits with status 1 when any benchmark's median is more than
+--threshold (default 10%) slower than the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent
+sys.path.append(str(project_root))
+
+SEED = 42
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+SEARCH_ROWS = (200, 400, 800, 1600)
+SCALE_ROWS = (100_000, 1_000_000)
+GROUPS = ("predict", "artifacts", "transform", "search", "scale")
+
+
+def measure(func, repeat=7, min_time=0.05, max_number=10000):
+    """
+    Time func() like timeit: pick a loop count that runs for at least min_time,
+    then take `repeat` samples. Returns per-call seconds statistics.
+    """
+    func()  # warm up
+    number = 1
+    while number < max_number:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 4
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def peak_traced_bytes(func):
+    """
+    Peak memory traced by tracemalloc while func() runs
+    """
+    from src.profiling import MemoryTrace
+
+    with MemoryTrace() as trace:
+        func()
+    return trace.peak_bytes
+
+
+def environment():
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": SEED,
+    }
+
+
+def prepare_workdir(workdir):
+    """
+    Copy the source data and trained artifacts into workdir/artifact and ingest the data
+    """
+    from src.components.data_ingestion import DataIngestion
+
+    target = Path(workdir) / "artifact"
+    target.mkdir(parents=True)
+    for name in ("stud.csv", "model.pkl", "preprocessor.pkl"):
+        source = project_root / "artifact" / name
+        if source.exists():
+            shutil.copy2(source, target / name)
+    os.chdir(workdir)
+    DataIngestion(intermediate_format="columnar", export_csv=True).initiate_data_ingestion()
+
+
+def bench_predict(results):
+    import pandas as pd
+    from src.schema import FEATURE_COLUMNS
+    from src.pipeline.predict_pipeline import PredictPipeline, WARMUP_SAMPLE, artifact_cache
+
+    pipeline = PredictPipeline(engine="sklearn", use_prediction_table=False)
+    pipeline.warm_up()
+    data = pd.read_csv(os.path.join("artifact", "stud.csv"))[FEATURE_COLUMNS]
+
+    results["predict.record"] = measure(lambda: pipeline.predict_record(WARMUP_SAMPLE))
+    for batch_size in BATCH_SIZES:
+        batch = data.sample(n=batch_size, replace=batch_size > len(data), random_state=SEED).reset_index(drop=True)
+        stats = measure(lambda: pipeline.predict(batch), repeat=5)
+        stats["rows_per_second"] = batch_size / stats["median"]
+        results[f"predict.batch_{batch_size}"] = stats
+    artifact_cache.clear()
+
+
+def training_arrays():
+    from src.components.data_transformation import DataTransformation
+
+    train_arr, test_arr, _ = DataTransformation(lean=False).initiate_data_transformation(
+        os.path.join("artifact", "train.cols"), os.path.join("artifact", "test.cols")
+    )
+    return train_arr, test_arr
+
+
+def bench_artifacts(results):
+    from src.components.model_trainer import ModelTrainer
+    from src.utils import load_object, save_object
+
+    train_arr, _ = training_arrays()
+    X, y = train_arr[:, :-1], train_arr[:, -1]
+    for name, model in ModelTrainer().get_models().items():
+        if "random_state" in model.get_params():
+            model.set_params(random_state=SEED)
+        model.fit(X, y)
+        key = name.lower().replace(" ", "_").replace("-", "_")
+        path = os.path.join("artifact", f"bench_{key}.pkl")
+
+        stats = measure(lambda: save_object(path, model), repeat=5)
+        stats["size_bytes"] = os.path.getsize(path)
+        results[f"artifacts.save.{key}"] = stats
+        results[f"artifacts.load.{key}"] = measure(lambda: load_object(path), repeat=5)
+        results[f"artifacts.load_mmap.{key}"] = measure(lambda: load_object(path, mmap_mode="r"), repeat=5)
+
+
+def bench_transform(results):
+    from src.components.data_transformation import DataTransformation
+
+    for fmt, suffix in (("columnar", "cols"), ("csv", "csv")):
+        train_path = os.path.join("artifact", f"train.{suffix}")
+        test_path = os.path.join("artifact", f"test.{suffix}")
+        for lean in (False, True):
+            transformation = DataTransformation(lean=lean)
+            results[f"transform.{fmt}{'.lean' if lean else ''}"] = measure(
+                lambda: transformation.initiate_data_transformation(train_path, test_path), repeat=5
+            )
+
+
+def bench_search(results, rows):
+    import numpy as np
+    from src.components.model_trainer import ModelTrainer
+    from src.utils import evaluate_models
+
+    train_arr, test_arr = training_arrays()
+    rng = np.random.default_rng(SEED)
+    X_test, y_test = test_arr[:, :-1], test_arr[:, -1]
+    for n_rows in rows:
+        # Resample the training set to the requested size
+        sample = train_arr[rng.integers(0, len(train_arr), size=n_rows)]
+        X, y = sample[:, :-1], sample[:, -1]
+        trainer = ModelTrainer(n_jobs=1, search_strategy="exhaustive")
+
+        def run():
+            evaluate_models(X, y, X_test, y_test, trainer.get_models(), trainer.get_params(), n_jobs=1)
+
+        stats = measure(run, repeat=3, min_time=0)
+        stats["rows"] = n_rows
+        results[f"search.rows_{n_rows}"] = stats
+
+
+def bench_scale(results, rows):
+    from src.components.data_ingestion import DataIngestion
+    from src.components.data_transformation import DataTransformation
+    from src.components.synthetic_data import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=SEED).fit()
+    for n_rows in rows:
+        source_path = os.path.join("artifact", f"synthetic_{n_rows}.csv")
+        generator.write_csv(n_rows, source_path)
+        ingestion = DataIngestion(source_path=source_path, chunksize=generator.chunk_rows)
+
+        stats = measure(ingestion.initiate_data_ingestion, repeat=1, min_time=0)
+        stats["rows"] = n_rows
+        results[f"scale.ingestion.rows_{n_rows}"] = stats
+
+        train_path, test_path = ingestion.output_paths()["train"], ingestion.output_paths()["test"]
+        for lean in (False, True):
+            transformation = DataTransformation(lean=lean)
+            stats = measure(lambda: transformation.initiate_data_transformation(train_path, test_path),
+                            repeat=1, min_time=0)
+            stats["rows"] = n_rows
+            stats["peak_traced_bytes"] = peak_traced_bytes(
+                lambda: transformation.initiate_data_transformation(train_path, test_path)
+            )
+            results[f"scale.transform{'_lean' if lean else ''}.rows_{n_rows}"] = stats
+        os.remove(source_path)
+
+
+def compare(baseline, current, threshold):
+    """
+    Print a comparison table and return the names of regressed benchmarks
+    """
+    regressions = []
+    print(f"\n{'benchmark':<40}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        before = baseline["results"].get(name)
+        after = current["results"].get(name)
+        if before is None or after is None:
+            print(f"{name:<40}{'-' if before is None else format_time(before['median']):>12}"
+                  f"{'-' if after is None else format_time(after['median']):>12}{'n/a':>10}")
+            continue
+        change = after["median"] / before["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ❌ regression"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  ✅ faster"
+        print(f"{name:<40}{format_time(before['median']):>12}{format_time(after['median']):>12}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def run_benchmarks(groups, search_rows, scale_rows):
+    results = {}
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="benchmark_")
+    try:
+        prepare_workdir(workdir)
+        for group in groups:
+            print(f"Running {group} benchmarks...")
+            if group == "predict":
+                bench_predict(results)
+            elif group == "artifacts":
+                bench_artifacts(results)
+            elif group == "transform":
+                bench_transform(results)
+            elif group == "search":
+                bench_search(results, search_rows)
+            elif group == "scale":
+                bench_scale(results, scale_rows)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--search-rows", nargs="+", type=int, default=list(SEARCH_ROWS),
+                        help="training-set sizes for the search benchmark")
+    parser.add_argument("--scale-rows", nargs="+", type=int, default=list(SCALE_ROWS),
+                        help="synthetic dataset sizes for the scale benchmark")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results")
+    parser.add_argument("--compare", nargs="+", metavar="FILE",
+                        help="baseline results (and optionally current results, to compare without running)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as file_obj:
+            baseline = json.load(file_obj)
+        with open(args.compare[1]) as file_obj:
+            current = json.load(file_obj)
+    else:
+        current = {"environment": environment(), "results": run_benchmarks(args.only, args.search_rows, args.scale_rows)}
+        with open(args.output, "w") as file_obj:
+            json.dump(current, file_obj, indent=2)
+        print(f"\nResults written to {args.output}")
+        for name, stats in current["results"].items():
+            print(f"  {name:<40}{format_time(stats['median']):>12}")
+        if not args.compare:
+            return
+        with open(args.compare[0]) as file_obj:
+            baseline = json.load(file_obj)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
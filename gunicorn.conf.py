@@ -0,0 +1,83 @@
+"""
+Gunicorn configuration: load the model once in the master, then fork workers.
+
+With preload_app the master imports app.py and loads and warms up the
+artifacts (on_starting) before forking, so every worker starts with the model
+and preprocessor already in memory, shared copy-on-write. The objects loaded up
+to that point are moved out of garbage collector tracking with gc.freeze(),
+otherwise the first collection in each worker would write to their headers
+and unshare the pages.
+
+Run with:
+    gunicorn -c gunicorn.conf.py app:app
+
+Compare memory use with: python memory_report.py
+"""
+
+import gc
+import glob
+import os
+import tempfile
+from datetime import datetime
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+# Micro-batching (PREDICT_MICROBATCH=1) needs concurrent requests per worker:
+# more than one thread switches gunicorn to the threaded (gthread) worker
+microbatch = os.environ.get("PREDICT_MICROBATCH", "0") == "1"
+threads = int(os.environ.get("GUNICORN_THREADS", 8 if microbatch else 1))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# One log file for the master and all workers (each process has its own
+# queue and writer thread and appends whole lines)
+os.environ.setdefault("LOG_FILE", f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log")
+# Workers share their metrics through this directory, so /metrics reports the
+# whole server whichever worker serves the scrape
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="metrics_"))
+
+if preload_app:
+    # Avoid collections while the app loads in the master; they would leave
+    # freed holes in pages that the workers then share
+    gc.disable()
+
+
+def on_starting(server):
+    # Counters start from zero with the server, not from a previous run
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "*.json")):
+        os.remove(path)
+    if preload_app:
+        # app.py is already imported; load the artifacts once, here in the master
+        import app
+        app.create_app(init=False)
+
+
+def when_ready(server):
+    from src import metrics
+    # Artifact loads observed while preloading are reported once, by the master
+    metrics.REGISTRY.write()
+    server.log.info(f"Master ready (preload_app={preload_app}, workers={workers})")
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        # Everything loaded so far goes to the permanent generation, so
+        # collections in the workers never touch (and copy) those pages.
+        # Collection is then back on in the master and the worker it forks.
+        gc.freeze()
+        gc.enable()
+
+
+def post_fork(server, worker):
+    from src import metrics
+    # The values copied from the master are already in its own file
+    metrics.REGISTRY.clear()
+    metrics.REGISTRY.start_flusher()
+
+
+def post_worker_init(worker):
+    # Per-worker threads (the micro-batcher) are started after the fork, as
+    # threads started in the master do not exist in the forked worker. Without
+    # preload_app each worker also loads its own artifacts here.
+    import app
+    app.create_app(preload=not preload_app)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Import-time report and startup-latency budget for the serving process.
+
+Runs `python -X importtime` on a server startup (`import <module>` followed by
+app.create_app(), which loads and warms up the artifacts, as the servers do) in
+a fresh interpreter, parses the per-module timings written to stderr and prints
+the slowest packages. It then times several cold starts and exits with status 1
+when the median exceeds the budget, so it can run as a CI check.
+
+Usage:
+    python import_time_report.py                    # report on starting app.py
+    python import_time_report.py --module asgi_app --budget-ms 1500
+    PREDICT_ENGINE=exported python import_time_report.py --budget-ms 800
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Packages only the training path should need
+TRAINING_ONLY = (
+    "src.components.data_ingestion",
+    "src.components.data_transformation",
+    "src.components.model_trainer",
+    "src.components.model_search",
+    "src.pipeline.train_pipeline",
+    "sklearn.ensemble",
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output into a list of {name, self_us, cumulative_us, depth}
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append({
+            "name": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": depth,
+        })
+    return entries
+
+
+def summarize(entries, top=15):
+    by_package = {}
+    for entry in entries:
+        package = entry["name"].split(".")[0]
+        by_package[package] = by_package.get(package, 0) + entry["self_us"]
+
+    loaded = {entry["name"] for entry in entries}
+    return {
+        "total_ms": round(sum(entry["self_us"] for entry in entries) / 1000, 1),
+        "n_modules": len(entries),
+        "packages_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        },
+        "slowest_top_level_ms": {
+            entry["name"]: round(entry["cumulative_us"] / 1000, 1)
+            for entry in sorted((e for e in entries if e["depth"] == 1), key=lambda e: -e["cumulative_us"])[:top]
+        },
+        "training_only_loaded": [name for name in TRAINING_ONLY if name in loaded],
+    }
+
+
+def startup_code(module):
+    # Importing app.py loads nothing; servers call create_app() before serving
+    return f"import {module}, app; app.create_app()"
+
+
+def import_profile(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", startup_code(module)],
+        capture_output=True, text=True, env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def startup_times(module, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", startup_code(module)], check=True,
+                       capture_output=True, env=os.environ.copy())
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="module imported at startup (default: app)")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to time")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", 3000)),
+                        help="maximum median startup time (env STARTUP_BUDGET_MS)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    summary = summarize(import_profile(args.module), top=args.top)
+    print(f"import {args.module}: {summary['n_modules']} modules, {summary['total_ms']} ms of import time")
+    print("\nSlowest top-level imports (cumulative ms):")
+    for name, ms in summary["slowest_top_level_ms"].items():
+        print(f"  {name:<50}{ms:>10.1f}")
+    print("\nImport time by package (self ms):")
+    for name, ms in summary["packages_ms"].items():
+        print(f"  {name:<50}{ms:>10.1f}")
+    if summary["training_only_loaded"]:
+        print(f"\n⚠️  Training-only modules imported at startup: {', '.join(summary['training_only_loaded'])}")
+
+    times = startup_times(args.module, args.runs)
+    summary["startup_ms"] = {
+        "median": round(statistics.median(times), 1),
+        "min": round(min(times), 1),
+        "max": round(max(times), 1),
+        "budget": args.budget_ms,
+    }
+    print(f"\nCold start over {args.runs} runs: median {summary['startup_ms']['median']} ms "
+          f"(min {summary['startup_ms']['min']}, max {summary['startup_ms']['max']}), "
+          f"budget {args.budget_ms:.0f} ms")
+
+    if args.json:
+        with open(args.json, "w") as file_obj:
+            json.dump(summary, file_obj, indent=2)
+
+    if summary["startup_ms"]["median"] > args.budget_ms:
+        print("❌ Startup exceeds the budget")
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory report for the gunicorn deployment.
+
+Starts gunicorn with gunicorn.conf.py twice, once with preload_app (model loaded
+in the master and shared copy-on-write) and once without (every worker loads its
+own copy), sends a few predictions to warm the workers up, and reads RSS, PSS and
+private memory from /proc/<pid>/smaps_rollup. PSS splits shared pages between
+the processes that map them, so the PSS total is the real memory cost of a setup.
+
+Usage:
+    python memory_report.py [--workers 4] [--requests 50]
+    python memory_report.py --pid <gunicorn master pid>   # report on a running server
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+SAMPLE_FORM = {
+    "gender": "female",
+    "race_ethnicity": "group B",
+    "parental_level_of_education": "bachelor's degree",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": "72",
+    "writing_score": "74",
+}
+
+
+def read_smaps_rollup(pid):
+    """
+    Memory counters of a process in kB
+    """
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file_obj:
+        for line in file_obj:
+            parts = line.split()
+            if parts and parts[0].rstrip(":") in FIELDS:
+                usage[parts[0].rstrip(":")] = int(parts[1])
+    usage["Private"] = usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0)
+    usage["Shared"] = usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0)
+    return usage
+
+
+def child_pids(pid):
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as file_obj:
+                children.extend(int(child) for child in file_obj.read().split())
+        except OSError:
+            continue
+    return sorted(children)
+
+
+def process_report(master_pid):
+    report = {"master": dict(pid=master_pid, **read_smaps_rollup(master_pid)), "workers": []}
+    for pid in child_pids(master_pid):
+        try:
+            report["workers"].append(dict(pid=pid, **read_smaps_rollup(pid)))
+        except OSError:
+            continue
+    processes = [report["master"]] + report["workers"]
+    report["total"] = {field: sum(p[field] for p in processes) for field in ("Rss", "Pss", "Private")}
+    n_workers = max(len(report["workers"]), 1)
+    report["per_worker"] = {
+        field: round(sum(w[field] for w in report["workers"]) / n_workers)
+        for field in ("Rss", "Pss", "Private", "Shared")
+    }
+    return report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url + "/cache/stats", timeout=2).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+def measure(preload, workers, n_requests):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0",
+               GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f"127.0.0.1:{port}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        wait_for_server(url)
+        # Wait for every worker to boot, then touch the model in all of them
+        deadline = time.time() + 120
+        while len(child_pids(server.pid)) < workers and time.time() < deadline:
+            time.sleep(0.2)
+        body = "&".join(f"{key}={urllib.request.quote(value)}" for key, value in SAMPLE_FORM.items()).encode()
+        for _ in range(n_requests * workers):
+            urllib.request.urlopen(url + "/predict", data=body, timeout=10).read()
+        time.sleep(1)
+        return process_report(server.pid)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def print_report(name, report):
+    print(f"\n{name}")
+    print(f"  {'process':<16}{'RSS MB':>10}{'PSS MB':>10}{'private MB':>12}{'shared MB':>11}")
+    rows = [("master", report["master"])] + [(f"worker {w['pid']}", w) for w in report["workers"]]
+    for label, usage in rows:
+        print(f"  {label:<16}{usage['Rss'] / 1024:>10.1f}{usage['Pss'] / 1024:>10.1f}"
+              f"{usage['Private'] / 1024:>12.1f}{usage['Shared'] / 1024:>11.1f}")
+    print(f"  {'total':<16}{report['total']['Rss'] / 1024:>10.1f}{report['total']['Pss'] / 1024:>10.1f}"
+          f"{report['total']['Private'] / 1024:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="warm-up predictions per worker")
+    parser.add_argument("--pid", type=int, help="report on an already running gunicorn master")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.pid:
+        results = {"running": process_report(args.pid)}
+        print_report(f"gunicorn master {args.pid}", results["running"])
+    else:
+        results = {
+            "preload": measure(True, args.workers, args.requests),
+            "no_preload": measure(False, args.workers, args.requests),
+        }
+        print_report("preload_app = True (model loaded in the master, shared)", results["preload"])
+        print_report("preload_app = False (model loaded in every worker)", results["no_preload"])
+
+        saving = {
+            field: results["no_preload"]["per_worker"][field] - results["preload"]["per_worker"][field]
+            for field in ("Pss", "Private")
+        }
+        total = results["no_preload"]["total"]["Pss"] - results["preload"]["total"]["Pss"]
+        results["saving_kb"] = dict(saving, total_pss=total)
+        print(f"\nPer-worker saving with preload: PSS {saving['Pss'] / 1024:.1f} MB, "
+              f"private {saving['Private'] / 1024:.1f} MB; total PSS saving {total / 1024:.1f} MB "
+              f"across {args.workers} workers")
+
+    if args.json:
+        with open(args.json, "w") as file_obj:
+            json.dump(results, file_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import sys
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.exception import CustomException
+
+COLUMNAR_SUFFIX = ".cols"
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 1
+
+# Numerical columns are stored as float64 so a chunk with missing values can
+# always be appended; categorical columns as int32 codes (-1 = missing)
+NUMERIC_DTYPE = np.dtype("<f8")
+CODE_DTYPE = np.dtype("<i4")
+
+
+def is_columnar(path):
+    return str(path).endswith(COLUMNAR_SUFFIX) or os.path.isdir(path)
+
+
+class ColumnarWriter:
+    """
+    Append-only writer for the columnar intermediate format.
+
+    A table is a directory holding one raw little-endian binary file per column
+    plus schema.json with the row count, dtypes and category vocabularies.
+    Chunks can be appended one at a time, so streaming ingestion never needs
+    more than one chunk in memory.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.n_rows = 0
+        self.columns = None
+        self._files = {}
+        self._categories = {}
+
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path)
+
+    def _init_schema(self, chunk):
+        self.columns = []
+        for i, name in enumerate(chunk.columns):
+            numeric = pd.api.types.is_numeric_dtype(chunk[name]) and not pd.api.types.is_bool_dtype(chunk[name])
+            column = {
+                "name": name,
+                "kind": "numeric" if numeric else "categorical",
+                "dtype": (NUMERIC_DTYPE if numeric else CODE_DTYPE).str,
+                "file": f"{i:03d}.bin",
+            }
+            self.columns.append(column)
+            self._files[name] = open(os.path.join(self.path, column["file"]), "wb")
+            if not numeric:
+                self._categories[name] = {}
+
+    def append(self, chunk):
+        if self.columns is None:
+            self._init_schema(chunk)
+        elif list(chunk.columns) != [column["name"] for column in self.columns]:
+            raise ValueError("All chunks must have the same columns")
+
+        for column in self.columns:
+            name = column["name"]
+            if column["kind"] == "numeric":
+                values = pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype=NUMERIC_DTYPE)
+                # The kind is fixed by the first chunk; never turn later values into NaN silently
+                coerced = np.flatnonzero(np.isnan(values) & chunk[name].notna().to_numpy())
+                if len(coerced):
+                    raise ValueError(
+                        f"Column '{name}' is numeric (from the first chunk) but row {self.n_rows + coerced[0]} "
+                        f"holds {chunk[name].iloc[coerced[0]]!r}"
+                    )
+            else:
+                # Codes of the chunk's uniques mapped to the table-wide vocabulary;
+                # the extra last entry maps pandas' missing code -1 to ours
+                lookup = self._categories[name]
+                codes, uniques = pd.factorize(chunk[name])
+                mapping = np.array([lookup.setdefault(value, len(lookup)) for value in uniques] + [-1], dtype=CODE_DTYPE)
+                values = mapping[codes]
+            self._files[name].write(np.ascontiguousarray(values).tobytes())
+        self.n_rows += len(chunk)
+
+    def close(self):
+        for file_obj in self._files.values():
+            file_obj.close()
+        schema = {
+            "format": "columnar",
+            "version": FORMAT_VERSION,
+            "n_rows": self.n_rows,
+            "columns": [
+                dict(column, categories=list(self._categories[column["name"]]))
+                if column["kind"] == "categorical" else column
+                for column in (self.columns or [])
+            ],
+        }
+        with open(os.path.join(self.path, SCHEMA_FILE), "w") as file_obj:
+            json.dump(schema, file_obj, indent=2)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvWriter:
+    """
+    Chunk-appending CSV writer with the same interface as ColumnarWriter
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.n_rows = 0
+        self._file = open(self.path, "w", newline="")
+        self._header = True
+
+    def append(self, chunk):
+        chunk.to_csv(self._file, index=False, header=self._header)
+        self._header = False
+        self.n_rows += len(chunk)
+
+    def close(self):
+        self._file.close()
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_table_writer(path):
+    """
+    Writer for `path`: columnar for *.cols directories, CSV otherwise
+    """
+    return ColumnarWriter(path) if str(path).endswith(COLUMNAR_SUFFIX) else CsvWriter(path)
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE)) as file_obj:
+        schema = json.load(file_obj)
+    if schema.get("format") != "columnar" or schema.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar table at {path}")
+    return schema
+
+
+def _column_array(path, column, n_rows, mmap):
+    file_path = os.path.join(path, column["file"])
+    dtype = np.dtype(column["dtype"])
+    if n_rows == 0:
+        return np.empty(0, dtype=dtype)
+    if mmap:
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=(n_rows,))
+    return np.fromfile(file_path, dtype=dtype, count=n_rows)
+
+
+def read_columnar(path, columns=None, mmap=True):
+    """
+    Load a columnar table as a DataFrame. Numerical columns are read-only
+    memory maps of the column files and categorical columns come back as
+    pandas Categoricals built from the stored codes.
+    """
+    try:
+        schema = read_schema(path)
+        n_rows = schema["n_rows"]
+        data = {}
+        for column in schema["columns"]:
+            if columns is not None and column["name"] not in columns:
+                continue
+            values = _column_array(path, column, n_rows, mmap)
+            if column["kind"] == "categorical":
+                values = pd.Categorical.from_codes(np.asarray(values), categories=column["categories"])
+            data[column["name"]] = values
+        return pd.DataFrame(data, copy=False)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_table(path, columns=None, dtype=None):
+    """
+    Read an intermediate table written in either the columnar or CSV format.
+    dtype only applies to CSV; columnar tables keep their stored dtypes.
+    """
+    if is_columnar(path):
+        return read_columnar(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype=dtype)
+
+
+def iter_table_chunks(path, chunksize, columns=None):
+    """
+    Yield an intermediate table as DataFrames of at most chunksize rows.
+    Columnar chunks are sliced from the memory maps before being materialized,
+    so only one chunk is ever held in memory.
+    """
+    if not is_columnar(path):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        return
+
+    schema = read_schema(path)
+    n_rows = schema["n_rows"]
+    selected = [column for column in schema["columns"] if columns is None or column["name"] in columns]
+    arrays = {column["name"]: _column_array(path, column, n_rows, mmap=True) for column in selected}
+    for start in range(0, n_rows, chunksize):
+        data = {}
+        for column in selected:
+            values = np.array(arrays[column["name"]][start:start + chunksize])
+            if column["kind"] == "categorical":
+                values = pd.Categorical.from_codes(values, categories=column["categories"])
+            data[column["name"]] = values
+        yield pd.DataFrame(data, copy=False)
@@ -1,5 +1,7 @@
 import os 
 import sys 
+import hashlib
+import secrets
 from pathlib import Path
 
 # Add the project root to Python path
@@ -8,7 +10,10 @@ sys.path.append(str(project_root))
 
 from src.exception import CustomException
 from src.logger import logging
+from src.columnar import open_table_writer
+from src.schema import COLUMN_DTYPES
 
+import numpy as np
 import pandas as pd 
 from sklearn.model_selection import train_test_split
 from dataclasses import dataclass
@@ -18,18 +23,156 @@ class DataIngestionConfig:
     train_data_path: str = os.path.join('artifact', "train.csv")
     test_data_path: str = os.path.join('artifact', "test.csv")
     raw_data_path: str = os.path.join('artifact', "data.csv")
+    source_data_path: str = os.path.join('artifact', "stud.csv")
+    train_columnar_path: str = os.path.join('artifact', "train.cols")
+    test_columnar_path: str = os.path.join('artifact', "test.cols")
+    raw_columnar_path: str = os.path.join('artifact', "data.cols")
 
 class DataIngestion:
-    def __init__(self, test_size=0.2, random_state=42):
+    def __init__(self, test_size=0.2, random_state=42, chunksize=None, intermediate_format=None, export_csv=None,
+                 source_path=None):
         self.ingestion_config = DataIngestionConfig()
+        # Read a different source file, e.g. a synthetic dataset (default: artifact/stud.csv)
+        source_path = source_path or os.environ.get("INGESTION_SOURCE")
+        if source_path:
+            self.ingestion_config.source_data_path = source_path
         self.test_size = test_size
         self.random_state = random_state
+        self._random_hash_key = None
+        # Rows per chunk for streaming ingestion; None reads the whole file at once
+        if chunksize is None and os.environ.get("INGESTION_CHUNKSIZE"):
+            chunksize = int(os.environ["INGESTION_CHUNKSIZE"])
+        self.chunksize = chunksize
+        # "columnar" (typed binary columns, memory-mapped on read) or "csv"
+        self.intermediate_format = intermediate_format or os.environ.get("INGESTION_FORMAT", "columnar")
+        if self.intermediate_format not in ("columnar", "csv"):
+            raise ValueError(f"Unknown intermediate format '{self.intermediate_format}'")
+        # Also write data.csv/train.csv/test.csv when the intermediate format is columnar
+        if export_csv is None:
+            export_csv = os.environ.get("INGESTION_EXPORT_CSV", "0") == "1"
+        self.export_csv = export_csv
+
+    def cache_params(self):
+        """
+        Parameters that change the ingestion output (used for stage caching)
+        """
+        return {
+            "test_size": self.test_size,
+            "random_state": self.random_state,
+            "chunksize": self.chunksize,
+            "intermediate_format": self.intermediate_format,
+            "export_csv": self.export_csv,
+            "hash_dtypes": COLUMN_DTYPES,
+        }
+
+    def output_paths(self):
+        """
+        Files written by ingestion: raw/train/test in the intermediate format,
+        plus *_csv exports when requested
+        """
+        config = self.ingestion_config
+        if self.intermediate_format == "csv":
+            return {"raw": config.raw_data_path, "train": config.train_data_path, "test": config.test_data_path}
+
+        paths = {"raw": config.raw_columnar_path, "train": config.train_columnar_path, "test": config.test_columnar_path}
+        if self.export_csv:
+            paths.update({
+                "raw_csv": config.raw_data_path,
+                "train_csv": config.train_data_path,
+                "test_csv": config.test_data_path,
+            })
+        return paths
+
+    def _open_writers(self):
+        writers = {"raw": [], "train": [], "test": []}
+        for name, path in self.output_paths().items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            writers[name.replace("_csv", "")].append(open_table_writer(path))
+        return writers
+
+    @staticmethod
+    def _close_writers(writers):
+        for group in writers.values():
+            for writer in group:
+                writer.close()
+
+    def _hash_key(self):
+        """
+        The 16-character row hash key for random_state
+        """
+        if self.random_state is None:
+            # Like train_test_split(random_state=None): an unseeded split, fixed per instance
+            if self._random_hash_key is None:
+                self._random_hash_key = secrets.token_hex(8)
+            return self._random_hash_key
+        key = str(self.random_state)
+        # Short seeds are zero-padded (the original keys); longer ones are hashed, not truncated
+        return key.zfill(16) if len(key) <= 16 else hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def is_test_row(self, chunk):
+        """
+        Deterministic train/test assignment from a hash of each row's content.
+        The same row always lands in the same split for a given random_state,
+        whatever chunk it arrives in, and about test_size of the rows go to test.
+        Rows are hashed with the fixed COLUMN_DTYPES, not the dtypes read_csv
+        inferred for the chunk (an integer column reads as float in a chunk with
+        a missing value, which would change the hash of every row in it).
+        """
+        dtypes = {column: dtype for column, dtype in COLUMN_DTYPES.items() if column in chunk.columns}
+        hashes = pd.util.hash_pandas_object(
+            chunk.astype(dtypes), index=False, hash_key=self._hash_key()
+        ).to_numpy()
+        return (hashes / np.float64(2 ** 64)) < self.test_size
+
+    def stream_data_ingestion(self):
+        """
+        Read the source CSV once in chunks and append each chunk to the raw,
+        train and test outputs, so peak memory is bounded by the chunk size
+        """
+        logging.info(f"Streaming data ingestion with chunks of {self.chunksize} rows")
+        data_path = self.ingestion_config.source_data_path
+        if not os.path.exists(data_path):
+            raise FileNotFoundError(f"Source data file not found: {data_path}")
+
+        n_train = n_test = 0
+        columns = None
+        writers = self._open_writers()
+        try:
+            for chunk in pd.read_csv(data_path, chunksize=self.chunksize):
+                columns = list(chunk.columns)
+                test_mask = self.is_test_row(chunk)
+                for writer in writers["raw"]:
+                    writer.append(chunk)
+                for writer in writers["train"]:
+                    writer.append(chunk[~test_mask])
+                for writer in writers["test"]:
+                    writer.append(chunk[test_mask])
+
+                n_test += int(test_mask.sum())
+                n_train += len(chunk) - int(test_mask.sum())
+        finally:
+            self._close_writers(writers)
+
+        if columns is None or n_train + n_test == 0:
+            raise ValueError("Dataset is empty")
+
+        paths = self.output_paths()
+        logging.info(f"Dataset columns: {columns}")
+        logging.info(f"Raw data saved to: {paths['raw']}")
+        logging.info(f"Train set rows: {n_train}")
+        logging.info(f"Test set rows: {n_test}")
+        logging.info("Ingestion of the data is completed")
+
+        return paths["train"], paths["test"]
 
     def initiate_data_ingestion(self):
         logging.info("Entered the data ingestion method or component")
         try:
+            if self.chunksize:
+                return self.stream_data_ingestion()
+
             # Use artifact directory for data file
-            data_path = os.path.join('artifact', 'stud.csv')
+            data_path = self.ingestion_config.source_data_path
             
             # Check if source file exists
             if not os.path.exists(data_path):
@@ -45,14 +188,6 @@ class DataIngestion:
             logging.info(f"Dataset shape: {df.shape}")
             logging.info(f"Dataset columns: {list(df.columns)}")
 
-            # Create artifact directory if it doesn't exist
-            artifact_dir = os.path.dirname(self.ingestion_config.train_data_path)
-            os.makedirs(artifact_dir, exist_ok=True)
-
-            # Save raw data
-            df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
-            logging.info(f"Raw data saved to: {self.ingestion_config.raw_data_path}")
-
             logging.info("Train test split initiated")
             train_set, test_set = train_test_split(
                 df, 
@@ -60,18 +195,22 @@ class DataIngestion:
                 random_state=self.random_state
             )
 
-            # Save train and test sets
-            train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
-            test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
-            
+            # Save raw data, train and test sets (artifact directory is created by the writers)
+            writers = self._open_writers()
+            try:
+                for name, frame in (("raw", df), ("train", train_set), ("test", test_set)):
+                    for writer in writers[name]:
+                        writer.append(frame)
+            finally:
+                self._close_writers(writers)
+
+            paths = self.output_paths()
+            logging.info(f"Raw data saved to: {paths['raw']}")
             logging.info(f"Train set shape: {train_set.shape}")
             logging.info(f"Test set shape: {test_set.shape}")
             logging.info("Ingestion of the data is completed")
 
-            return (
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path,
-            )
+            return paths["train"], paths["test"]
         except Exception as e:
             raise CustomException(e, sys) 
         
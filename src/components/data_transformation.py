@@ -12,25 +12,28 @@ from sklearn.preprocessing import  OneHotEncoder,StandardScaler
 from src.exception import CustomException
 from src.logger import logging
 from src.utils import save_object
+from src.columnar import read_table
+from src.schema import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET_COLUMN
 import os.path
 
 @dataclass
 class dataTransformationConfig:
     preprocessor_object_file_path=os.path.join('artifact',"preprocessor.pkl")
+    # Lean mode: dtype of the feature matrices and rows transformed at a time
+    lean_dtype: str = "float32"
+    lean_chunk_rows: int = 50_000
 
 class DataTransformation:
-    def __init__(self):
+    def __init__(self, lean=None):
         self.data_transformation_config=dataTransformationConfig()
+        # lean=True (or TRANSFORMATION_LEAN=1) returns float32 features and the
+        # target separately, transformed chunk by chunk into preallocated arrays
+        if lean is None:
+            lean = os.environ.get("TRANSFORMATION_LEAN", "0") == "1"
+        self.lean = lean
     
     def get_data_trasnsformer_obj(self):
         try:
-            numerical_features=['reading_score', 'writing_score']
-            categorical_features=['gender',
-                                   'race_ethnicity',
-                                    'parental_level_of_education',
-                                    'lunch',
-                                    'test_preparation_course'
-                                    ]
             num_pipeline=Pipeline(
                 steps=[
                     ("imputer",SimpleImputer(strategy="median")),
@@ -50,19 +53,90 @@ class DataTransformation:
             
             preprocessor=ColumnTransformer(
                 [
-                    ("num_pipeline",num_pipeline,numerical_features),
-                    ("cat_pipelines",cat_pipeline,categorical_features)
+                    ("num_pipeline",num_pipeline,list(NUMERICAL_FEATURES)),
+                    ("cat_pipelines",cat_pipeline,list(CATEGORICAL_FEATURES))
                 ]
             )
             return preprocessor
 
         except Exception as e:
             raise CustomException(e,sys)
+
+    def _read_split(self, path):
+        # Categories are read as pandas Categoricals (integer codes) instead of object strings
+        return read_table(path, dtype={column: "category" for column in CATEGORICAL_FEATURES})
+
+    def _transform_into(self, preprocessor, df):
+        """
+        Transform df chunk by chunk into one preallocated feature matrix and
+        return it with the target, so no full-size float64 or concatenated
+        copy is ever built
+        """
+        config = self.data_transformation_config
+        feature_columns = [column for column in df.columns if column != TARGET_COLUMN]
+        n_features = len(preprocessor.get_feature_names_out())
+        X = np.empty((len(df), n_features), dtype=config.lean_dtype)
+        for start in range(0, len(df), config.lean_chunk_rows):
+            chunk = df.iloc[start:start + config.lean_chunk_rows]
+            X[start:start + len(chunk)] = preprocessor.transform(chunk[feature_columns])
+        y = np.array(df[TARGET_COLUMN], dtype=np.float64)
+        return X, y
+
+    def initiate_lean_transformation(self, train_path, test_path):
+        """
+        Lean variant of initiate_data_transformation: the preprocessor
+        statistics are collected in one pass (exactly, as with fit), then each
+        split is transformed in chunks. Returns ((X_train, y_train),
+        (X_test, y_test), preprocessor_path).
+        """
+        try:
+            config = self.data_transformation_config
+            train_df = self._read_split(train_path)
+            logging.info(f"Read train data ({len(train_df)} rows) for the lean transformation")
+
+            # A reservoir as large as the data keeps every value, so the medians are exact
+            fit = StreamingPreprocessorFit(reservoir_size=max(len(train_df), 1))
+            for start in range(0, len(train_df), config.lean_chunk_rows):
+                fit.update(train_df.iloc[start:start + config.lean_chunk_rows])
+            preprocessing_obj = fit.build()
+
+            train_split = self._transform_into(preprocessing_obj, train_df)
+            del train_df
+            test_split = self._transform_into(preprocessing_obj, self._read_split(test_path))
+            logging.info(
+                f"Transformed {len(train_split[0])} train and {len(test_split[0])} test rows "
+                f"into {config.lean_dtype} feature matrices"
+            )
+
+            save_object(
+                file_path=config.preprocessor_object_file_path,
+                obj=preprocessing_obj
+            )
+            return train_split, test_split, config.preprocessor_object_file_path
+
+        except Exception as e:
+            raise CustomException(e,sys)
     
+    def cache_params(self):
+        """
+        Parameters that change the transformation output (used for stage caching)
+        """
+        params = {"preprocessor": repr(self.get_data_trasnsformer_obj())}
+        if self.lean:
+            params["lean"] = {
+                "dtype": self.data_transformation_config.lean_dtype,
+                "chunk_rows": self.data_transformation_config.lean_chunk_rows,
+            }
+        return params
+
     def initiate_data_transformation(self,train_path,test_path):
         try:
-            train_df=pd.read_csv(train_path)
-            test_df=pd.read_csv(test_path)
+            if self.lean:
+                return self.initiate_lean_transformation(train_path, test_path)
+
+            # Columnar tables are memory-mapped; CSV is still accepted
+            train_df=read_table(train_path)
+            test_df=read_table(test_path)
 
             logging.info("Read train and test data ")
 
@@ -70,8 +144,7 @@ class DataTransformation:
 
             preprocessing_obj=self.get_data_trasnsformer_obj()
 
-            target_column_name="math_score"
-            numerical_features=['reading_score', 'writing_score']
+            target_column_name=TARGET_COLUMN
 
             input_feature_train_df=train_df.drop(columns=[target_column_name],axis=1)
             target_feature_train_df=train_df[target_column_name]
@@ -106,3 +179,135 @@ class DataTransformation:
 
         except Exception as e:
             raise CustomException(e,sys)
+
+
+class StreamingPreprocessorFit:
+    """
+    One pass over the training chunks collecting everything the preprocessor
+    of DataTransformation learns: per-column medians, means and variances of
+    the numerical features and category counts of the categorical ones.
+
+    Medians come from a reservoir sample of reservoir_size values per column,
+    so they are exact up to that many rows. Means and variances are kept as
+    (count, mean, sum of squared deviations) per column and merged chunk by
+    chunk with Chan's parallel update, which stays accurate when the
+    variance is small next to the squared mean. build() returns that same sklearn
+    ColumnTransformer with the statistics set, so preprocessor.pkl is
+    interchangeable with one fitted in memory.
+    """
+    def __init__(self, reservoir_size=100_000, random_state=42):
+        self.reservoir_size = reservoir_size
+        self.rng = np.random.default_rng(random_state)
+        self.n_rows = 0
+        self.columns = None
+        self.numeric = {
+            column: {"n": 0, "mean": 0.0, "m2": 0.0, "seen": 0, "reservoir": np.empty(0)}
+            for column in NUMERICAL_FEATURES
+        }
+        self.counts = {column: {} for column in CATEGORICAL_FEATURES}
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = [column for column in chunk.columns if column != TARGET_COLUMN]
+        self.n_rows += len(chunk)
+
+        for column, stats in self.numeric.items():
+            values = chunk[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if len(values):
+                mean = float(values.mean())
+                deviations = values - mean
+                stats["n"], stats["mean"], stats["m2"] = self._merge_moments(
+                    (stats["n"], stats["mean"], stats["m2"]),
+                    (len(values), mean, float(np.dot(deviations, deviations)))
+                )
+            self._sample(stats, values)
+
+        for column, counts in self.counts.items():
+            for value, count in chunk[column].value_counts().items():
+                if count:
+                    counts[value] = counts.get(value, 0) + int(count)
+
+    @staticmethod
+    def _merge_moments(a, b):
+        """
+        Combine two (count, mean, sum of squared deviations) triples (Chan et al.)
+        """
+        n_a, mean_a, m2_a = a
+        n_b, mean_b, m2_b = b
+        n = n_a + n_b
+        if n == 0:
+            return 0, 0.0, 0.0
+        delta = mean_b - mean_a
+        return n, mean_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+    def _sample(self, stats, values):
+        # Reservoir sampling (algorithm R), vectorized over the chunk
+        size = self.reservoir_size
+        free = max(size - len(stats["reservoir"]), 0)
+        if free:
+            stats["reservoir"] = np.concatenate([stats["reservoir"], values[:free]])
+        rest = values[free:]
+        if len(rest):
+            positions = stats["seen"] + free + np.arange(len(rest))
+            slots = self.rng.integers(0, positions + 1)
+            keep = slots < size
+            stats["reservoir"][slots[keep]] = rest[keep]
+        stats["seen"] += len(values)
+
+    def build(self):
+        """
+        Fit the DataTransformation preprocessor on a tiny frame holding every
+        category once, then overwrite its statistics with the streamed ones
+        """
+        if not self.n_rows:
+            raise ValueError("Training data is empty")
+        categories = {column: sorted(counts) for column, counts in self.counts.items()}
+        n_proto = max(max(len(values) for values in categories.values()), 2)
+        prototype = pd.DataFrame({
+            column: (
+                [categories[column][i % len(categories[column])] for i in range(n_proto)]
+                if column in categories else np.arange(n_proto, dtype=np.float64)
+            )
+            for column in self.columns
+        })
+        preprocessor = DataTransformation().get_data_trasnsformer_obj()
+        preprocessor.fit(prototype)
+
+        num_pipeline = preprocessor.named_transformers_["num_pipeline"]
+        medians, means, variances = [], [], []
+        for column in NUMERICAL_FEATURES:
+            stats = self.numeric[column]
+            median = float(np.median(stats["reservoir"]))
+            # Missing values are imputed with the median before scaling
+            n_missing = self.n_rows - stats["n"]
+            _, mean, m2 = self._merge_moments((stats["n"], stats["mean"], stats["m2"]), (n_missing, median, 0.0))
+            medians.append(median)
+            means.append(mean)
+            variances.append(m2 / self.n_rows)
+        num_pipeline.named_steps["imputer"].statistics_ = np.array(medians)
+        self._set_scaler(num_pipeline.named_steps["Scaler"], np.array(means), np.array(variances))
+
+        cat_pipeline = preprocessor.named_transformers_["cat_pipelines"]
+        modes, frequencies = [], []
+        for column in CATEGORICAL_FEATURES:
+            counts = self.counts[column]
+            # Ties go to the smallest value, as in SimpleImputer
+            top = max(counts.values())
+            mode = next(value for value in categories[column] if counts[value] == top)
+            modes.append(mode)
+            n_missing = self.n_rows - sum(counts.values())
+            frequencies.extend(
+                (counts[value] + (n_missing if value == mode else 0)) / self.n_rows
+                for value in categories[column]
+            )
+        cat_pipeline.named_steps["imputer"].statistics_ = np.array(modes, dtype=object)
+        frequencies = np.array(frequencies)
+        self._set_scaler(cat_pipeline.named_steps["scaler"], frequencies, frequencies * (1 - frequencies))
+        return preprocessor
+
+    def _set_scaler(self, scaler, mean, var):
+        scaler.mean_ = mean
+        scaler.var_ = var
+        scaler.scale_ = np.where(np.sqrt(var) < 10 * np.finfo(np.float64).eps, 1.0, np.sqrt(var))
+        scaler.n_samples_seen_ = self.n_rows
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object
+from src.columnar import iter_table_chunks
+from src.components.data_transformation import DataTransformation, StreamingPreprocessorFit
+from src.schema import TARGET_COLUMN
+
+@dataclass
+class IncrementalTrainerConfig:
+    trained_model_file_path: str = os.path.join("artifact", "model.pkl")
+    leaderboard_file_path: str = os.path.join("artifact", "leaderboard.json")
+    chunk_rows: int = 100_000
+    # Passes over the training data; every pass reads it from disk again
+    n_epochs: int = 5
+    # Values kept per numerical column to estimate the median (exact below this many rows)
+    reservoir_size: int = 100_000
+    random_state: int = 42
+    min_r2_score: float = 0.6
+
+
+class StreamingR2:
+    """
+    R² accumulated chunk by chunk from sums of the targets and squared errors
+    """
+    def __init__(self):
+        self.n = 0
+        self.sum_y = 0.0
+        self.sum_y2 = 0.0
+        self.sse = 0.0
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        self.n += len(y_true)
+        self.sum_y += float(y_true.sum())
+        self.sum_y2 += float(np.dot(y_true, y_true))
+        self.sse += float(np.sum((y_true - y_pred) ** 2))
+
+    def score(self):
+        if self.n == 0:
+            return float("nan")
+        total = self.sum_y2 - self.sum_y ** 2 / self.n
+        if total <= 0:
+            return 0.0
+        return 1.0 - self.sse / total
+
+
+class IncrementalTrainer:
+    """
+    Out-of-core alternative to DataTransformation + ModelTrainer.
+
+    The training table is read from disk in chunks: one pass fits the
+    preprocessor statistics, then every candidate model is trained with
+    partial_fit for n_epochs passes (rows shuffled within each chunk) and
+    scored with a streaming R² over the test table. Memory is bounded by the
+    chunk size. The best model and the preprocessor are saved as model.pkl and
+    preprocessor.pkl, exactly like the in-memory path.
+    """
+    def __init__(self, chunk_rows=None, n_epochs=None):
+        self.incremental_trainer_config = IncrementalTrainerConfig()
+        self.preprocessor_file_path = DataTransformation().data_transformation_config.preprocessor_object_file_path
+        if chunk_rows is None and os.environ.get("TRAIN_CHUNK_ROWS"):
+            chunk_rows = int(os.environ["TRAIN_CHUNK_ROWS"])
+        if n_epochs is None and os.environ.get("TRAIN_EPOCHS"):
+            n_epochs = int(os.environ["TRAIN_EPOCHS"])
+        self.chunk_rows = chunk_rows or self.incremental_trainer_config.chunk_rows
+        self.n_epochs = n_epochs or self.incremental_trainer_config.n_epochs
+        self.leaderboard = []
+
+    def get_models(self):
+        """
+        Candidate models that support partial_fit
+        """
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.neural_network import MLPRegressor
+
+        random_state = self.incremental_trainer_config.random_state
+        return {
+            "SGD Regressor": SGDRegressor(alpha=1e-4, random_state=random_state),
+            "SGD Regressor (elastic net)": SGDRegressor(
+                penalty="elasticnet", alpha=1e-3, l1_ratio=0.15, random_state=random_state
+            ),
+            "MLP Regressor": MLPRegressor(
+                hidden_layer_sizes=(32,), learning_rate_init=0.01, random_state=random_state
+            ),
+        }
+
+    def preprocessor_cache_params(self):
+        """
+        Parameters that change the streamed preprocessor (used for stage caching)
+        """
+        config = self.incremental_trainer_config
+        return {
+            "preprocessor": repr(DataTransformation().get_data_trasnsformer_obj()),
+            "mode": "incremental",
+            "reservoir_size": config.reservoir_size,
+            "random_state": config.random_state,
+        }
+
+    def cache_params(self):
+        """
+        Parameters that change the training output (used for stage caching)
+        """
+        return {
+            "models": {name: repr(model) for name, model in self.get_models().items()},
+            "chunk_rows": self.chunk_rows,
+            "n_epochs": self.n_epochs,
+            "random_state": self.incremental_trainer_config.random_state,
+        }
+
+    def _split(self, chunk):
+        return chunk.drop(columns=[TARGET_COLUMN]), chunk[TARGET_COLUMN].to_numpy(dtype=np.float64)
+
+    def initiate_preprocessor_fit(self, train_path):
+        """
+        Fit the preprocessor statistics in one pass over the training table and save it
+        """
+        try:
+            start = time.perf_counter()
+            config = self.incremental_trainer_config
+            fit = StreamingPreprocessorFit(config.reservoir_size, config.random_state)
+            for chunk in iter_table_chunks(train_path, self.chunk_rows):
+                fit.update(chunk)
+            preprocessor = fit.build()
+            save_object(file_path=self.preprocessor_file_path, obj=preprocessor)
+            logging.info(
+                f"Preprocessor fitted on {fit.n_rows} rows in one pass "
+                f"({time.perf_counter() - start:.2f}s), saved to {self.preprocessor_file_path}"
+            )
+            return self.preprocessor_file_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_model_trainer(self, train_path, test_path, preprocessor):
+        try:
+            config = self.incremental_trainer_config
+            models = self.get_models()
+            train_times = dict.fromkeys(models, 0.0)
+            rng = np.random.default_rng(config.random_state)
+            n_rows = 0
+
+            for epoch in range(self.n_epochs):
+                for chunk in iter_table_chunks(train_path, self.chunk_rows):
+                    features, target = self._split(chunk)
+                    X = preprocessor.transform(features)
+                    order = rng.permutation(len(X))
+                    X, target = X[order], target[order]
+                    for name, model in models.items():
+                        start = time.perf_counter()
+                        model.partial_fit(X, target)
+                        train_times[name] += time.perf_counter() - start
+                    if epoch == 0:
+                        n_rows += len(X)
+                logging.info(f"Incremental training epoch {epoch + 1}/{self.n_epochs} done ({n_rows} rows)")
+
+            scores = {name: StreamingR2() for name in models}
+            for chunk in iter_table_chunks(test_path, self.chunk_rows):
+                features, target = self._split(chunk)
+                X = preprocessor.transform(features)
+                for name, model in models.items():
+                    scores[name].update(target, model.predict(X))
+
+            self.leaderboard = sorted(
+                (
+                    {
+                        "model": name,
+                        "params": models[name].get_params(),
+                        "test_score": scores[name].score(),
+                        "fit_time": round(train_times[name], 4),
+                    }
+                    for name in models
+                ),
+                key=lambda row: -row["test_score"],
+            )
+            self.save_leaderboard(n_rows)
+            for row in self.leaderboard:
+                logging.info(f"{row['model']}: streaming test R2 {row['test_score']:.4f} ({row['fit_time']:.2f}s)")
+
+            best = self.leaderboard[0]
+            if best["test_score"] < config.min_r2_score:
+                raise CustomException("No best model found")
+            save_object(file_path=config.trained_model_file_path, obj=models[best["model"]])
+            logging.info(f"Best incremental model: {best['model']}")
+            return best["test_score"]
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_leaderboard(self, n_rows):
+        file_path = self.incremental_trainer_config.leaderboard_file_path
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as file_obj:
+            json.dump(
+                {
+                    "summary": {
+                        "strategy": "incremental",
+                        "rows": n_rows,
+                        "chunk_rows": self.chunk_rows,
+                        "n_epochs": self.n_epochs,
+                    },
+                    "leaderboard": self.leaderboard,
+                },
+                file_obj,
+                indent=2,
+                default=str,
+            )
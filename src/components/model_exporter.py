@@ -0,0 +1,146 @@
+import os
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object
+from src.pipeline.compiled_preprocessor import compile_preprocessor
+from src.pipeline.inference_engine import (
+    EXPORT_FORMAT_VERSION,
+    MODEL_PREFIX,
+    PREPROCESSOR_PREFIX,
+    load_exported_model,
+)
+
+@dataclass
+class ModelExporterConfig:
+    exported_model_file_path = os.path.join("artifact", "model_export.npz")
+    model_file_path = os.path.join("artifact", "model.pkl")
+    preprocessor_file_path = os.path.join("artifact", "preprocessor.pkl")
+
+class ModelExporter:
+    """
+    Writes the trained model and preprocessor as flat numpy arrays so serving
+    can evaluate them with src.pipeline.inference_engine instead of sklearn
+    """
+    def __init__(self):
+        self.model_exporter_config = ModelExporterConfig()
+
+    def model_to_arrays(self, model):
+        kind = type(model).__name__
+
+        if kind in ("LinearRegression", "Ridge", "Lasso", "ElasticNet", "SGDRegressor"):
+            coef = np.asarray(model.coef_, dtype=np.float64)
+            if coef.ndim != 1:
+                raise ValueError("Only single-target linear models can be exported")
+            return {
+                "kind": np.array("linear"),
+                "coef": coef,
+                "intercept": np.asarray(model.intercept_, dtype=np.float64).reshape(()),
+            }
+
+        if kind == "DecisionTreeRegressor":
+            return self._trees_to_arrays([model], combine="mean")
+
+        if kind == "RandomForestRegressor":
+            return self._trees_to_arrays(model.estimators_, combine="mean")
+
+        if kind == "AdaBoostRegressor":
+            arrays = self._trees_to_arrays(model.estimators_, combine="weighted_median")
+            arrays["estimator_weights"] = np.asarray(
+                model.estimator_weights_[:len(model.estimators_)], dtype=np.float64
+            )
+            return arrays
+
+        if kind == "KNeighborsRegressor":
+            if model.effective_metric_ != "euclidean" or not isinstance(model.weights, str):
+                raise ValueError("Only euclidean KNN with 'uniform' or 'distance' weights can be exported")
+            return {
+                "kind": np.array("knn"),
+                "fit_X": np.asarray(model._fit_X, dtype=np.float64),
+                "fit_y": np.asarray(model._y, dtype=np.float64),
+                "n_neighbors": np.array(model.n_neighbors),
+                "weights": np.array(model.weights),
+            }
+
+        raise ValueError(f"Model type '{kind}' cannot be exported")
+
+    @staticmethod
+    def _trees_to_arrays(estimators, combine):
+        """
+        Concatenate the node arrays of several trees; child indices are made absolute
+        """
+        left, right, feature, threshold, value = [], [], [], [], []
+        offsets = [0]
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("Only single-output trees can be exported")
+            offset = offsets[-1]
+            is_leaf = tree.children_left < 0
+            left.append(np.where(is_leaf, -1, tree.children_left + offset))
+            right.append(np.where(is_leaf, -1, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            value.append(tree.value[:, 0, 0])
+            offsets.append(offset + tree.node_count)
+            max_depth = max(max_depth, tree.max_depth)
+
+        return {
+            "kind": np.array("trees"),
+            "combine": np.array(combine),
+            "children_left": np.concatenate(left).astype(np.int32),
+            "children_right": np.concatenate(right).astype(np.int32),
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "value": np.concatenate(value).astype(np.float64),
+            "tree_offsets": np.asarray(offsets, dtype=np.int64),
+            "max_depth": np.array(max_depth),
+        }
+
+    def initiate_model_export(self, model_path=None, preprocessor_path=None):
+        """
+        Export model.pkl (and the compiled preprocessor.pkl) to a single .npz file
+        and check the numpy evaluator reproduces the sklearn predictions
+        """
+        try:
+            model_path = model_path or self.model_exporter_config.model_file_path
+            preprocessor_path = preprocessor_path or self.model_exporter_config.preprocessor_file_path
+            export_path = self.model_exporter_config.exported_model_file_path
+
+            model = load_object(file_path=model_path)
+            preprocessor = load_object(file_path=preprocessor_path)
+            compiled = compile_preprocessor(preprocessor)
+
+            arrays = {"format_version": np.array(EXPORT_FORMAT_VERSION)}
+            arrays.update({MODEL_PREFIX + key: value for key, value in self.model_to_arrays(model).items()})
+            arrays.update(compiled.to_arrays(PREPROCESSOR_PREFIX))
+
+            os.makedirs(os.path.dirname(export_path), exist_ok=True)
+            with open(export_path, "wb") as file_obj:
+                np.savez(file_obj, **arrays)
+
+            # Round-trip check on rows covering every category
+            exported_model, exported_preprocessor = load_exported_model(export_path)
+            X = exported_preprocessor.transform(compiled.verification_rows())
+            expected = model.predict(X)
+            actual = exported_model.predict(X)
+            if not np.allclose(expected, actual, rtol=1e-9, atol=1e-9):
+                if exported_model.kind != "knn":
+                    os.remove(export_path)
+                    raise ValueError("Exported model predictions do not match the sklearn model")
+                # Equidistant k-th neighbours may be chosen differently by sklearn
+                logging.info("Exported KNN differs from sklearn on tied neighbours")
+
+            logging.info(
+                f"Exported {type(model).__name__} to {export_path} "
+                f"({os.path.getsize(export_path)} bytes)"
+            )
+            return export_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,504 @@
+import os
+import sys
+import math
+import time
+import shutil
+import tempfile
+from contextlib import nullcontext
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.profiling import MemoryTrace
+
+SEARCH_STRATEGIES = ("exhaustive", "halving", "random")
+
+
+def _fit_and_score(estimator, params, X, y, train_idx, test_idx, trace_memory=False):
+    """
+    Fit one candidate on one CV fold and return (r2 score, wall seconds, cpu seconds,
+    peak traced bytes or None)
+    """
+    from sklearn.base import clone
+
+    memory = MemoryTrace() if trace_memory else nullcontext()
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with memory:
+        try:
+            model = clone(estimator).set_params(**params)
+            model.fit(X[train_idx], y[train_idx])
+            score = model.score(X[test_idx], y[test_idx])
+        except Exception as e:
+            logging.info(f"Candidate {type(estimator).__name__} {params} failed: {e}")
+            score = np.nan
+    peak = memory.peak_bytes if trace_memory else None
+    return score, time.perf_counter() - start, time.process_time() - cpu_start, peak
+
+
+def _fit_and_score_path(estimator, params, sizes, mode, X, y, train_idx, test_idx, trace_memory=False):
+    """
+    Fit one ensemble on one CV fold and score it at every n_estimators in sizes
+    (ascending). mode="warm_start" grows the ensemble size by size; mode="staged"
+    fits the largest size once and scores each prefix with staged_predict.
+    Returns one (r2 score, wall seconds, cpu seconds, peak traced bytes) per size;
+    the peak is that of the shared fit.
+    """
+    memory = MemoryTrace() if trace_memory else nullcontext()
+    with memory:
+        results = _score_path(estimator, params, sizes, mode, X, y, train_idx, test_idx)
+    peak = memory.peak_bytes if trace_memory else None
+    return [result + (peak,) for result in results]
+
+
+def _score_path(estimator, params, sizes, mode, X, y, train_idx, test_idx):
+    from sklearn.base import clone
+    from sklearn.metrics import r2_score
+
+    X_train, y_train, X_test, y_test = X[train_idx], y[train_idx], X[test_idx], y[test_idx]
+    results = []
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if mode == "warm_start":
+            model = clone(estimator).set_params(**params, warm_start=True)
+            for size in sizes:
+                model.set_params(n_estimators=size)
+                model.fit(X_train, y_train)
+                results.append((model.score(X_test, y_test), time.perf_counter() - start,
+                                time.process_time() - cpu_start))
+                start, cpu_start = time.perf_counter(), time.process_time()
+        else:
+            model = clone(estimator).set_params(**params, n_estimators=sizes[-1])
+            model.fit(X_train, y_train)
+            scores = {size: r2_score(y_test, y_pred) for size, y_pred in _staged_predictions(model, X_test, sizes)}
+            # Boosting can stop early (even before sizes[0]); the larger sizes are
+            # then all the final model
+            last = None
+            if len(scores) < len(sizes):
+                last = r2_score(y_test, model.predict(X_test))
+            seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+            # Fit time is split in proportion to the trees each size adds
+            previous = 0
+            for size in sizes:
+                share = (size - previous) / sizes[-1]
+                results.append((scores.get(size, last), seconds * share, cpu_seconds * share))
+                previous = size
+    except Exception as e:
+        logging.info(f"Candidate {type(estimator).__name__} {params} n_estimators={sizes} failed: {e}")
+        seconds, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+        results += [(np.nan, seconds, cpu_seconds)] + [(np.nan, 0.0, 0.0)] * (len(sizes) - len(results) - 1)
+    return results
+
+
+def _staged_predictions(model, X, sizes):
+    """
+    Yield (size, predictions of the first `size` estimators) for each size the model reached
+    """
+    if hasattr(model, "estimator_weights_"):
+        # AdaBoostRegressor.staged_predict recomputes every estimator at each stage;
+        # predict once and take the weighted median of each prefix instead
+        n_estimators = len(model.estimators_)
+        predictions = np.column_stack([estimator.predict(X) for estimator in model.estimators_])
+        rows = np.arange(len(predictions))
+        for size in sizes:
+            if size > n_estimators:
+                break
+            order = np.argsort(predictions[:, :size], axis=1)
+            weight_cdf = np.cumsum(model.estimator_weights_[:size][order], axis=1)
+            median_idx = (weight_cdf >= 0.5 * weight_cdf[:, -1][:, np.newaxis]).argmax(axis=1)
+            yield size, predictions[rows, order[rows, median_idx]]
+        return
+    for n_estimators, y_pred in enumerate(model.staged_predict(X), start=1):
+        if n_estimators in sizes:
+            yield n_estimators, y_pred
+
+
+def _refit(estimator, params, X, y):
+    """
+    Fit the winning candidate of a model family on the full training data
+    """
+    from sklearn.base import clone
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    model = clone(estimator).set_params(**params)
+    model.fit(X, y)
+    return model, time.perf_counter() - start, time.process_time() - cpu_start
+
+
+def _share_arrays(X, y, folder):
+    """
+    Dump the training data once and reopen it memory-mapped so worker processes
+    receive a file reference instead of a pickled copy of the arrays
+    """
+    import joblib
+
+    X_path = os.path.join(folder, "X_train.joblib")
+    y_path = os.path.join(folder, "y_train.joblib")
+    joblib.dump(np.ascontiguousarray(X), X_path)
+    joblib.dump(np.ascontiguousarray(y), y_path)
+    return joblib.load(X_path, mmap_mode="r"), joblib.load(y_path, mmap_mode="r")
+
+
+class Candidate:
+    """
+    One hyperparameter combination of one model family and what it cost to evaluate
+    """
+    def __init__(self, model_name, params):
+        self.model_name = model_name
+        self.params = params
+        self.cv_score = np.nan
+        self.fit_time = 0.0
+        self.compute_time = 0.0
+        self.peak_memory = None
+        self.n_resources = None
+        self.rung = None
+        self.status = "pending"
+
+    def as_dict(self):
+        return {
+            "model": self.model_name,
+            "params": self.params,
+            "cv_score": None if np.isnan(self.cv_score) else float(self.cv_score),
+            "fit_time": self.fit_time,
+            "compute_time": self.compute_time,
+            "peak_memory": self.peak_memory,
+            "n_resources": self.n_resources,
+            "rung": self.rung,
+            "status": self.status,
+        }
+
+
+class ModelSearch:
+    """
+    Cross-validated hyperparameter search over several model families.
+
+    Every (candidate, fold) fit is an independent task, so with n_jobs other
+    than None/1 each round of fits runs on one joblib process pool and the
+    training data is shared with the workers through a memory-mapped file.
+
+    Strategies:
+      - "exhaustive": every grid point on all rows (GridSearchCV behaviour)
+      - "halving":    successive halving; all candidates start on a small
+                      budget of rows (resource="n_samples") or trees
+                      (resource="n_estimators") and only the best 1/factor
+                      of each family move on to a factor-times larger budget;
+                      candidates sharing a warm-start fit move as one, and a
+                      family stops once a single one is left
+      - "random":     grid points in random order until time_budget seconds
+                      (or n_iter candidates) are used up; at least one
+                      candidate per family is always evaluated
+
+    With warm_start=True, candidates of an ensemble family that differ only in
+    n_estimators share one fit per fold: the ensemble is grown with warm_start
+    (RandomForest) or fitted once at the largest size and scored per prefix
+    with staged_predict (AdaBoost), instead of fitting every size from scratch.
+
+    The best candidate of each family is refitted once on the full data,
+    matching GridSearchCV(refit=True) semantics.
+    """
+    def __init__(self, models, param, cv=3, n_jobs=None, strategy="exhaustive",
+                 factor=3, resource="n_samples", min_resources=None,
+                 time_budget=None, n_iter=None, random_state=42, warm_start=True, trace_memory=False):
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy '{strategy}', expected one of {SEARCH_STRATEGIES}")
+        if resource not in ("n_samples", "n_estimators"):
+            raise ValueError(f"Unknown halving resource '{resource}'")
+        self.models = models
+        self.param = param
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.strategy = strategy
+        self.factor = factor
+        self.resource = resource
+        self.min_resources = min_resources
+        self.time_budget = time_budget
+        self.n_iter = n_iter
+        self.random_state = random_state
+        self.warm_start = warm_start
+        # Record each candidate's peak traced memory (tracemalloc; slows fitting somewhat)
+        self.trace_memory = trace_memory
+
+    def _family_resource(self, name):
+        """
+        Resource a family is budgeted on; families without n_estimators fall back to rows
+        """
+        if (self.strategy == "halving" and self.resource == "n_estimators"
+                and "n_estimators" in self.models[name].get_params()):
+            return "n_estimators"
+        return "n_samples"
+
+    def _candidates(self, name):
+        from sklearn.model_selection import ParameterGrid
+
+        grid = dict(self.param.get(name, {}))
+        if self._family_resource(name) == "n_estimators":
+            # n_estimators is the budget, not a hyperparameter to search over
+            grid.pop("n_estimators", None)
+        return [Candidate(name, params) for params in ParameterGrid(grid)]
+
+    def _max_resources(self, name, n_samples):
+        if self._family_resource(name) == "n_estimators":
+            values = self.param.get(name, {}).get("n_estimators")
+            return int(max(values)) if values else int(self.models[name].get_params()["n_estimators"])
+        return n_samples
+
+    def _path_mode(self, name):
+        """
+        How a family scores several n_estimators with one fit: "warm_start", "staged" or None
+        """
+        estimator = self.models[name]
+        params = estimator.get_params()
+        if not self.warm_start or "n_estimators" not in params or self._family_resource(name) == "n_estimators":
+            return None
+        if "warm_start" in params:
+            return "warm_start"
+        if hasattr(estimator, "staged_predict"):
+            return "staged"
+        return None
+
+    def _group_by_path(self, candidates):
+        """
+        Group candidates that differ only in n_estimators (for families with a path mode)
+        """
+        groups = {}
+        for candidate in candidates:
+            mode = self._path_mode(candidate.model_name)
+            if mode is None or "n_estimators" not in candidate.params:
+                groups[id(candidate)] = [candidate]
+                continue
+            rest = sorted((key, repr(value)) for key, value in candidate.params.items() if key != "n_estimators")
+            groups.setdefault((candidate.model_name, tuple(rest)), []).append(candidate)
+        return [sorted(group, key=lambda c: c.params.get("n_estimators", 0)) for group in groups.values()]
+
+    def _params_for(self, candidate, n_resources):
+        params = dict(candidate.params)
+        if n_resources is not None and self._family_resource(candidate.model_name) == "n_estimators":
+            params["n_estimators"] = int(n_resources)
+        return params
+
+    def _evaluate(self, runner, X, y, candidates, n_resources, rung):
+        """
+        Cross-validate a group of candidates, each with its own resource level, in one pool round
+        """
+        from joblib import delayed
+        from sklearn.model_selection import KFold
+
+        folds_by_rows = {}
+        tasks = []
+        for group in self._group_by_path(candidates):
+            name = group[0].model_name
+            budget = n_resources[name]
+            rows = len(X)
+            if budget is not None and self._family_resource(name) == "n_samples":
+                rows = int(budget)
+            if rows not in folds_by_rows:
+                subset = self._row_order[:rows]
+                folds_by_rows[rows] = [
+                    (subset[train], subset[test]) for train, test in KFold(n_splits=self.cv).split(subset)
+                ]
+            params = self._params_for(group[0], budget)
+            if len(group) > 1:
+                # One fit per fold covers every n_estimators of the group
+                params.pop("n_estimators")
+            for train_idx, test_idx in folds_by_rows[rows]:
+                tasks.append((group, params, train_idx, test_idx))
+                self.n_samples_fitted += len(train_idx)
+
+        def task(group, params, train_idx, test_idx):
+            estimator = self.models[group[0].model_name]
+            if len(group) == 1:
+                return delayed(_fit_and_score)(estimator, params, X, y, train_idx, test_idx, self.trace_memory)
+            sizes = [int(candidate.params["n_estimators"]) for candidate in group]
+            mode = self._path_mode(group[0].model_name)
+            return delayed(_fit_and_score_path)(
+                estimator, params, sizes, mode, X, y, train_idx, test_idx, self.trace_memory
+            )
+
+        outputs = runner(task(*args) for args in tasks)
+
+        scores = {id(candidate): [] for candidate in candidates}
+        for (group, _, _, _), output in zip(tasks, outputs):
+            for candidate, (score, seconds, cpu_seconds, peak) in zip(group, [output] if len(group) == 1 else output):
+                scores[id(candidate)].append(score)
+                candidate.fit_time += seconds
+                candidate.compute_time += cpu_seconds
+                if peak is not None:
+                    candidate.peak_memory = max(candidate.peak_memory or 0, peak)
+
+        for candidate in candidates:
+            candidate.cv_score = float(np.mean(scores[id(candidate)]))
+            candidate.n_resources = n_resources[candidate.model_name]
+            candidate.rung = rung
+            candidate.status = "evaluated"
+        self.n_fits += len(tasks)
+
+    def _run_exhaustive(self, runner, X, y, candidates):
+        everything = [c for name in candidates for c in candidates[name]]
+        self._evaluate(runner, X, y, everything, {name: None for name in candidates}, rung=0)
+
+    def _run_halving(self, runner, X, y, candidates):
+        schedules, alive = {}, {}
+        for name, family in candidates.items():
+            # Candidates sharing one warm-start/staged fit are kept or dropped together,
+            # so the fits a rung needs never exceed the number of distinct groups
+            alive[name] = self._group_by_path(family)
+            max_resources = self._max_resources(name, len(X))
+            min_resources = self.min_resources
+            if min_resources is None:
+                min_resources = 1 if self._family_resource(name) == "n_estimators" else 10 * self.cv
+            n_rungs = 1
+            if len(alive[name]) > 1:
+                required = 1 + math.ceil(math.log(len(alive[name]), self.factor))
+                possible = 1 + int(math.log(max(max_resources / min_resources, 1), self.factor))
+                n_rungs = min(required, possible)
+            schedules[name] = [int(max_resources / self.factor ** (n_rungs - 1 - i)) for i in range(n_rungs)]
+            # The final rung always uses the full budget
+            schedules[name][-1] = max_resources
+
+        for rung in range(max(len(schedule) for schedule in schedules.values())):
+            running = [name for name in alive if rung < len(schedules[name])]
+            if not running:
+                break
+            group = [c for name in running for unit in alive[name] for c in unit]
+            budgets = {name: schedules[name][rung] for name in running}
+            self._evaluate(runner, X, y, group, budgets, rung)
+
+            for name in running:
+                if rung == len(schedules[name]) - 1:
+                    continue
+                ranked = sorted(
+                    alive[name], key=lambda unit: -max(np.nan_to_num(c.cv_score, nan=-np.inf) for c in unit)
+                )
+                keep = max(1, math.ceil(len(ranked) / self.factor))
+                for unit in ranked[keep:]:
+                    for candidate in unit:
+                        candidate.status = f"dropped at rung {rung}"
+                alive[name] = ranked[:keep]
+                if keep == 1:
+                    # Nothing left to compare: the survivor is refitted on all rows anyway
+                    schedules[name] = schedules[name][:rung + 1]
+
+    def _run_random(self, runner, X, y, candidates):
+        rng = np.random.RandomState(self.random_state)
+        order = []
+        for name in candidates:
+            family = list(candidates[name])
+            rng.shuffle(family)
+            order.append(family)
+
+        # One candidate of every family first, then everything else in random order
+        queue = [family[0] for family in order]
+        rest = [c for family in order for c in family[1:]]
+        rng.shuffle(rest)
+        queue += rest
+        if self.n_iter is not None:
+            n_kept = max(self.n_iter, len(order))
+            for candidate in queue[n_kept:]:
+                candidate.status = "skipped (n_iter)"
+            queue = queue[:n_kept]
+
+        batch_size = max(1, self._effective_jobs())
+        deadline = None if self.time_budget is None else self._start + self.time_budget
+        covered = set()
+        rung = 0
+        while queue:
+            batch, queue = queue[:batch_size], queue[batch_size:]
+            self._evaluate(runner, X, y, batch, {name: None for name in candidates}, rung)
+            covered.update(c.model_name for c in batch)
+            rung += 1
+            if deadline is not None and time.perf_counter() >= deadline and len(covered) == len(candidates):
+                break
+        for candidate in queue:
+            candidate.status = "skipped (time budget)"
+
+    def _effective_jobs(self):
+        if self.n_jobs in (None, 1):
+            return 1
+        return self.n_jobs if self.n_jobs > 0 else max(1, (os.cpu_count() or 1) + 1 + self.n_jobs)
+
+    def search(self, X, y):
+        """
+        Returns (results, summary) where results maps a family name to its best
+        params, mean CV score, fitted estimator and all of its candidates
+        """
+        try:
+            from joblib import Parallel
+
+            self._start = time.perf_counter()
+            self._row_order = np.random.RandomState(self.random_state).permutation(len(X))
+            if self.strategy != "halving" or self.resource != "n_samples":
+                self._row_order = np.arange(len(X))
+            self.n_fits = 0
+            self.n_samples_fitted = 0
+
+            parallel = self.n_jobs not in (None, 1)
+            candidates = {name: self._candidates(name) for name in self.models}
+
+            shared_folder = tempfile.mkdtemp(prefix="model_search_") if parallel else None
+            try:
+                X_shared, y_shared = _share_arrays(X, y, shared_folder) if parallel else (X, y)
+                runner = Parallel(n_jobs=self.n_jobs if parallel else 1)
+
+                getattr(self, f"_run_{self.strategy}")(runner, X_shared, y_shared, candidates)
+
+                best = {}
+                for name, family in candidates.items():
+                    final = [c for c in family if c.status == "evaluated" and not np.isnan(c.cv_score)]
+                    if not final:
+                        raise ValueError(f"All candidates failed for {name}")
+                    best[name] = max(final, key=lambda c: c.cv_score)
+                    best[name].status = "selected"
+
+                best_params = {
+                    name: self._params_for(best[name], self._max_resources(name, len(X)))
+                    for name in self.models
+                }
+            finally:
+                if shared_folder is not None:
+                    shutil.rmtree(shared_folder, ignore_errors=True)
+
+            # Refit in this process on the caller's arrays: estimators fitted in
+            # the pool would keep memory maps (e.g. KNN's training data) into
+            # the shared folder that was just removed
+            refits = [_refit(self.models[name], best_params[name], X, y) for name in self.models]
+
+            results = {}
+            task_cpu_time = 0.0
+            for name, (estimator, refit_seconds, refit_cpu_seconds) in zip(self.models, refits):
+                best[name].fit_time += refit_seconds
+                best[name].compute_time += refit_cpu_seconds
+                task_cpu_time += sum(c.compute_time for c in candidates[name])
+                results[name] = {
+                    "best_params": best_params[name],
+                    "cv_score": best[name].cv_score,
+                    "estimator": estimator,
+                    "candidates": [c.as_dict() for c in candidates[name]],
+                }
+
+            # Busy cores: CPU time spent fitting over elapsed wall-clock time. Not a
+            # speedup over a serial run, which would pay no pool or memmap overhead
+            wall_time = time.perf_counter() - self._start
+            summary = {
+                "strategy": self.strategy,
+                "n_jobs": self.n_jobs,
+                "n_fits": self.n_fits + len(self.models),
+                "n_samples_fitted": self.n_samples_fitted + len(self.models) * len(X),
+                "wall_time": wall_time,
+                "task_cpu_time": task_cpu_time,
+                "cpu_utilization": task_cpu_time / wall_time if wall_time > 0 else 1.0,
+            }
+            logging.info(
+                f"Model search ({self.strategy}) finished: {summary['n_fits']} fits in {wall_time:.2f}s "
+                f"(n_jobs={self.n_jobs}, CPU utilization x{summary['cpu_utilization']:.2f})"
+            )
+            return results, summary
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def search_models(X, y, models, param, cv=3, n_jobs=None, **search_options):
+    """
+    Convenience wrapper around ModelSearch(...).search(X, y)
+    """
+    return ModelSearch(models, param, cv=cv, n_jobs=n_jobs, **search_options).search(X, y)
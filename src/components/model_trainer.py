@@ -1,15 +1,9 @@
 import os
 import sys
+import json
 from dataclasses import dataclass
 
-from sklearn.ensemble import (
-    AdaBoostRegressor,
-    RandomForestRegressor,
-)
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
 
 from src.exception import CustomException
 from src.logger import logging
@@ -19,49 +13,141 @@ from src.utils import save_object, evaluate_models
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join("artifact", "model.pkl")
+    leaderboard_file_path = os.path.join("artifact", "leaderboard.json")
+    # Successive halving settings (search_strategy="halving")
+    halving_factor: int = 3
+    halving_resource: str = "n_samples"
 
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, n_jobs=None, search_strategy=None, time_budget=None, trace_memory=False):
         self.model_trainer_config = ModelTrainerConfig()
+        # n_jobs > 1 (or -1 for all cores) runs the model search on a process pool
+        if n_jobs is None and os.environ.get("TRAIN_N_JOBS"):
+            n_jobs = int(os.environ["TRAIN_N_JOBS"])
+        # "exhaustive" (default), "halving" or "random" with a time budget in seconds
+        if search_strategy is None:
+            search_strategy = os.environ.get("TRAIN_SEARCH_STRATEGY", "exhaustive")
+        if time_budget is None and os.environ.get("TRAIN_TIME_BUDGET"):
+            time_budget = float(os.environ["TRAIN_TIME_BUDGET"])
+        self.n_jobs = n_jobs
+        self.search_strategy = search_strategy
+        self.time_budget = time_budget
+        # Record each search candidate's peak traced memory (profiling mode)
+        self.trace_memory = trace_memory
+        self.search_details = None
+        self.leaderboard = []
+
+    def get_models(self):
+        """
+        Model families searched by the trainer (imported here, only when training)
+        """
+        from sklearn.ensemble import AdaBoostRegressor, RandomForestRegressor
+        from sklearn.linear_model import LinearRegression
+        from sklearn.neighbors import KNeighborsRegressor
+        from sklearn.tree import DecisionTreeRegressor
+
+        return {
+            "Random Forest": RandomForestRegressor(n_estimators=50, max_depth=10),
+            "Decision Tree": DecisionTreeRegressor(max_depth=8),
+            "Linear Regression": LinearRegression(),
+            "K-Neighbors": KNeighborsRegressor(n_neighbors=5),
+            "AdaBoost Regressor": AdaBoostRegressor(n_estimators=50),
+        }
+
+    def get_params(self):
+        """
+        Hyperparameter grid for each model family
+        """
+        return {
+            "Decision Tree": {
+                'criterion': ['squared_error', 'friedman_mse', 'absolute_error'],
+                'max_depth': [3, 5, 8, 10],
+            },
+            "Random Forest": {
+                'n_estimators': [25, 50, 100],
+                'max_depth': [5, 8, 10, 15]
+            },
+            "Linear Regression": {},
+            "K-Neighbors": {
+                'n_neighbors': [3, 5, 7, 9],
+                'weights': ['uniform', 'distance']
+            },
+            "AdaBoost Regressor": {
+                'learning_rate': [.1, .01, 0.5],
+                'n_estimators': [25, 50, 100]
+            }
+        }
+
+    def cache_params(self):
+        """
+        Parameters that change the training output (used for stage caching)
+        """
+        return {
+            "models": {name: repr(model) for name, model in self.get_models().items()},
+            "params": self.get_params(),
+            "search_strategy": self.search_strategy,
+            "time_budget": self.time_budget,
+            "halving_factor": self.model_trainer_config.halving_factor,
+            "halving_resource": self.model_trainer_config.halving_resource,
+        }
+
+    def build_leaderboard(self, search_details):
+        """
+        Flatten the search results into one row per candidate, best first
+        """
+        leaderboard = []
+        for name, result in search_details["results"].items():
+            for candidate in result["candidates"]:
+                row = dict(candidate)
+                if candidate["status"] == "selected":
+                    row["test_score"] = result["test_score"]
+                leaderboard.append(row)
+        leaderboard.sort(key=lambda row: float("inf") if row["cv_score"] is None else -row["cv_score"])
+        return leaderboard
+
+    def save_leaderboard(self):
+        file_path = self.model_trainer_config.leaderboard_file_path
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as file_obj:
+            json.dump(
+                {"summary": self.search_details["summary"], "leaderboard": self.leaderboard},
+                file_obj,
+                indent=2,
+                default=str,
+            )
+
+    @staticmethod
+    def _split(data):
+        # An (X, y) pair from the lean transformation, or one array with the target last
+        if isinstance(data, tuple):
+            return data
+        return data[:, :-1], data[:, -1]
 
     def initiate_model_trainer(self, train_array, test_array):
         try:
             logging.info("Split training and test input data")
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],
-                train_array[:, -1],
-                test_array[:, :-1],
-                test_array[:, -1]
+            X_train, y_train = self._split(train_array)
+            X_test, y_test = self._split(test_array)
+            models = self.get_models()
+            params = self.get_params()
+
+            model_report, self.search_details = evaluate_models(
+                X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
+                models=models, param=params, n_jobs=self.n_jobs, return_details=True,
+                strategy=self.search_strategy, time_budget=self.time_budget,
+                factor=self.model_trainer_config.halving_factor,
+                resource=self.model_trainer_config.halving_resource,
+                trace_memory=self.trace_memory
+            )
+            search_summary = self.search_details["summary"]
+            logging.info(
+                f"Model search ({self.search_strategy}) took {search_summary['wall_time']:.2f}s wall clock "
+                f"(CPU utilization x{search_summary['cpu_utilization']:.2f} with n_jobs={self.n_jobs})"
             )
-            models = {
-                "Random Forest": RandomForestRegressor(n_estimators=50, max_depth=10),
-                "Decision Tree": DecisionTreeRegressor(max_depth=8),
-                "Linear Regression": LinearRegression(),
-                "K-Neighbors": KNeighborsRegressor(n_neighbors=5),
-                "AdaBoost Regressor": AdaBoostRegressor(n_estimators=50),
-            }
-            params = {
-                "Decision Tree": {
-                    'criterion': ['squared_error', 'friedman_mse', 'absolute_error'],
-                    'max_depth': [3, 5, 8, 10],
-                },
-                "Random Forest": {
-                    'n_estimators': [25, 50, 100],
-                    'max_depth': [5, 8, 10, 15]
-                },
-                "Linear Regression": {},
-                "K-Neighbors": {
-                    'n_neighbors': [3, 5, 7, 9],
-                    'weights': ['uniform', 'distance']
-                },
-                "AdaBoost Regressor": {
-                    'learning_rate': [.1, .01, 0.5],
-                    'n_estimators': [25, 50, 100]
-                }
-            }
 
-            model_report: dict = evaluate_models(X_train=X_train, y_train=y_train, X_test=X_test, y_test=y_test,
-                                               models=models, param=params)
+            self.leaderboard = self.build_leaderboard(self.search_details)
+            self.save_leaderboard()
+            logging.info(f"Leaderboard saved to: {self.model_trainer_config.leaderboard_file_path}")
 
             ## To get best model score from dict
             best_model_score = max(sorted(model_report.values()))
@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, manifest_path
+from src.pipeline.compiled_preprocessor import compile_preprocessor
+
+TABLE_FORMAT_VERSION = 1
+
+@dataclass
+class PredictionTableConfig:
+    table_file_path = os.path.join("artifact", "prediction_table.npy")
+    model_file_path = os.path.join("artifact", "model.pkl")
+    preprocessor_file_path = os.path.join("artifact", "preprocessor.pkl")
+    score_min: int = 0
+    score_max: int = 100
+    # Rows scored per model.predict call while building the table
+    chunk_rows: int = 1 << 17
+
+
+def table_metadata_path(table_file_path):
+    return os.path.splitext(table_file_path)[0] + ".json"
+
+
+def _model_checksum(model_file_path):
+    """
+    sha256 of the model artifact as recorded in its manifest, or None
+    """
+    try:
+        with open(manifest_path(model_file_path)) as file_obj:
+            return json.load(file_obj).get("sha256")
+    except (OSError, ValueError):
+        return None
+
+
+class PredictionTable:
+    """
+    Model output for every point of the input domain, stored as a float32
+    array with one axis per feature: each categorical column in the
+    preprocessor's category order, then every integer reading and writing
+    score. A row with integer scores is answered with a single index
+    computation instead of a transform and a predict.
+    """
+    def __init__(self, table, metadata):
+        self.table = table
+        self.metadata = metadata
+        self.categorical = [(axis["name"], {value: k for k, value in enumerate(axis["values"])})
+                            for axis in metadata["categorical"]]
+        self.numerical = [axis["name"] for axis in metadata["numerical"]]
+        self.score_min = metadata["score_min"]
+        self.score_max = metadata["score_max"]
+        self.strides = metadata["strides"]
+
+    @classmethod
+    def load(cls, table_file_path, mmap_mode="r"):
+        try:
+            with open(table_metadata_path(table_file_path)) as file_obj:
+                metadata = json.load(file_obj)
+            if metadata.get("version") != TABLE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported prediction table version in {table_file_path}")
+            table = np.load(table_file_path, mmap_mode=mmap_mode)
+            if table.shape != (metadata["n_cells"],):
+                raise ValueError(f"Prediction table {table_file_path} does not match its metadata")
+            return cls(table, metadata)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def matches(self, model_file_path):
+        """
+        True if the table was built from the model artifact currently on disk
+        """
+        checksum = _model_checksum(model_file_path)
+        return checksum is not None and checksum == self.metadata.get("model_sha256")
+
+    def index(self, record):
+        """
+        Flat table index of a dict row, or None if the row is outside the table
+        """
+        index = 0
+        axis = 0
+        for name, lookup in self.categorical:
+            k = lookup.get(record.get(name))
+            if k is None:
+                return None
+            index += k * self.strides[axis]
+            axis += 1
+        for name in self.numerical:
+            value = record.get(name)
+            if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+                return None
+            if value != value or int(value) != value or not self.score_min <= value <= self.score_max:
+                return None
+            index += (int(value) - self.score_min) * self.strides[axis]
+            axis += 1
+        return index
+
+    def lookup(self, record):
+        """
+        Predicted score for a dict row, or None when the model has to be used
+        """
+        index = self.index(record)
+        if index is None:
+            return None
+        return float(self.table[index])
+
+
+class PredictionTableBuilder:
+    """
+    Optional post-training stage: scores the whole input domain in vectorized
+    chunks and writes artifact/prediction_table.npy plus a JSON sidecar
+    """
+    def __init__(self):
+        self.prediction_table_config = PredictionTableConfig()
+
+    def build(self, model, preprocessor, input_columns, numerical_columns):
+        config = self.prediction_table_config
+        compiled = compile_preprocessor(preprocessor, input_columns)
+
+        categorical = []
+        for index, _, lookup, _, _, _ in compiled.categorical:
+            categorical.append({"name": compiled.input_columns[index], "values": list(lookup)})
+        n_scores = config.score_max - config.score_min + 1
+        numerical = [{"name": name} for name in numerical_columns]
+
+        shape = [len(axis["values"]) for axis in categorical] + [n_scores] * len(numerical)
+        strides = [int(np.prod(shape[axis + 1:], dtype=np.int64)) for axis in range(len(shape))]
+        n_cells = int(np.prod(shape, dtype=np.int64))
+        block = n_scores ** len(numerical)
+        n_combinations = n_cells // block
+
+        # Every categorical combination shares one grid of scaled numerical features
+        grid = np.stack(
+            np.meshgrid(*[np.arange(config.score_min, config.score_max + 1, dtype=np.float64)] * len(numerical),
+                        indexing="ij"),
+            axis=-1,
+        ).reshape(block, len(numerical))
+        positions = [compiled.input_columns.index(name) for name in numerical_columns]
+        num_order = [compiled._num_index.index(position) for position in positions]
+        scaled = (grid - compiled._num_mean[num_order]) / compiled._num_scale[num_order]
+        num_positions = compiled._num_positions[num_order]
+
+        table_path = config.table_file_path
+        tmp_path = table_path + ".tmp.npy"
+        table = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(n_cells,))
+
+        combinations_per_chunk = max(1, config.chunk_rows // block)
+        row = {name: 0.0 for name in numerical_columns}
+        for start in range(0, n_combinations, combinations_per_chunk):
+            stop = min(start + combinations_per_chunk, n_combinations)
+            X = np.empty(((stop - start) * block, compiled.n_features_out), dtype=np.float64)
+            for j, combination in enumerate(range(start, stop)):
+                codes = np.unravel_index(combination, shape[:len(categorical)])
+                for axis, code in zip(categorical, codes):
+                    row[axis["name"]] = axis["values"][code]
+                rows = X[j * block:(j + 1) * block]
+                rows[:] = compiled.transform_one(row)
+                rows[:, num_positions] = scaled
+            table[start * block:stop * block] = model.predict(X)
+        table.flush()
+        del table
+        os.replace(tmp_path, table_path)
+
+        metadata = {
+            "version": TABLE_FORMAT_VERSION,
+            "categorical": categorical,
+            "numerical": numerical,
+            "score_min": config.score_min,
+            "score_max": config.score_max,
+            "shape": shape,
+            "strides": strides,
+            "n_cells": n_cells,
+            "dtype": "float32",
+            "model_sha256": _model_checksum(config.model_file_path),
+        }
+        # The sidecar is replaced last: readers key on it, so they never pair
+        # new metadata with an old table
+        metadata_path = table_metadata_path(table_path)
+        with open(metadata_path + ".tmp", "w") as file_obj:
+            json.dump(metadata, file_obj, indent=2)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        return table_path
+
+    def initiate_prediction_table(self, input_columns, numerical_columns):
+        try:
+            config = self.prediction_table_config
+            start = time.perf_counter()
+            model = load_object(config.model_file_path)
+            preprocessor = load_object(config.preprocessor_file_path)
+            table_path = self.build(model, preprocessor, input_columns, numerical_columns)
+
+            # Spot-check a few cells against the model (float32 rounding aside)
+            table = PredictionTable.load(table_path)
+            compiled = compile_preprocessor(preprocessor, input_columns)
+            rng = np.random.default_rng(0)
+            for index in rng.integers(0, table.metadata["n_cells"], size=8):
+                codes = np.unravel_index(index, table.metadata["shape"])
+                row = {}
+                for axis, code in zip(table.metadata["categorical"], codes):
+                    row[axis["name"]] = axis["values"][code]
+                for axis, code in zip(table.metadata["numerical"], codes[len(table.categorical):]):
+                    row[axis["name"]] = int(code) + table.score_min
+                expected = float(model.predict(compiled.transform_one(row).reshape(1, -1))[0])
+                if table.index(row) != index or not np.isclose(table.lookup(row), expected, rtol=1e-5, atol=1e-4):
+                    raise ValueError(f"Prediction table does not match the model at {row}")
+
+            logging.info(
+                f"Prediction table with {table.metadata['n_cells']} cells written to {table_path} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return table_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
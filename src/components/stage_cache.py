@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import file_sha256
+
+@dataclass
+class StageCacheConfig:
+    cache_dir: str = os.path.join("artifact", "stage_cache")
+    max_size_bytes: int = 1024 * 1024 * 1024
+
+class StageCache:
+    """
+    Content-addressed cache for TrainPipeline stages.
+
+    A stage is keyed by the sha256 of its input files, its parameters and the
+    keys of the stages it depends on. Its output files, result and arrays are
+    stored under artifact/stage_cache/<stage>/<key>/ and copied back into place
+    on a hit. Least recently used entries are evicted once the cache grows
+    beyond max_size_bytes. Input file hashes are kept in file_hashes.json and
+    reused while a file's size and modification time are unchanged.
+    """
+    MANIFEST = "manifest.json"
+    FILE_HASHES = "file_hashes.json"
+    # Files modified this recently are always rehashed: a same-size rewrite
+    # within the filesystem's timestamp resolution would keep the old mtime
+    RECENT_SECONDS = 2
+
+    def __init__(self, cache_dir=None, max_size_bytes=None, force=False, enabled=True):
+        self.stage_cache_config = StageCacheConfig()
+        self.cache_dir = cache_dir or self.stage_cache_config.cache_dir
+        self.max_size_bytes = max_size_bytes or self.stage_cache_config.max_size_bytes
+        self.force = force
+        self.enabled = enabled
+        self.hits = []
+        self.misses = []
+        self._file_hashes = None
+
+    def _load_file_hashes(self):
+        if self._file_hashes is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.FILE_HASHES)) as file_obj:
+                    self._file_hashes = json.load(file_obj)
+            except (OSError, ValueError):
+                self._file_hashes = {}
+        return self._file_hashes
+
+    def _save_file_hashes(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = os.path.join(self.cache_dir, f"{self.FILE_HASHES}.tmp{os.getpid()}")
+        with open(tmp_path, "w") as file_obj:
+            json.dump(self._file_hashes, file_obj)
+        os.replace(tmp_path, os.path.join(self.cache_dir, self.FILE_HASHES))
+
+    def file_hash(self, path):
+        """
+        sha256 of one file, reused from an earlier run while its (size, mtime) is unchanged
+        """
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        file_hashes = self._load_file_hashes() if self.enabled else {}
+        known = file_hashes.get(os.path.abspath(path))
+        if known is not None and known["signature"] == signature:
+            return known["sha256"]
+
+        sha256 = file_sha256(path)
+        if self.enabled and time.time() - stat.st_mtime > self.RECENT_SECONDS:
+            file_hashes[os.path.abspath(path)] = {"signature": signature, "sha256": sha256}
+            self._save_file_hashes()
+        return sha256
+
+    def hash_path(self, path, digest=None):
+        """
+        Hash a file, or every file of a directory in sorted order
+        """
+        digest = digest or hashlib.sha256()
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    digest.update(os.path.relpath(file_path, path).encode())
+                    self.hash_path(file_path, digest)
+            return digest
+        digest.update(self.file_hash(path).encode())
+        return digest
+
+    def make_key(self, stage, files=(), params=None, upstream=()):
+        try:
+            digest = hashlib.sha256(stage.encode())
+            for path in files:
+                digest.update(os.path.basename(path).encode())
+                self.hash_path(path, digest)
+            digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+            for key in upstream:
+                digest.update(key.encode())
+            return digest.hexdigest()[:32]
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _entry_dir(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key)
+
+    def _read_manifest(self, entry_dir):
+        with open(os.path.join(entry_dir, self.MANIFEST)) as file_obj:
+            return json.load(file_obj)
+
+    def _write_manifest(self, entry_dir, manifest):
+        tmp_path = os.path.join(entry_dir, self.MANIFEST + ".tmp")
+        with open(tmp_path, "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2, default=str)
+        os.replace(tmp_path, os.path.join(entry_dir, self.MANIFEST))
+
+    @staticmethod
+    def _copy(src, dst):
+        if os.path.dirname(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.isdir(src):
+            if os.path.exists(dst):
+                shutil.rmtree(dst)
+            shutil.copytree(src, dst)
+        else:
+            shutil.copy2(src, dst)
+
+    @staticmethod
+    def _size(path):
+        if os.path.isdir(path):
+            return sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, files in os.walk(path) for name in files
+            )
+        return os.path.getsize(path)
+
+    def lookup(self, stage, key):
+        """
+        Return the manifest of a cached stage run, or None
+        """
+        entry_dir = self._entry_dir(stage, key)
+        if self.force or not self.enabled or not os.path.exists(os.path.join(entry_dir, self.MANIFEST)):
+            return None
+        manifest = self._read_manifest(entry_dir)
+        manifest["last_used"] = time.time()
+        self._write_manifest(entry_dir, manifest)
+        return manifest
+
+    def restore(self, stage, key, manifest, outputs):
+        """
+        Copy cached output files back to their pipeline locations and load cached arrays
+        """
+        entry_dir = self._entry_dir(stage, key)
+        for name, dst in outputs.items():
+            self._copy(os.path.join(entry_dir, manifest["outputs"][name]), dst)
+        arrays = {
+            name: np.load(os.path.join(entry_dir, file_name))
+            for name, file_name in manifest["arrays"].items()
+        }
+        return manifest["result"], arrays
+
+    def store(self, stage, key, outputs, result=None, arrays=None):
+        """
+        Save a stage's output files, JSON result and numpy arrays under its key
+        """
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(stage, key)
+        tmp_dir = entry_dir + ".tmp"
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        os.makedirs(tmp_dir)
+
+        manifest = {
+            "stage": stage,
+            "key": key,
+            "created": time.time(),
+            "last_used": time.time(),
+            "outputs": {},
+            "arrays": {},
+            "result": result,
+        }
+        for name, src in outputs.items():
+            file_name = f"{name}__{os.path.basename(src.rstrip(os.sep))}"
+            self._copy(src, os.path.join(tmp_dir, file_name))
+            manifest["outputs"][name] = file_name
+        for name, array in (arrays or {}).items():
+            file_name = f"{name}.npy"
+            np.save(os.path.join(tmp_dir, file_name), array)
+            manifest["arrays"][name] = file_name
+        manifest["size_bytes"] = self._size(tmp_dir)
+        self._write_manifest(tmp_dir, manifest)
+
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+        self.evict(keep={entry_dir})
+
+    def run(self, stage, key, outputs, compute):
+        """
+        Reuse the cached outputs of `stage` for `key`, or call compute() and cache what it produced.
+        compute() returns (json-serialisable result, {name: ndarray}).
+        """
+        try:
+            manifest = self.lookup(stage, key)
+            if manifest is not None:
+                logging.info(f"Stage cache hit for {stage} ({key})")
+                self.hits.append(stage)
+                return self.restore(stage, key, manifest, outputs)
+
+            logging.info(f"Stage cache miss for {stage} ({key})")
+            self.misses.append(stage)
+            result, arrays = compute()
+            self.store(stage, key, outputs, result, arrays)
+            return result, arrays
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def entries(self):
+        found = []
+        if not os.path.isdir(self.cache_dir):
+            return found
+        for stage in os.listdir(self.cache_dir):
+            stage_dir = os.path.join(self.cache_dir, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            for key in os.listdir(stage_dir):
+                entry_dir = os.path.join(stage_dir, key)
+                if os.path.exists(os.path.join(entry_dir, self.MANIFEST)):
+                    found.append((entry_dir, self._read_manifest(entry_dir)))
+        return found
+
+    def evict(self, keep=()):
+        """
+        Delete least recently used entries until the cache fits in max_size_bytes
+        """
+        entries = sorted(self.entries(), key=lambda item: item[1].get("last_used", 0))
+        total = sum(manifest.get("size_bytes", 0) for _, manifest in entries)
+        for entry_dir, manifest in entries:
+            if total <= self.max_size_bytes:
+                break
+            if entry_dir in keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= manifest.get("size_bytes", 0)
+            logging.info(f"Evicted stage cache entry {entry_dir}")
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
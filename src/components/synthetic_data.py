@@ -0,0 +1,158 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.exception import CustomException
+from src.logger import logging
+from src.schema import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, TARGET_COLUMN
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+@dataclass
+class SyntheticDataConfig:
+    source_data_path: str = os.path.join('artifact', "stud.csv")
+    output_data_path: str = os.path.join('artifact', "synthetic.csv")
+    categorical_columns: tuple = tuple(CATEGORICAL_FEATURES)
+    score_columns: tuple = (TARGET_COLUMN, *NUMERICAL_FEATURES)
+    chunk_rows: int = 100_000
+    score_min: int = 0
+    score_max: int = 100
+    # Pseudo-count added to every combination of categories, so combinations
+    # missing from the source can still be drawn (0 reproduces only observed ones)
+    smoothing: float = 0.0
+
+class SyntheticDataGenerator:
+    """
+    Generates realistic synthetic student records at any size.
+
+    fit() learns the joint frequency of every combination of the categorical
+    columns, a linear model of each score on the categories, and the
+    covariance of the score residuals (which carries the correlation between
+    math, reading and writing). generate() then draws categories from the
+    joint distribution and scores from the conditional multivariate normal,
+    clipped to the score range and rounded like the source.
+
+    Output is reproducible: chunk i is drawn from its own generator seeded
+    with (seed, i), so a given seed and chunk_rows always give the same data
+    regardless of how much of the stream is consumed.
+    """
+    def __init__(self, seed=42, chunk_rows=None, smoothing=None):
+        self.synthetic_data_config = SyntheticDataConfig()
+        self.seed = seed
+        self.chunk_rows = chunk_rows or self.synthetic_data_config.chunk_rows
+        self.smoothing = self.synthetic_data_config.smoothing if smoothing is None else smoothing
+        self.columns = None
+
+    def fit(self, df=None):
+        """
+        Learn the distribution from a DataFrame (default: stud.csv)
+        """
+        try:
+            config = self.synthetic_data_config
+            if df is None:
+                df = pd.read_csv(config.source_data_path)
+            categorical = list(config.categorical_columns)
+            scores = list(config.score_columns)
+            df = df.dropna(subset=categorical + scores)
+            if df.empty:
+                raise ValueError("Cannot fit the synthetic data generator on an empty dataset")
+            self.columns = [column for column in df.columns if column in categorical + scores]
+
+            # Joint distribution over the full grid of category combinations
+            self.categories = {column: np.sort(df[column].unique()) for column in categorical}
+            codes = np.stack([
+                np.searchsorted(self.categories[column], df[column].to_numpy()) for column in categorical
+            ], axis=1)
+            shape = tuple(len(self.categories[column]) for column in categorical)
+            counts = np.bincount(np.ravel_multi_index(codes.T, shape), minlength=int(np.prod(shape)))
+            weights = counts + self.smoothing
+            self.combination_shape = shape
+            self.combination_probs = weights / weights.sum()
+
+            # Scores = intercept + main effect of each category + correlated noise
+            design = self._design_matrix(codes)
+            targets = df[scores].to_numpy(dtype=np.float64)
+            self.coefficients, *_ = np.linalg.lstsq(design, targets, rcond=None)
+            residuals = targets - design @ self.coefficients
+            self.residual_cov = np.cov(residuals, rowvar=False)
+            self.cholesky = np.linalg.cholesky(self.residual_cov + 1e-9 * np.eye(len(scores)))
+
+            logging.info(
+                f"Synthetic data generator fitted on {len(df)} rows: "
+                f"{int((counts > 0).sum())} of {counts.size} category combinations observed"
+            )
+            return self
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _design_matrix(self, codes):
+        # One-hot main effects with the first level of each column as reference
+        blocks = [np.ones((len(codes), 1))]
+        for i, column in enumerate(self.synthetic_data_config.categorical_columns):
+            n_levels = len(self.categories[column])
+            blocks.append(np.eye(n_levels)[codes[:, i]][:, 1:])
+        return np.hstack(blocks)
+
+    def _chunk(self, index, n_rows):
+        config = self.synthetic_data_config
+        rng = np.random.default_rng([self.seed, index])
+
+        combinations = rng.choice(len(self.combination_probs), size=n_rows, p=self.combination_probs)
+        codes = np.stack(np.unravel_index(combinations, self.combination_shape), axis=1)
+        noise = rng.standard_normal((n_rows, len(config.score_columns))) @ self.cholesky.T
+        scores = self._design_matrix(codes) @ self.coefficients + noise
+        scores = np.clip(np.rint(scores), config.score_min, config.score_max).astype(np.int64)
+
+        data = {}
+        for i, column in enumerate(config.categorical_columns):
+            data[column] = self.categories[column][codes[:, i]]
+        for i, column in enumerate(config.score_columns):
+            data[column] = scores[:, i]
+        return pd.DataFrame(data)[self.columns]
+
+    def generate(self, n_rows):
+        """
+        Yield DataFrames of at most chunk_rows rows, n_rows in total
+        """
+        if self.columns is None:
+            self.fit()
+        for index, start in enumerate(range(0, n_rows, self.chunk_rows)):
+            yield self._chunk(index, min(self.chunk_rows, n_rows - start))
+
+    def write_csv(self, n_rows, output_path=None):
+        """
+        Stream n_rows synthetic rows to a CSV with the same layout as stud.csv
+        """
+        try:
+            output_path = output_path or self.synthetic_data_config.output_data_path
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            tmp_path = f"{output_path}.tmp"
+            logging.info(f"Writing {n_rows} synthetic rows to {output_path}")
+            with open(tmp_path, "w", newline="") as file_obj:
+                for index, chunk in enumerate(self.generate(n_rows)):
+                    chunk.to_csv(file_obj, header=index == 0, index=False)
+            os.replace(tmp_path, output_path)
+            return output_path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset shaped like stud.csv")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--output", default=SyntheticDataConfig.output_data_path)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=SyntheticDataConfig.chunk_rows)
+    args = parser.parse_args()
+
+    generator = SyntheticDataGenerator(seed=args.seed, chunk_rows=args.chunk_rows).fit()
+    print(generator.write_csv(args.rows, args.output))
@@ -15,24 +15,188 @@
 #     format="[%(asctime)s] %(lineno)d %(name)s -%(levelname)s -%(message)s",
 #     level=logging.INFO,
 # )
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+import uuid
 from datetime import datetime
 
-# Create logs directory if it doesn't exist
-LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
+# LOG_FILE lets every worker of a deployment append to the same file
+LOG_FILE = os.environ.get("LOG_FILE") or f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 logs_path = os.path.join(os.getcwd(), "logs")
-os.makedirs(logs_path, exist_ok=True)
 
 # Full path to the log file
 LOG_FILE_PATH = os.path.join(logs_path, LOG_FILE)
+# Child processes (training jobs, joblib workers, report subprocesses) inherit
+# the environment and append to this file instead of opening their own
+os.environ["LOG_FILE"] = LOG_FILE_PATH
 
-# Configure logging
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[%(asctime)s] [Line: %(lineno)d] [%(name)s] - %(levelname)s - %(message)s",
-    level=logging.INFO,
-)
+# "json" (one structured record per line) or "text"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+TEXT_FORMAT = "[%(asctime)s] [Line: %(lineno)d] [%(name)s] - %(levelname)s - %(message)s"
+# Records waiting for the writer thread; beyond this they are dropped, never blocking the caller
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Fraction of INFO records from the "prediction" logger that are kept
+PREDICTION_LOG_SAMPLE_RATE = float(os.environ.get("LOG_PREDICTION_SAMPLE_RATE", 0.1))
 
-# Example usage
-logging.info("Logging system initialized successfully.")
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def set_request_id(request_id=None):
+    """
+    Tag the records logged in the current context (request, task or thread) with a request id
+    """
+    request_id = request_id or new_request_id()
+    request_id_var.set(request_id)
+    return request_id
+
+
+class LazyFileHandler(logging.FileHandler):
+    """
+    FileHandler that creates the logs directory and the log file on the first
+    record, so importing the logger costs nothing and processes that never log
+    do not leave empty files behind
+    """
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, source line,
+    process id, request id and any fields passed with `extra`
+    """
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "pid": record.process,
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Copy the current request id onto the record on the calling thread,
+    before it is handed to the writer thread
+    """
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a random `rate` fraction of records below WARNING; warnings and errors always pass
+    """
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records instead of waiting when the queue is full
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogging:
+    """
+    Queue-based logging backend: callers only format the message and put the
+    record on a bounded queue; a single listener thread per process does the
+    file I/O. Restarted in forked children (gunicorn workers), whose copy of
+    the listener thread does not run.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queue_handler = None
+        self.listener = None
+        self.file_handler = LazyFileHandler(LOG_FILE_PATH)
+        self.file_handler.setFormatter(
+            JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+        )
+
+    def start(self):
+        with self._lock:
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            root = logging.getLogger()
+            if self.queue_handler is None:
+                self.queue_handler = NonBlockingQueueHandler(log_queue)
+                self.queue_handler.addFilter(RequestIdFilter())
+                root.addHandler(self.queue_handler)
+                root.setLevel(logging.INFO)
+            else:
+                self.queue_handler.queue = log_queue
+            self.listener = logging.handlers.QueueListener(log_queue, self.file_handler)
+            self.listener.start()
+
+    def stop(self):
+        """
+        Flush the queued records and stop the writer thread
+        """
+        with self._lock:
+            if self.listener is not None and self.listener._thread is not None:
+                self.listener.stop()
+            self.file_handler.flush()
+
+    def stats(self):
+        return {
+            "queued": self.queue_handler.queue.qsize() if self.queue_handler else 0,
+            "dropped": self.queue_handler.dropped if self.queue_handler else 0,
+        }
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self.listener = None
+        self.start()
+
+
+async_logging = AsyncLogging()
+async_logging.start()
+atexit.register(async_logging.stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=async_logging._after_fork)
+
+# High-volume per-prediction records, sampled
+prediction_logger = logging.getLogger("prediction")
+prediction_logger.addFilter(SamplingFilter(PREDICTION_LOG_SAMPLE_RATE))
@@ -0,0 +1,293 @@
+import os
+import bisect
+import glob
+import json
+import threading
+import time
+from contextlib import nullcontext
+
+# METRICS_ENABLED=0 turns every metric into a no-op
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+# Directory shared by the processes of one server (e.g. gunicorn workers):
+# each process writes its metrics there and /metrics renders their sum
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+
+# Latency buckets in seconds, from 50 microseconds to 60 seconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_NULL_TIMER = nullcontext()
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def snapshot(self):
+        """
+        JSON-serializable [labels, value] pairs of this process
+        """
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    @staticmethod
+    def merge(values, snapshot):
+        for key, value in snapshot:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def render(self, values=None):
+        lines = self.header()
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Fixed-bucket histogram: observe() is a bisect and three additions under a lock
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS, registry=None):
+        super().__init__(name, documentation, labels, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels):
+        """
+        Context manager observing the elapsed seconds of its block
+        """
+        if not METRICS_ENABLED:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    @staticmethod
+    def _copy(entry):
+        return [list(entry[0]), entry[1], entry[2]]
+
+    @staticmethod
+    def merge(values, snapshot):
+        for key, (counts, total, count) in snapshot:
+            key = tuple(key)
+            entry = values.get(key)
+            if entry is None:
+                values[key] = [list(counts), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def render(self, values=None):
+        lines = self.header()
+        if values is None:
+            with self._lock:
+                values = {key: self._copy(entry) for key, entry in self._values.items()}
+        items = sorted(values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, [('le', le)])} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    """
+    Without METRICS_DIR, render() reports only the calling process. With it,
+    every process writes its values to METRICS_DIR/<pid>.json (on each scrape
+    it serves and every METRICS_FLUSH_SECONDS from a background thread) and
+    render() sums the files of all processes, so a scrape that lands on any
+    gunicorn worker sees the whole server. Files of exited workers are kept:
+    their requests still count towards the totals, as counters must not go
+    down.
+    """
+    def __init__(self, directory=None):
+        self._metrics = []
+        self._lock = threading.Lock()
+        self.directory = directory
+        self._flusher = None
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def write(self):
+        """
+        Write this process's values to its file in the shared directory
+        """
+        if not self.directory:
+            return
+        with self._lock:
+            metrics = list(self._metrics)
+        data = {metric.name: metric.snapshot() for metric in metrics}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def start_flusher(self):
+        """
+        Periodically write this process's values; call once per process
+        (threads do not survive a fork)
+        """
+        if not self.directory or not METRICS_ENABLED:
+            return
+
+        def flush():
+            while True:
+                time.sleep(METRICS_FLUSH_SECONDS)
+                try:
+                    self.write()
+                except OSError:
+                    pass
+
+        self._flusher = threading.Thread(target=flush, name="metrics-flush", daemon=True)
+        self._flusher.start()
+
+    def _collect(self):
+        self.write()
+        merged = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, snapshot in data.items():
+                merged.setdefault(name, []).append(snapshot)
+        return merged
+
+    def render(self):
+        """
+        All metrics, of this process or of every process sharing the
+        directory, in the Prometheus text exposition format
+        """
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        if not self.directory:
+            for metric in metrics:
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+        merged = self._collect()
+        for metric in metrics:
+            values = {}
+            for snapshot in merged.get(metric.name, []):
+                metric.merge(values, snapshot)
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = Registry(METRICS_DIR)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Serving
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint and status code", ("endpoint", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by endpoint", ("endpoint",))
+PREDICTION_ERRORS = Counter("prediction_errors_total", "Failed prediction requests by endpoint", ("endpoint",))
+PREDICT_STAGE_LATENCY = Histogram(
+    "predict_stage_duration_seconds",
+    "Latency of the steps of a prediction (parse, table_lookup, transform, model_predict)",
+    ("stage",),
+)
+ARTIFACT_LOAD_LATENCY = Histogram("artifact_load_duration_seconds", "Time to load an artifact from disk", ("artifact",))
+ARTIFACT_CACHE_REQUESTS = Counter("artifact_cache_requests_total", "Artifact cache lookups by result", ("result",))
+MICROBATCH_SIZE = Histogram("microbatch_size", "Rows scored per micro-batch", buckets=SIZE_BUCKETS)
+MICROBATCH_QUEUE_DELAY = Histogram("microbatch_queue_delay_seconds", "Time a request waited for its micro-batch")
+
+# Training
+TRAINING_STAGE_LATENCY = Histogram(
+    "training_stage_duration_seconds", "Duration of TrainPipeline stages", ("stage", "status")
+)
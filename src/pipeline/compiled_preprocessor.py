@@ -0,0 +1,338 @@
+import sys
+import math
+
+import numpy as np
+
+from src.exception import CustomException
+
+
+class CompiledPreprocessor:
+    """
+    Numpy-only replacement for the fitted ColumnTransformer built in
+    DataTransformation.get_data_trasnsformer_obj.
+
+    Numerical columns become an affine transform ((x - mean) / scale) and every
+    categorical value maps to a precomputed, already scaled one-hot block, so a
+    single row goes from a dict or tuple to its feature vector without pandas
+    or sklearn validation.
+    """
+    def __init__(self, input_columns, n_features_out, numerical, categorical):
+        # numerical: list of (input index, fill value, mean, scale, output position)
+        # categorical: list of (input index, fill value, {value: row}, table, output slice, unknown row)
+        self.input_columns = list(input_columns)
+        self.n_features_out = n_features_out
+        self.numerical = numerical
+        self.categorical = categorical
+
+        self._num_index = [item[0] for item in numerical]
+        self._num_fill = np.array([item[1] for item in numerical], dtype=np.float64)
+        self._num_mean = np.array([item[2] for item in numerical], dtype=np.float64)
+        self._num_scale = np.array([item[3] for item in numerical], dtype=np.float64)
+        self._num_positions = np.array([item[4] for item in numerical], dtype=np.intp)
+
+    @classmethod
+    def from_column_transformer(cls, preprocessor, input_columns=None):
+        """
+        Compile a fitted ColumnTransformer made of SimpleImputer, OneHotEncoder
+        and StandardScaler pipelines
+        """
+        try:
+            if getattr(preprocessor, "remainder", "drop") != "drop":
+                raise ValueError("Only ColumnTransformer(remainder='drop') can be compiled")
+
+            transformers = [
+                (name, transformer, list(columns))
+                for name, transformer, columns in preprocessor.transformers_
+                if transformer != "drop" and name != "remainder"
+            ]
+            if input_columns is None:
+                input_columns = [column for _, _, columns in transformers for column in columns]
+            input_index = {column: i for i, column in enumerate(input_columns)}
+
+            numerical, categorical = [], []
+            position = 0
+
+            for name, transformer, columns in transformers:
+                steps = [step for _, step in getattr(transformer, "steps", [(name, transformer)])]
+                fill, encoder, scaler = None, None, None
+                for step in steps:
+                    kind = type(step).__name__
+                    if kind == "SimpleImputer":
+                        fill = step.statistics_
+                    elif kind == "OneHotEncoder":
+                        if getattr(step, "drop_idx_", None) is not None:
+                            raise ValueError("OneHotEncoder with drop is not supported")
+                        encoder = step
+                    elif kind == "StandardScaler":
+                        if encoder is None and scaler is not None:
+                            raise ValueError("Stacked scalers are not supported")
+                        scaler = step
+                    else:
+                        raise ValueError(f"Unsupported step '{kind}' in '{name}'")
+
+                if encoder is None:
+                    # Numerical block: impute then (x - mean) / scale, one output per column
+                    width = len(columns)
+                    mean, scale = cls._scaler_params(scaler, width)
+                    for j, column in enumerate(columns):
+                        column_fill = float(fill[j]) if fill is not None else np.nan
+                        numerical.append(
+                            (input_index[column], column_fill, mean[j], scale[j], position + j)
+                        )
+                    position += width
+                    continue
+
+                # Categorical block: impute, one-hot, then scale; precompute every value
+                width = sum(len(categories) for categories in encoder.categories_)
+                mean, scale = cls._scaler_params(scaler, width)
+                offset = 0
+                for j, column in enumerate(columns):
+                    categories = encoder.categories_[j]
+                    n_categories = len(categories)
+                    block = slice(offset, offset + n_categories)
+
+                    table = np.eye(n_categories, dtype=np.float64)
+                    table -= mean[block]
+                    table /= scale[block]
+
+                    unknown_row = None
+                    if encoder.handle_unknown != "error":
+                        unknown_row = np.zeros(n_categories, dtype=np.float64)
+                        unknown_row -= mean[block]
+                        unknown_row /= scale[block]
+
+                    lookup = {value: k for k, value in enumerate(categories.tolist())}
+                    column_fill = fill[j] if fill is not None else None
+                    output = slice(position + offset, position + offset + n_categories)
+                    categorical.append(
+                        (input_index[column], column_fill, lookup, table, output, unknown_row)
+                    )
+                    offset += n_categories
+                position += width
+
+            return cls(input_columns, position, numerical, categorical)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _scaler_params(scaler, width):
+        mean = np.zeros(width)
+        scale = np.ones(width)
+        if scaler is not None:
+            if scaler.mean_ is not None:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.scale_ is not None:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+        return mean, scale
+
+    @staticmethod
+    def _is_missing(value):
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    def _as_tuple(self, row):
+        if isinstance(row, dict):
+            return tuple(row[column] for column in self.input_columns)
+        return row
+
+    def transform_one(self, row, out=None):
+        """
+        Transform a single row given as a dict or a tuple in input_columns order
+        """
+        values = self._as_tuple(row)
+        if out is None:
+            out = np.empty(self.n_features_out, dtype=np.float64)
+
+        numbers = np.array(
+            [np.nan if self._is_missing(values[i]) else float(values[i]) for i in self._num_index],
+            dtype=np.float64,
+        )
+        missing = np.isnan(numbers)
+        if missing.any():
+            numbers[missing] = self._num_fill[missing]
+        numbers -= self._num_mean
+        numbers /= self._num_scale
+        out[self._num_positions] = numbers
+
+        for index, fill, lookup, table, output, unknown_row in self.categorical:
+            value = values[index]
+            if self._is_missing(value):
+                value = fill
+            k = lookup.get(value)
+            if k is not None:
+                out[output] = table[k]
+            elif unknown_row is not None:
+                out[output] = unknown_row
+            else:
+                raise ValueError(
+                    f"Found unknown category {value!r} in column '{self.input_columns[index]}'"
+                )
+        return out
+
+    def transform(self, rows):
+        """
+        Transform a DataFrame, or a sequence of dicts or tuples, into a 2-D feature matrix
+        """
+        if hasattr(rows, "columns"):
+            return self._transform_frame(rows)
+
+        rows = list(rows)
+        out = np.empty((len(rows), self.n_features_out), dtype=np.float64)
+        for i, row in enumerate(rows):
+            self.transform_one(row, out=out[i])
+        return out
+
+    def _transform_frame(self, frame):
+        """
+        Column-at-a-time transform of a DataFrame (or any mapping of column arrays)
+        """
+        n_rows = len(frame)
+        out = np.empty((n_rows, self.n_features_out), dtype=np.float64)
+
+        if self.numerical:
+            numbers = np.empty((n_rows, len(self.numerical)), dtype=np.float64)
+            for j, i in enumerate(self._num_index):
+                numbers[:, j] = np.asarray(frame[self.input_columns[i]], dtype=np.float64)
+            missing = np.isnan(numbers)
+            if missing.any():
+                numbers[missing] = np.broadcast_to(self._num_fill, numbers.shape)[missing]
+            numbers -= self._num_mean
+            numbers /= self._num_scale
+            out[:, self._num_positions] = numbers
+
+        for index, fill, lookup, table, output, unknown_row in self.categorical:
+            column = self.input_columns[index]
+            codes = np.fromiter(
+                (lookup.get(fill if self._is_missing(value) else value, -1)
+                 for value in np.asarray(frame[column], dtype=object)),
+                dtype=np.intp,
+                count=n_rows,
+            )
+            unknown = codes < 0
+            if unknown.any():
+                if unknown_row is None:
+                    value = np.asarray(frame[column], dtype=object)[np.flatnonzero(unknown)[0]]
+                    raise ValueError(f"Found unknown category {value!r} in column '{column}'")
+                codes[unknown] = 0
+                out[:, output] = table[codes]
+                out[unknown, output] = unknown_row
+            else:
+                out[:, output] = table[codes]
+        return out
+
+    def known_categories(self):
+        """
+        Map each categorical column to the set of values it accepts
+        """
+        return {self.input_columns[item[0]]: set(item[2]) for item in self.categorical}
+
+    def to_arrays(self, prefix=""):
+        """
+        Flatten into plain numpy arrays (no pickled objects) for np.savez
+        """
+        arrays = {
+            f"{prefix}input_columns": np.array(self.input_columns, dtype=str),
+            f"{prefix}n_features_out": np.array(self.n_features_out),
+            f"{prefix}num_index": np.array(self._num_index, dtype=np.intp),
+            f"{prefix}num_fill": self._num_fill,
+            f"{prefix}num_mean": self._num_mean,
+            f"{prefix}num_scale": self._num_scale,
+            f"{prefix}num_positions": self._num_positions,
+            f"{prefix}n_categorical": np.array(len(self.categorical)),
+        }
+        for j, (index, fill, lookup, table, output, unknown_row) in enumerate(self.categorical):
+            vocabulary = list(lookup)
+            if not all(isinstance(value, str) for value in vocabulary + ([fill] if fill is not None else [])):
+                raise ValueError("Only string categories can be exported")
+            arrays[f"{prefix}cat{j}_vocabulary"] = np.array(vocabulary, dtype=str)
+            arrays[f"{prefix}cat{j}_table"] = table
+            arrays[f"{prefix}cat{j}_meta"] = np.array(
+                [index, output.start, output.stop, unknown_row is not None], dtype=np.intp
+            )
+            arrays[f"{prefix}cat{j}_fill"] = np.array([] if fill is None else [fill], dtype=str)
+            if unknown_row is not None:
+                arrays[f"{prefix}cat{j}_unknown"] = unknown_row
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=""):
+        """
+        Rebuild a compiled preprocessor from the output of to_arrays
+        """
+        numerical = list(zip(
+            arrays[f"{prefix}num_index"].tolist(),
+            arrays[f"{prefix}num_fill"].tolist(),
+            arrays[f"{prefix}num_mean"].tolist(),
+            arrays[f"{prefix}num_scale"].tolist(),
+            arrays[f"{prefix}num_positions"].tolist(),
+        ))
+        categorical = []
+        for j in range(int(arrays[f"{prefix}n_categorical"])):
+            index, start, stop, has_unknown = arrays[f"{prefix}cat{j}_meta"].tolist()
+            fill = arrays[f"{prefix}cat{j}_fill"].tolist()
+            lookup = {value: k for k, value in enumerate(arrays[f"{prefix}cat{j}_vocabulary"].tolist())}
+            categorical.append((
+                index,
+                fill[0] if fill else None,
+                lookup,
+                arrays[f"{prefix}cat{j}_table"],
+                slice(start, stop),
+                arrays[f"{prefix}cat{j}_unknown"] if has_unknown else None,
+            ))
+        return cls(
+            arrays[f"{prefix}input_columns"].tolist(),
+            int(arrays[f"{prefix}n_features_out"]),
+            numerical,
+            categorical,
+        )
+
+    def verification_rows(self, n_rows=None):
+        """
+        Rows that cover every category of every column plus missing values
+        """
+        n_rows = n_rows or max([len(item[2]) for item in self.categorical] + [1]) + 1
+        rows = []
+        for i in range(n_rows):
+            # The last row is all missing values to exercise the imputers
+            last = i == n_rows - 1
+            row = [np.nan] * len(self.input_columns)
+            for j, item in enumerate(self.numerical):
+                if not last:
+                    row[item[0]] = float(i * 7 + j * 3)
+            for item in self.categorical:
+                vocabulary = list(item[2])
+                if not last:
+                    row[item[0]] = vocabulary[i % len(vocabulary)]
+            rows.append(tuple(row))
+        return rows
+
+    def verify(self, preprocessor, rows=None):
+        """
+        Check that the compiled transform is bit-for-bit identical to the sklearn object
+        """
+        import pandas as pd
+
+        rows = self.verification_rows() if rows is None else [self._as_tuple(row) for row in rows]
+        frame = pd.DataFrame(rows, columns=self.input_columns)
+        expected = np.asarray(preprocessor.transform(frame), dtype=np.float64)
+        actual = self.transform(rows)
+        actual_frame = self.transform(frame)
+        return (
+            expected.shape == actual.shape
+            and np.array_equal(expected, actual)
+            and np.array_equal(expected, actual_frame)
+        )
+
+
+def compile_preprocessor(preprocessor, input_columns=None, rows=None):
+    """
+    Compile a fitted preprocessor and make sure it reproduces the sklearn output exactly
+    """
+    try:
+        compiled = CompiledPreprocessor.from_column_transformer(preprocessor, input_columns)
+        if not compiled.verify(preprocessor, rows):
+            raise ValueError("Compiled preprocessor does not match the sklearn preprocessor")
+        return compiled
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,137 @@
+import sys
+
+import numpy as np
+
+from src.exception import CustomException
+from src.pipeline.compiled_preprocessor import CompiledPreprocessor
+
+EXPORT_FORMAT_VERSION = 1
+MODEL_PREFIX = "model."
+PREPROCESSOR_PREFIX = "preprocessor."
+
+
+class ExportedModel:
+    """
+    Numpy-only evaluator for models written by ModelExporter.
+
+    Supported kinds:
+      - "linear": coef / intercept
+      - "trees":  flattened node arrays for one or more regression trees,
+                  combined by mean (DecisionTree, RandomForest) or by
+                  weighted median (AdaBoost)
+      - "knn":    brute-force k-nearest neighbours over the stored training set
+    """
+    def __init__(self, arrays, prefix=MODEL_PREFIX):
+        self.kind = str(arrays[f"{prefix}kind"])
+        self.arrays = {
+            key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)
+        }
+
+    def predict(self, X):
+        try:
+            X = np.asarray(X, dtype=np.float64)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+
+            if self.kind == "linear":
+                return X @ self.arrays["coef"] + self.arrays["intercept"]
+            if self.kind == "trees":
+                return self._predict_trees(X)
+            if self.kind == "knn":
+                return self._predict_knn(X)
+            raise ValueError(f"Unknown exported model kind '{self.kind}'")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _tree_predictions(self, X):
+        """
+        Traverse every tree for every row at once; returns (n_trees, n_rows)
+        """
+        a = self.arrays
+        left, right = a["children_left"], a["children_right"]
+        feature, threshold, value = a["feature"], a["threshold"], a["value"]
+
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])[np.newaxis, :]
+        node = np.repeat(a["tree_offsets"][:-1, np.newaxis], X.shape[0], axis=1)
+
+        for _ in range(int(a["max_depth"]) + 1):
+            is_split = left[node] >= 0
+            if not is_split.any():
+                break
+            go_left = X[rows, feature[node]] <= threshold[node]
+            node = np.where(is_split, np.where(go_left, left[node], right[node]), node)
+
+        return value[node]
+
+    def _predict_trees(self, X):
+        predictions = self._tree_predictions(X)
+
+        if str(self.arrays["combine"]) == "weighted_median":
+            # Same rule as AdaBoostRegressor._get_median_predict
+            predictions = predictions.T
+            sorted_idx = np.argsort(predictions, axis=1)
+            weight_cdf = np.cumsum(self.arrays["estimator_weights"][sorted_idx], axis=1, dtype=np.float64)
+            median_or_above = weight_cdf >= 0.5 * weight_cdf[:, -1][:, np.newaxis]
+            median_idx = median_or_above.argmax(axis=1)
+            rows = np.arange(predictions.shape[0])
+            return predictions[rows, sorted_idx[rows, median_idx]]
+
+        # Accumulate tree by tree like RandomForestRegressor does
+        result = np.zeros(predictions.shape[1], dtype=np.float64)
+        for tree_prediction in predictions:
+            result += tree_prediction
+        result /= predictions.shape[0]
+        return result
+
+    def _predict_knn(self, X, chunk_size=1024):
+        a = self.arrays
+        fit_X, fit_y = a["fit_X"], a["fit_y"]
+        k = int(a["n_neighbors"])
+        fit_sq = np.einsum("ij,ij->i", fit_X, fit_X)
+        result = np.empty(X.shape[0], dtype=np.float64)
+
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X[start:start + chunk_size]
+            sq = np.einsum("ij,ij->i", chunk, chunk)[:, np.newaxis] - 2.0 * chunk @ fit_X.T + fit_sq
+            neighbours = np.argpartition(sq, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(sq, neighbours, axis=1), axis=1, kind="stable")
+            neighbours = np.take_along_axis(neighbours, order, axis=1)
+
+            if str(a["weights"]) == "distance":
+                dist = np.sqrt(((chunk[:, np.newaxis, :] - fit_X[neighbours]) ** 2).sum(axis=2))
+                with np.errstate(divide="ignore"):
+                    weights = 1.0 / dist
+                exact = np.isinf(weights)
+                exact_rows = exact.any(axis=1)
+                weights[exact_rows] = exact[exact_rows]
+                result[start:start + len(chunk)] = (
+                    (fit_y[neighbours] * weights).sum(axis=1) / weights.sum(axis=1)
+                )
+            else:
+                result[start:start + len(chunk)] = fit_y[neighbours].mean(axis=1)
+        return result
+
+
+def load_exported_model(file_path):
+    """
+    Load (ExportedModel, CompiledPreprocessor or None) from an exported .npz file
+    """
+    try:
+        with np.load(file_path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+
+        version = int(arrays.get("format_version", -1))
+        if version != EXPORT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported export format version {version} in {file_path}")
+
+        model = ExportedModel(arrays)
+        preprocessor = None
+        if f"{PREPROCESSOR_PREFIX}input_columns" in arrays:
+            preprocessor = CompiledPreprocessor.from_arrays(arrays, PREPROCESSOR_PREFIX)
+        return model, preprocessor
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,184 @@
+import os
+import sys
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import MICROBATCH_QUEUE_DELAY, MICROBATCH_SIZE
+
+@dataclass
+class MicroBatcherConfig:
+    max_batch_size: int = 32
+    max_wait_ms: float = 2.0
+    # Number of recent batches kept for the percentile metrics
+    metrics_window: int = 1024
+
+class MicroBatcher:
+    """
+    Collects concurrent single-row requests into one vectorized call.
+
+    Callers submit one item each and get a Future back. A background thread
+    takes the first waiting item, keeps collecting until max_batch_size items
+    are queued or max_wait_ms has passed since that item arrived, then calls
+    batch_fn once with the whole list. batch_fn returns one result per item;
+    a result that is an Exception is raised for that caller only.
+    """
+    def __init__(self, batch_fn, max_batch_size=None, max_wait_ms=None):
+        self.micro_batcher_config = MicroBatcherConfig()
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or self.micro_batcher_config.max_batch_size
+        self.max_wait = (
+            self.micro_batcher_config.max_wait_ms if max_wait_ms is None else max_wait_ms
+        ) / 1000.0
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=self.micro_batcher_config.metrics_window)
+        self._queue_delays = deque(maxlen=self.micro_batcher_config.metrics_window * 4)
+        self.n_batches = 0
+        self.n_items = 0
+        self.n_errors = 0
+
+        # Orders submits against close(), so no item is queued behind the stop sentinel
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Queue one item and return a Future for its result
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def predict(self, item, timeout=None):
+        """
+        Blocking helper: submit one item and wait for its result
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish the current batch, then stop
+                self._closed = True
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            self._process(batch)
+            if self._closed and self._queue.empty():
+                break
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        items = [entry[0] for entry in batch]
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logging.info(f"Micro-batch of {len(items)} items failed: {e}")
+            results = [e] * len(items)
+
+        n_errors = 0
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                n_errors += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        with self._stats_lock:
+            self.n_batches += 1
+            self.n_items += len(batch)
+            self.n_errors += n_errors
+            self._batch_sizes.append(len(batch))
+            self._queue_delays.extend(started - entry[2] for entry in batch)
+        MICROBATCH_SIZE.observe(len(batch))
+        for entry in batch:
+            MICROBATCH_QUEUE_DELAY.observe(started - entry[2])
+
+    def close(self, timeout=None):
+        """
+        Stop accepting items; queued items are still scored
+        """
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Batch size and queueing delay metrics over the recent window
+        """
+        with self._stats_lock:
+            sizes = np.array(self._batch_sizes, dtype=np.float64)
+            delays = np.array(self._queue_delays, dtype=np.float64) * 1000.0
+            summary = {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.n_batches,
+                "items": self.n_items,
+                "errors": self.n_errors,
+                "queued": self._queue.qsize(),
+            }
+        if len(sizes):
+            summary["batch_size"] = {
+                "mean": round(float(sizes.mean()), 3),
+                "p50": float(np.percentile(sizes, 50)),
+                "p99": float(np.percentile(sizes, 99)),
+                "max": int(sizes.max()),
+            }
+            summary["queue_delay_ms"] = {
+                "mean": round(float(delays.mean()), 3),
+                "p50": round(float(np.percentile(delays, 50)), 3),
+                "p99": round(float(np.percentile(delays, 99)), 3),
+                "max": round(float(delays.max()), 3),
+            }
+        return summary
+
+
+def micro_batcher_from_env(batch_fn):
+    """
+    Build a MicroBatcher when PREDICT_MICROBATCH=1, otherwise return None.
+    PREDICT_BATCH_MAX_SIZE and PREDICT_BATCH_WAIT_MS tune the batching window.
+    """
+    try:
+        if os.environ.get("PREDICT_MICROBATCH", "0") != "1":
+            return None
+        max_batch_size = int(os.environ.get("PREDICT_BATCH_MAX_SIZE", MicroBatcherConfig.max_batch_size))
+        max_wait_ms = float(os.environ.get("PREDICT_BATCH_WAIT_MS", MicroBatcherConfig.max_wait_ms))
+        logging.info(f"Micro-batching enabled (max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+        return MicroBatcher(batch_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,392 @@
+import os
+import sys
+import json
+import time
+import fcntl
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import load_object, save_object, artifact_sha256
+from src.columnar import read_table
+from src.schema import FEATURE_COLUMNS, NUMERICAL_FEATURES, TARGET_COLUMN
+from src.pipeline.predict_pipeline import PredictPipeline
+
+@dataclass
+class ModelUpdaterConfig:
+    model_path: str = os.path.join("artifact", "model.pkl")
+    preprocessor_path: str = os.path.join("artifact", "preprocessor.pkl")
+    versions_dir: str = os.path.join("artifact", "model_versions")
+    train_paths: tuple = (os.path.join("artifact", "train.cols"), os.path.join("artifact", "train.csv"))
+    test_paths: tuple = (os.path.join("artifact", "test.cols"), os.path.join("artifact", "test.csv"))
+    # Trees added to a random forest per update
+    forest_new_trees: int = 10
+    # Largest forest; the oldest trees are dropped beyond it
+    forest_max_trees: int = 200
+    # partial_fit passes over the new rows
+    partial_fit_epochs: int = 1
+    # Largest KNN reference set; the oldest rows are dropped beyond it
+    knn_max_reference_rows: int = 100_000
+
+
+def _first_existing(paths):
+    return next((path for path in paths if os.path.exists(path)), None)
+
+
+def _write_json(file_path, data):
+    tmp_path = f"{file_path}.tmp{os.getpid()}"
+    with open(tmp_path, "w") as file_obj:
+        json.dump(data, file_obj, indent=2, default=str)
+    os.replace(tmp_path, file_path)
+
+
+class ModelUpdater:
+    """
+    Updates the deployed model from newly labelled rows without rerunning TrainPipeline.
+
+    The preprocessor is kept as is and the model is updated according to its type:
+      - models with partial_fit (SGD, MLP): partial_fit on the new rows
+      - RandomForestRegressor: warm_start adds forest_new_trees trees fitted on
+        the training data plus every row added so far, replacing the oldest
+        trees once the forest has forest_max_trees
+      - KNeighborsRegressor: the new rows are appended to the reference set
+      - LinearRegression: refitted exactly from running sufficient statistics
+      - anything else: refitted with the same hyperparameters, without a search
+
+    Every update is saved as artifact/model_versions/model_vNNNN.pkl, recorded
+    in versions.json with its cost next to the last full retrain, and then
+    replaces model.pkl. Rows added since the last full retrain are kept in
+    labelled_rows.csv; a model.pkl written by TrainPipeline starts a new lineage.
+    """
+    def __init__(self, training_jobs=None):
+        self.model_updater_config = ModelUpdaterConfig()
+        self.training_jobs = training_jobs
+        self._lock = threading.Lock()
+        self._pending_stats = None
+
+        versions_dir = self.model_updater_config.versions_dir
+        self.versions_path = os.path.join(versions_dir, "versions.json")
+        self.labelled_rows_path = os.path.join(versions_dir, "labelled_rows.csv")
+        self.linear_stats_path = os.path.join(versions_dir, "linear_stats.npz")
+        self.lock_path = os.path.join(versions_dir, ".lock")
+
+    def list_versions(self):
+        if not os.path.exists(self.versions_path):
+            return []
+        with open(self.versions_path) as file_obj:
+            return json.load(file_obj)
+
+    def deployed_version(self):
+        """
+        Version of the online update that model.pkl currently holds, or None for a model from a full retrain
+        """
+        versions = self.list_versions()
+        model_path = self.model_updater_config.model_path
+        if versions and os.path.exists(model_path) and versions[-1]["sha256"] == artifact_sha256(model_path):
+            return versions[-1]["version"]
+        return None
+
+    def validate(self, records, preprocessor=None):
+        """
+        Return the labelled rows as a DataFrame, raising ValueError if any row is
+        unusable (including categories the preprocessor was not fitted on)
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        target = TARGET_COLUMN
+        if df.empty:
+            raise ValueError("No labelled rows given")
+        missing = [column for column in FEATURE_COLUMNS + [target] if column not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+        df = df[FEATURE_COLUMNS + [target]].reset_index(drop=True)
+        for column in NUMERICAL_FEATURES + [target]:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        invalid = df.isna().any(axis=1)
+        if invalid.any():
+            rows = ", ".join(str(i) for i in np.flatnonzero(invalid.to_numpy())[:10])
+            raise ValueError(f"Rows with missing or non-numeric values: {rows}")
+
+        known_categories = PredictPipeline._known_categories(preprocessor) if preprocessor is not None else {}
+        for column, allowed in known_categories.items():
+            unknown = ~df[column].isin(allowed).to_numpy()
+            if unknown.any():
+                rows = ", ".join(str(i) for i in np.flatnonzero(unknown)[:10])
+                raise ValueError(f"Rows with an unknown value of '{column}': {rows}")
+        return df
+
+    def _split(self, df, preprocessor):
+        return preprocessor.transform(df[FEATURE_COLUMNS]), df[TARGET_COLUMN].to_numpy(dtype=np.float64)
+
+    def _training_rows(self):
+        """
+        The training table of the last full retrain plus the rows added since
+        """
+        frames = []
+        train_path = _first_existing(self.model_updater_config.train_paths)
+        if train_path is not None:
+            frames.append(read_table(train_path))
+        if os.path.exists(self.labelled_rows_path):
+            frames.append(pd.read_csv(self.labelled_rows_path))
+        if not frames:
+            return None
+        columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+        return pd.concat([frame[columns] for frame in frames], ignore_index=True)
+
+    def _combined(self, preprocessor, X_new, y_new):
+        base = self._training_rows()
+        if base is None:
+            return X_new, y_new
+        X_base, y_base = self._split(base, preprocessor)
+        return np.vstack([X_base, X_new]), np.concatenate([y_base, y_new])
+
+    def _update_linear(self, model, preprocessor, X_new, y_new):
+        # Sufficient statistics of least squares: n, sums and cross products
+        if os.path.exists(self.linear_stats_path):
+            with np.load(self.linear_stats_path) as stats:
+                n, sum_x, sum_y = float(stats["n"]), stats["sum_x"], float(stats["sum_y"])
+                xtx, xty = stats["xtx"], stats["xty"]
+        else:
+            base = self._training_rows()
+            X_base, y_base = self._split(base, preprocessor) if base is not None else (X_new[:0], y_new[:0])
+            n, sum_x, sum_y = float(len(X_base)), X_base.sum(axis=0), float(y_base.sum())
+            xtx, xty = X_base.T @ X_base, X_base.T @ y_base
+
+        n += len(X_new)
+        sum_x = sum_x + X_new.sum(axis=0)
+        sum_y += float(y_new.sum())
+        xtx = xtx + X_new.T @ X_new
+        xty = xty + X_new.T @ y_new
+        # Written by update() once the new model version is saved
+        self._pending_stats = {"n": n, "sum_x": sum_x, "sum_y": sum_y, "xtx": xtx, "xty": xty}
+
+        # Solve on centered data like LinearRegression (minimum-norm when collinear)
+        mean_x, mean_y = sum_x / n, sum_y / n
+        cov_xx = xtx - n * np.outer(mean_x, mean_x)
+        cov_xy = xty - n * mean_x * mean_y
+        model.coef_ = np.linalg.lstsq(cov_xx, cov_xy, rcond=None)[0]
+        model.intercept_ = mean_y - mean_x @ model.coef_
+        return model
+
+    def update_model(self, model, preprocessor, X_new, y_new):
+        """
+        Update the model in place (or refit a copy); returns (model, strategy)
+        """
+        config = self.model_updater_config
+        kind = type(model).__name__
+
+        if hasattr(model, "partial_fit"):
+            for _ in range(config.partial_fit_epochs):
+                model.partial_fit(X_new, y_new)
+            return model, "partial_fit"
+
+        if kind == "RandomForestRegressor":
+            X, y = self._combined(preprocessor, X_new, y_new)
+            new_trees = min(config.forest_new_trees, config.forest_max_trees)
+            keep = max(0, min(len(model.estimators_), config.forest_max_trees - new_trees))
+            # The oldest trees were fitted on the least data
+            model.estimators_ = model.estimators_[len(model.estimators_) - keep:]
+            model.set_params(warm_start=True, n_estimators=keep + new_trees)
+            model.fit(X, y)
+            model.set_params(warm_start=False)
+            return model, "add_trees"
+
+        if kind == "KNeighborsRegressor":
+            X = np.vstack([np.asarray(model._fit_X), X_new])[-config.knn_max_reference_rows:]
+            y = np.concatenate([np.asarray(model._y), y_new])[-config.knn_max_reference_rows:]
+            return model.fit(X, y), "extend_reference_set"
+
+        if kind == "LinearRegression":
+            return self._update_linear(model, preprocessor, X_new, y_new), "sufficient_statistics"
+
+        from sklearn.base import clone
+
+        X, y = self._combined(preprocessor, X_new, y_new)
+        return clone(model).fit(X, y), "refit"
+
+    def full_retrain_cost(self):
+        """
+        Seconds the last full retrain took: the computed stages of the latest
+        successful training job, else the model search time in leaderboard.json
+        """
+        from src.pipeline.training_jobs import TrainingJobManager
+
+        jobs = sorted(TrainingJobManager().list_jobs(), key=lambda job: job.get("created", 0), reverse=True)
+        for job in jobs:
+            stages = job.get("stages", {})
+            if job["status"] == "succeeded" and stages.get("model_trainer", {}).get("status") == "completed":
+                seconds = sum(info.get("duration", 0) for info in stages.values() if info["status"] == "completed")
+                return seconds, f"training job {job['job_id']}"
+
+        leaderboard_path = os.path.join(os.path.dirname(self.model_updater_config.model_path), "leaderboard.json")
+        if os.path.exists(leaderboard_path):
+            with open(leaderboard_path) as file_obj:
+                wall_time = json.load(file_obj).get("summary", {}).get("wall_time")
+            if wall_time:
+                return wall_time, "model search in leaderboard.json"
+        return None, None
+
+    def _holdout_score(self, model, preprocessor):
+        from sklearn.metrics import r2_score
+
+        test_path = _first_existing(self.model_updater_config.test_paths)
+        if test_path is None:
+            return None
+        X_test, y_test = self._split(read_table(test_path), preprocessor)
+        return float(r2_score(y_test, model.predict(X_test)))
+
+    def _invalidate_derived_artifacts(self):
+        """
+        Remove the numpy export of the replaced model and return which derived
+        artifacts to rebuild. A prediction table needs no removal: PredictPipeline
+        ignores a table whose model checksum no longer matches model.pkl.
+        """
+        from src.components.model_exporter import ModelExporterConfig
+        from src.components.prediction_table import PredictionTableConfig
+
+        export_path = ModelExporterConfig().exported_model_file_path
+        rebuild = {
+            "export": os.path.exists(export_path),
+            "prediction_table": os.path.exists(PredictionTableConfig().table_file_path),
+        }
+        if rebuild["export"]:
+            os.remove(export_path)
+        return rebuild
+
+    DERIVED_STAGES = ["model_export", "prediction_table"]
+
+    def rebuild_derived_artifacts(self, export=True, prediction_table=True, progress_callback=None):
+        """
+        Rebuild the numpy export and the prediction table from the deployed model;
+        run as a kind="refresh" training job so the update request does not wait for it
+        """
+        from src.components.model_exporter import ModelExporter
+        from src.components.prediction_table import PredictionTableBuilder
+
+        steps = [
+            ("model_export", export, lambda: ModelExporter().initiate_model_export()),
+            ("prediction_table", prediction_table, lambda: PredictionTableBuilder().initiate_prediction_table(
+                FEATURE_COLUMNS, NUMERICAL_FEATURES
+            )),
+        ]
+        for stage, enabled, build in steps:
+            status = "skipped"
+            if enabled:
+                if progress_callback is not None:
+                    progress_callback(stage, "running")
+                try:
+                    build()
+                    status = "completed"
+                except CustomException as e:
+                    logging.info(f"{stage} not rebuilt: {e}")
+            if progress_callback is not None:
+                progress_callback(stage, status)
+
+    def _start_refresh(self, rebuild):
+        """
+        Rebuild the derived artifacts in a background job (in process without a job manager);
+        returns the job id or None
+        """
+        if not any(rebuild.values()):
+            return None
+        if self.training_jobs is None:
+            self.rebuild_derived_artifacts(**rebuild)
+            return None
+        return self.training_jobs.submit(kind="refresh", **rebuild)["job_id"]
+
+    def update(self, records):
+        """
+        Apply newly labelled rows to the deployed model and return the update report
+        """
+        try:
+            config = self.model_updater_config
+            preprocessor = load_object(config.preprocessor_path)
+            df = self.validate(records, preprocessor)
+            os.makedirs(config.versions_dir, exist_ok=True)
+
+            with self._lock, open(self.lock_path, "w") as lock_file:
+                # One update at a time across worker processes
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                active = self.training_jobs.active_job() if self.training_jobs is not None else None
+                if active is not None:
+                    if active.get("kind") != "refresh":
+                        raise RuntimeError("A training job is running; retry the update once it has finished")
+                    # Rebuilding from the model this update replaces
+                    self.training_jobs.cancel(active["job_id"])
+
+                parent_sha256 = artifact_sha256(config.model_path)
+                versions = self.list_versions()
+                rows_since_retrain = len(df)
+                if versions and versions[-1]["sha256"] == parent_sha256:
+                    rows_since_retrain += versions[-1]["rows_since_retrain"]
+                else:
+                    # model.pkl came from a full retrain: start a new lineage
+                    for path in (self.labelled_rows_path, self.linear_stats_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+
+                self._pending_stats = None
+                model = load_object(config.model_path)
+                X_new, y_new = self._split(df, preprocessor)
+                r2_before = self._holdout_score(model, preprocessor)
+
+                start = time.perf_counter()
+                model, strategy = self.update_model(model, preprocessor, X_new, y_new)
+                update_seconds = time.perf_counter() - start
+                r2_after = self._holdout_score(model, preprocessor)
+
+                version = max((entry["version"] for entry in versions), default=0) + 1
+                version_path = os.path.join(config.versions_dir, f"model_v{version:04d}.pkl")
+                save_object(file_path=version_path, obj=model)
+                save_object(file_path=config.model_path, obj=model)
+                df.to_csv(self.labelled_rows_path, mode="a", index=False,
+                          header=not os.path.exists(self.labelled_rows_path))
+                if self._pending_stats is not None:
+                    np.savez(self.linear_stats_path, **self._pending_stats)
+                    self._pending_stats = None
+
+                sha256 = artifact_sha256(config.model_path)
+                retrain_seconds, retrain_source = self.full_retrain_cost()
+                report = {
+                    "version": version,
+                    "created": time.time(),
+                    "path": version_path,
+                    "model_type": type(model).__name__,
+                    "strategy": strategy,
+                    "rows_added": len(df),
+                    "rows_since_retrain": rows_since_retrain,
+                    "update_seconds": round(update_seconds, 4),
+                    "full_retrain_seconds": None if retrain_seconds is None else round(retrain_seconds, 4),
+                    "full_retrain_source": retrain_source,
+                    "speedup": round(retrain_seconds / update_seconds, 1) if retrain_seconds and update_seconds else None,
+                    "holdout_r2_before": r2_before,
+                    "holdout_r2_after": r2_after,
+                    "parent_sha256": parent_sha256,
+                    "sha256": sha256,
+                }
+                versions.append(report)
+                _write_json(self.versions_path, versions)
+                report = dict(report, refresh_job_id=self._start_refresh(self._invalidate_derived_artifacts()))
+
+            logging.info(
+                f"Model updated to version {version} with {len(df)} rows ({strategy}) "
+                f"in {update_seconds:.3f}s; holdout R2 {r2_before} -> {r2_after}"
+            )
+            return report
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    report = ModelUpdater().update(pd.read_csv(sys.argv[1]))
+    print(json.dumps(report, indent=2))
@@ -1,5 +1,8 @@
+import os
 import sys
-import pandas as pd
+import threading
+import time
+import numpy as np
 from pathlib import Path
 
 # Add the project root to Python path
@@ -8,30 +11,354 @@ sys.path.append(str(project_root))
 
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import load_object
+from src.utils import load_object, record_load_time
+from src.metrics import ARTIFACT_CACHE_REQUESTS, ARTIFACT_LOAD_LATENCY, PREDICT_STAGE_LATENCY
+from src.pipeline.compiled_preprocessor import CompiledPreprocessor, compile_preprocessor
+from src.pipeline.inference_engine import load_exported_model
+from src.schema import FEATURE_COLUMNS, NUMERICAL_FEATURES
 
-class PredictPipeline:
+# Sample row used to warm up the model and preprocessor at startup
+WARMUP_SAMPLE = {
+    "gender": "female",
+    "race_ethnicity": "group B",
+    "parental_level_of_education": "bachelor's degree",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": 72,
+    "writing_score": 74
+}
+
+class ArtifactCache:
+    """
+    Process-wide cache of unpickled artifacts keyed by file path.
+    An entry is reloaded only when the file on disk changes (e.g. after retraining).
+    """
     def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_times = {}
+
+    def get(self, file_path, loader=None):
+        try:
+            stat = os.stat(file_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+
+            with self._lock:
+                entry = self._entries.get(file_path)
+                if entry is not None and entry[1] == signature:
+                    self.hits += 1
+                    ARTIFACT_CACHE_REQUESTS.inc(result="hit")
+                    return entry[0]
+
+                self.misses += 1
+                ARTIFACT_CACHE_REQUESTS.inc(result="miss")
+                start = time.perf_counter()
+                if loader is None:
+                    # Map large numpy buffers read-only so worker processes can share them
+                    obj = load_object(file_path=file_path, mmap_mode="r")
+                else:
+                    obj = loader(file_path)
+                self.load_times[file_path] = time.perf_counter() - start
+                ARTIFACT_LOAD_LATENCY.observe(self.load_times[file_path], artifact=os.path.basename(file_path))
+                self._entries[file_path] = (obj, signature)
+                if loader is None:
+                    record_load_time(file_path, self.load_times[file_path])
+
+            logging.info(f"Loaded artifact {file_path} in {self.load_times[file_path]:.4f}s")
+            return obj
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": sorted(self._entries),
+                "load_time_seconds": dict(self.load_times),
+            }
+
+artifact_cache = ArtifactCache()
+
+class PredictPipeline:
+    def __init__(self, engine=None, use_prediction_table=None):
         self.model_path = "artifact/model.pkl"
         self.preprocessor_path = "artifact/preprocessor.pkl"
+        self.exported_model_path = "artifact/model_export.npz"
+        self.prediction_table_path = "artifact/prediction_table.npy"
+        # "sklearn" unpickles model.pkl/preprocessor.pkl; "exported" evaluates
+        # model_export.npz with the numpy-only inference engine
+        self.engine = engine or os.environ.get("PREDICT_ENGINE", "sklearn")
+        if self.engine not in ("sklearn", "exported"):
+            raise ValueError(f"Unknown prediction engine '{self.engine}'")
+        self._compiled = (None, None)
+        # Answer integer-score rows from the precomputed table when one matches the model
+        if use_prediction_table is None:
+            use_prediction_table = os.environ.get("PREDICT_TABLE", "1") == "1"
+        self.use_prediction_table = use_prediction_table
+        self._table = (None, None, False)
+        # PREDICT_WARMUP_DATAFRAME=1 also warms the DataFrame path at startup (imports pandas)
+        self.warm_up_dataframe = os.environ.get("PREDICT_WARMUP_DATAFRAME", "0") == "1"
         
+    def load(self):
+        """
+        Return the cached (model, preprocessor) pair, loading them on first use
+        """
+        if self.engine == "exported":
+            return artifact_cache.get(self.exported_model_path, loader=load_exported_model)
+        model = artifact_cache.get(self.model_path)
+        preprocessor = artifact_cache.get(self.preprocessor_path)
+        return model, preprocessor
+
+    def get_compiled_preprocessor(self, preprocessor):
+        """
+        Return the numpy-only compiled form of the preprocessor, or None if it cannot be compiled.
+        Recompiled whenever the cached preprocessor object changes.
+        """
+        if isinstance(preprocessor, CompiledPreprocessor):
+            return preprocessor
+        source, compiled = self._compiled
+        if source is not preprocessor:
+            try:
+                compiled = compile_preprocessor(preprocessor, FEATURE_COLUMNS)
+            except CustomException as e:
+                logging.info(f"Preprocessor fast path disabled: {e}")
+                compiled = None
+            self._compiled = (preprocessor, compiled)
+        return compiled
+
+    def get_prediction_table(self, model):
+        """
+        Return the memory-mapped prediction table if it was built from the current model, else None
+        """
+        if not self.use_prediction_table:
+            return None
+        from src.components.prediction_table import PredictionTable, table_metadata_path
+
+        metadata_path = table_metadata_path(self.prediction_table_path)
+        if not os.path.exists(metadata_path):
+            return None
+        # Keyed on the sidecar, which is written after the table itself
+        try:
+            table = artifact_cache.get(
+                metadata_path, loader=lambda _: PredictionTable.load(self.prediction_table_path)
+            )
+        except CustomException as e:
+            logging.info(f"Prediction table unavailable: {e}")
+            return None
+        source, checked, valid = self._table
+        if source is not model or checked is not table:
+            valid = table.matches(self.model_path)
+            if not valid:
+                logging.info("Prediction table is stale for the current model; using the model")
+            self._table = (model, table, valid)
+        return table if valid else None
+
+    def lookup_predictions(self, model, records):
+        """
+        Predictions from the prediction table for the dict rows it covers,
+        None for the rows (or all of them, without a table) the model has to score
+        """
+        table = self.get_prediction_table(model)
+        if table is None:
+            return [None] * len(records)
+        with PREDICT_STAGE_LATENCY.time(stage="table_lookup"):
+            return [table.lookup(record) if isinstance(record, dict) else None for record in records]
+
+    def warm_up(self, dataframe=None):
+        """
+        Load the artifacts and run one dummy prediction so the first request is not slow.
+        Only the single-record path is warmed unless dataframe=True (or
+        PREDICT_WARMUP_DATAFRAME=1), which also runs the DataFrame path of predict/predict_many.
+        """
+        try:
+            start = time.perf_counter()
+            self.predict_record(WARMUP_SAMPLE)
+            if dataframe is None:
+                dataframe = self.warm_up_dataframe
+            if dataframe and self.engine == "sklearn":
+                self.predict(CustomData(**WARMUP_SAMPLE).get_data_as_dataframe())
+            logging.info(f"Prediction pipeline warmed up in {time.perf_counter() - start:.4f}s")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
     def predict(self, features):
         try:
             # Load the trained model and preprocessor
-            model = load_object(file_path=self.model_path)
-            preprocessor = load_object(file_path=self.preprocessor_path)
+            model, preprocessor = self.load()
             
             # Transform the input features
-            transformed_features = preprocessor.transform(features)
+            with PREDICT_STAGE_LATENCY.time(stage="transform"):
+                transformed_features = preprocessor.transform(features)
             
             # Make prediction
-            prediction = model.predict(transformed_features)
+            with PREDICT_STAGE_LATENCY.time(stage="model_predict"):
+                prediction = model.predict(transformed_features)
             
             return prediction
             
         except Exception as e:
             raise CustomException(e, sys)
 
+    def predict_record(self, record):
+        """
+        Score a single row given as a dict (or tuple in FEATURE_COLUMNS order),
+        skipping DataFrame construction when the compiled preprocessor is available
+        """
+        try:
+            model, preprocessor = self.load()
+
+            (prediction,) = self.lookup_predictions(model, [record])
+            if prediction is not None:
+                return prediction
+
+            compiled = self.get_compiled_preprocessor(preprocessor)
+            with PREDICT_STAGE_LATENCY.time(stage="transform"):
+                if compiled is not None:
+                    transformed_features = compiled.transform_one(record).reshape(1, -1)
+                else:
+                    import pandas as pd
+
+                    if not isinstance(record, dict):
+                        record = dict(zip(FEATURE_COLUMNS, record))
+                    features = pd.DataFrame([record], columns=FEATURE_COLUMNS)
+                    transformed_features = preprocessor.transform(features)
+
+            with PREDICT_STAGE_LATENCY.time(stage="model_predict"):
+                return float(model.predict(transformed_features)[0])
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_records(self, records):
+        """
+        Score rows given as dicts with one model.predict call (used by the micro-batcher).
+        Rows covered by the prediction table are looked up, as in predict_record.
+        Returns one float per row, or the exception raised while transforming that row,
+        so a bad row does not fail the rest of the batch.
+        """
+        try:
+            records = list(records)
+            model, preprocessor = self.load()
+            results = self.lookup_predictions(model, records)
+            pending = [i for i, result in enumerate(results) if result is None]
+            if not pending:
+                return results
+
+            compiled = self.get_compiled_preprocessor(preprocessor)
+            if compiled is None:
+                for i, result in zip(pending, self.predict_many([records[i] for i in pending])):
+                    results[i] = result["prediction"] if "prediction" in result else ValueError(result["error"])
+                return results
+
+            transformed_features = np.empty((len(pending), compiled.n_features_out), dtype=np.float64)
+            valid = np.ones(len(pending), dtype=bool)
+            for row, i in enumerate(pending):
+                try:
+                    compiled.transform_one(records[i], out=transformed_features[row])
+                except Exception as e:
+                    results[i] = CustomException(e, sys)
+                    valid[row] = False
+
+            if valid.any():
+                with PREDICT_STAGE_LATENCY.time(stage="model_predict"):
+                    predicted = model.predict(transformed_features[valid])
+                for row, prediction in zip(np.flatnonzero(valid), predicted):
+                    results[pending[row]] = float(prediction)
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_many(self, records):
+        """
+        Score a batch of rows with one transform and one predict call.
+        Rows are validated column by column; invalid rows are reported
+        individually and left out of the batch instead of failing it.
+        Returns one dict per input row with either 'prediction' or 'error'.
+        """
+        try:
+            import pandas as pd
+
+            df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+            df = df.reset_index(drop=True)
+            n_rows = len(df)
+            if n_rows == 0:
+                return []
+
+            model, preprocessor = self.load()
+            known_categories = self._known_categories(preprocessor)
+
+            errors = [[] for _ in range(n_rows)]
+            valid = np.ones(n_rows, dtype=bool)
+            batch = pd.DataFrame(index=df.index)
+
+            for column in FEATURE_COLUMNS:
+                if column not in df.columns:
+                    for row_errors in errors:
+                        row_errors.append(f"missing column '{column}'")
+                    valid[:] = False
+                    continue
+
+                if column in NUMERICAL_FEATURES:
+                    values = pd.to_numeric(df[column], errors="coerce")
+                    invalid = values.isna().to_numpy()
+                    message = f"'{column}' must be a number"
+                else:
+                    values = df[column].astype(object)
+                    allowed = known_categories.get(column)
+                    invalid = values.isna().to_numpy()
+                    if allowed is not None:
+                        invalid |= ~values.isin(allowed).to_numpy()
+                    message = f"'{column}' has an unknown value"
+
+                for i in np.flatnonzero(invalid):
+                    errors[i].append(message)
+                valid &= ~invalid
+                batch[column] = values
+
+            predictions = {}
+            if valid.any():
+                with PREDICT_STAGE_LATENCY.time(stage="transform"):
+                    transformed_features = preprocessor.transform(batch.loc[valid, FEATURE_COLUMNS])
+                with PREDICT_STAGE_LATENCY.time(stage="model_predict"):
+                    predicted = model.predict(transformed_features)
+                predictions = dict(zip(np.flatnonzero(valid), predicted))
+
+            results = []
+            for i in range(n_rows):
+                if valid[i]:
+                    results.append({"row": i, "prediction": float(predictions[i])})
+                else:
+                    results.append({"row": i, "error": "; ".join(errors[i])})
+            return results
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _known_categories(preprocessor):
+        """
+        Map each categorical column to the vocabulary its fitted OneHotEncoder accepts
+        """
+        if hasattr(preprocessor, "known_categories"):
+            return preprocessor.known_categories()
+        known = {}
+        for _, transformer, columns in getattr(preprocessor, "transformers_", []):
+            for step in getattr(transformer, "named_steps", {}).values():
+                if hasattr(step, "categories_"):
+                    for column, categories in zip(columns, step.categories_):
+                        known[column] = set(categories.tolist())
+        return known
+
 class CustomData:
     def __init__(self, gender, race_ethnicity, parental_level_of_education, 
                  lunch, test_preparation_course, reading_score, writing_score):
@@ -43,8 +370,21 @@ class CustomData:
         self.reading_score = reading_score
         self.writing_score = writing_score
     
+    def get_data_as_dict(self):
+        return {
+            "gender": self.gender,
+            "race_ethnicity": self.race_ethnicity,
+            "parental_level_of_education": self.parental_level_of_education,
+            "lunch": self.lunch,
+            "test_preparation_course": self.test_preparation_course,
+            "reading_score": self.reading_score,
+            "writing_score": self.writing_score
+        }
+
     def get_data_as_dataframe(self):
         try:
+            import pandas as pd
+
             custom_data_input_dict = {
                 "gender": [self.gender],
                 "race_ethnicity": [self.race_ethnicity],
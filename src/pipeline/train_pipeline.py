@@ -1,4 +1,8 @@
+import os
 import sys
+import json
+import time
+from contextlib import nullcontext
 from pathlib import Path
 
 # Add the project root to Python path
@@ -8,46 +12,278 @@ sys.path.append(str(project_root))
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.components.incremental_trainer import IncrementalTrainer
+from src.components.model_exporter import ModelExporter
+from src.components.prediction_table import PredictionTableBuilder, table_metadata_path
+from src.components.stage_cache import StageCache
+from src.pipeline.model_updater import ModelUpdater
 from src.exception import CustomException
 from src.logger import logging
+from src.metrics import TRAINING_STAGE_LATENCY
+from src.profiling import RunProfiler, report_summary
+from src.utils import load_object, manifest_path
+from src.schema import FEATURE_COLUMNS, NUMERICAL_FEATURES
 
 class TrainPipeline:
-    def __init__(self):
-        self.data_ingestion = DataIngestion()
+    def __init__(self, n_jobs=None, search_strategy=None, time_budget=None, force=None, use_cache=True,
+                 prediction_table=None, incremental=None, profile=None, cprofile=None):
+        # incremental=True (or TRAIN_INCREMENTAL=1) trains out of core, chunk by chunk from disk
+        if incremental is None:
+            incremental = os.environ.get("TRAIN_INCREMENTAL", "0") == "1"
+        self.incremental = incremental
+        self.incremental_trainer = IncrementalTrainer()
+        chunksize = None
+        if incremental and not os.environ.get("INGESTION_CHUNKSIZE"):
+            # Stream the ingestion too, so no stage holds the whole dataset
+            chunksize = self.incremental_trainer.chunk_rows
+        self.data_ingestion = DataIngestion(chunksize=chunksize)
         self.data_transformation = DataTransformation()
-        self.model_trainer = ModelTrainer()
+        # profile=True (or TRAIN_PROFILE=1) writes artifact/train_report.json with the
+        # time and memory of every stage and search candidate; cprofile=True
+        # (or TRAIN_PROFILE_CPROFILE=1) also dumps a cProfile file per stage.
+        # Memory tracing slows fitting down; TRAIN_PROFILE_MEMORY=0 records times only.
+        if profile is None:
+            profile = os.environ.get("TRAIN_PROFILE", "0") == "1"
+        if cprofile is None:
+            cprofile = os.environ.get("TRAIN_PROFILE_CPROFILE", "0") == "1"
+        self.profile = profile or cprofile
+        self.cprofile = cprofile
+        self.trace_memory = self.profile and os.environ.get("TRAIN_PROFILE_MEMORY", "1") == "1"
+        self.profiler = None
+        self.report_summary = None
+        self.model_trainer = ModelTrainer(
+            n_jobs=n_jobs, search_strategy=search_strategy, time_budget=time_budget,
+            trace_memory=self.trace_memory
+        )
+        self.model_exporter = ModelExporter()
+        self.prediction_table_builder = PredictionTableBuilder()
+        # prediction_table=True (or TRAIN_PREDICTION_TABLE=1) precomputes every integer-score prediction
+        if prediction_table is None:
+            prediction_table = os.environ.get("TRAIN_PREDICTION_TABLE", "0") == "1"
+        self.prediction_table = prediction_table
+        # force=True (or TRAIN_FORCE=1) reruns every stage and refreshes the cache
+        if force is None:
+            force = os.environ.get("TRAIN_FORCE", "0") == "1"
+        self.stage_cache = StageCache(force=force, enabled=use_cache)
 
-    def run_pipeline(self):
+    STAGES = ["data_ingestion", "data_transformation", "model_trainer", "model_export", "prediction_table"]
+
+    def _run_stage(self, stage, key, outputs, compute, progress_callback=None):
+        """
+        Run one stage through the stage cache and report its progress
+        """
+        if progress_callback is not None:
+            progress_callback(stage, "running")
+        start = time.perf_counter()
+        hits_before = len(self.stage_cache.hits)
+        profile = self.profiler.stage(stage) if self.profiler is not None else nullcontext()
+        try:
+            with profile:
+                result = self.stage_cache.run(stage, key, outputs, compute)
+        except Exception:
+            if self.profiler is not None:
+                self.profiler.record_stage(stage, profile, "failed")
+            raise
+        status = "cached" if len(self.stage_cache.hits) > hits_before else "completed"
+        if self.profiler is not None:
+            self.profiler.record_stage(stage, profile, status)
+        TRAINING_STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage, status=status)
+        logging.info(f"Stage {stage} {status}", extra={
+            "stage": stage,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+        })
+        if progress_callback is not None:
+            progress_callback(stage, status)
+        return result
+
+    def run_pipeline(self, progress_callback=None):
+        """
+        Run all stages; progress_callback(stage, status) is called as each
+        stage starts ("running") and ends ("completed", "cached" or "skipped")
+        """
         try:
             logging.info("Starting the training pipeline")
+            self.profiler = (
+                RunProfiler(cprofile=self.cprofile, trace_memory=self.trace_memory) if self.profile else None
+            )
+            ingestion_config = self.data_ingestion.ingestion_config
             
             # Step 1: Data Ingestion
             logging.info("Step 1: Data Ingestion")
-            train_path, test_path = self.data_ingestion.initiate_data_ingestion()
+            ingestion_key = self.stage_cache.make_key(
+                "data_ingestion",
+                files=[ingestion_config.source_data_path],
+                params=self.data_ingestion.cache_params()
+            )
+            ingestion_outputs = self.data_ingestion.output_paths()
+            
+            def run_ingestion():
+                train_path, test_path = self.data_ingestion.initiate_data_ingestion()
+                return {"train_path": train_path, "test_path": test_path}, {}
+            
+            result, _ = self._run_stage(
+                "data_ingestion", ingestion_key, ingestion_outputs, run_ingestion, progress_callback
+            )
+            train_path, test_path = result["train_path"], result["test_path"]
             logging.info(f"Data ingestion completed. Train: {train_path}, Test: {test_path}")
             
             # Step 2: Data Transformation
             logging.info("Step 2: Data Transformation")
-            train_array, test_array, preprocessor_path = self.data_transformation.initiate_data_transformation(
-                train_path=train_path,
-                test_path=test_path
+            transformation_key = self.stage_cache.make_key(
+                "data_transformation",
+                files=[train_path, test_path],
+                params=(
+                    self.incremental_trainer.preprocessor_cache_params() if self.incremental
+                    else self.data_transformation.cache_params()
+                )
+            )
+            preprocessor_file_path = self.data_transformation.data_transformation_config.preprocessor_object_file_path
+            transformation_outputs = {
+                "preprocessor": preprocessor_file_path,
+                "preprocessor_manifest": manifest_path(preprocessor_file_path),
+            }
+            
+            def run_transformation():
+                if self.incremental:
+                    # Only the preprocessor statistics are fitted here; the data stays on disk
+                    return {"preprocessor_path": self.incremental_trainer.initiate_preprocessor_fit(train_path)}, {}
+                train_array, test_array, preprocessor_path = self.data_transformation.initiate_data_transformation(
+                    train_path=train_path,
+                    test_path=test_path
+                )
+                if self.data_transformation.lean:
+                    # Features and target come back separately; cache them that way
+                    (X_train, y_train), (X_test, y_test) = train_array, test_array
+                    return {"preprocessor_path": preprocessor_path}, {
+                        "X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test
+                    }
+                return {"preprocessor_path": preprocessor_path}, {"train": train_array, "test": test_array}
+            
+            result, arrays = self._run_stage(
+                "data_transformation", transformation_key, transformation_outputs, run_transformation,
+                progress_callback
             )
+            if "X_train" in arrays:
+                train_array = (arrays["X_train"], arrays["y_train"])
+                test_array = (arrays["X_test"], arrays["y_test"])
+            else:
+                train_array, test_array = arrays.get("train"), arrays.get("test")
+            preprocessor_path = result["preprocessor_path"]
             logging.info(f"Data transformation completed. Preprocessor saved to: {preprocessor_path}")
             
             # Step 3: Model Training
             logging.info("Step 3: Model Training")
-            r2_score = self.model_trainer.initiate_model_trainer(
-                train_array=train_array,
-                test_array=test_array
+            trainer_config = self.model_trainer.model_trainer_config
+            # After an online update a cache hit would copy the cached model over the
+            # updated model.pkl, so the key includes the deployed update version
+            trainer_key = self.stage_cache.make_key(
+                "model_trainer",
+                params={
+                    "trainer": (
+                        self.incremental_trainer.cache_params() if self.incremental
+                        else self.model_trainer.cache_params()
+                    ),
+                    "deployed_version": ModelUpdater().deployed_version(),
+                },
+                upstream=[transformation_key]
+            )
+            trainer_outputs = {
+                "model": trainer_config.trained_model_file_path,
+                "model_manifest": manifest_path(trainer_config.trained_model_file_path),
+                "leaderboard": trainer_config.leaderboard_file_path,
+            }
+            
+            def run_training():
+                if self.incremental:
+                    r2_score = self.incremental_trainer.initiate_model_trainer(
+                        train_path, test_path, load_object(preprocessor_path)
+                    )
+                    return {"r2_score": r2_score}, {}
+                r2_score = self.model_trainer.initiate_model_trainer(
+                    train_array=train_array,
+                    test_array=test_array
+                )
+                return {"r2_score": r2_score}, {}
+            
+            result, _ = self._run_stage(
+                "model_trainer", trainer_key, trainer_outputs, run_training, progress_callback
             )
+            r2_score = result["r2_score"]
             logging.info(f"Model training completed. R2 Score: {r2_score}")
             
+            # Step 4: Model Export (optional numpy-only serving format)
+            logging.info("Step 4: Model Export")
+            export_key = self.stage_cache.make_key("model_export", upstream=[trainer_key])
+            export_outputs = {
+                "export": self.model_exporter.model_exporter_config.exported_model_file_path
+            }
+            try:
+                result, _ = self._run_stage(
+                    "model_export", export_key, export_outputs,
+                    lambda: ({"export_path": self.model_exporter.initiate_model_export()}, {}),
+                    progress_callback
+                )
+                logging.info(f"Model export completed. Exported model saved to: {result['export_path']}")
+            except CustomException as e:
+                logging.info(f"Model export skipped: {e}")
+                if progress_callback is not None:
+                    progress_callback("model_export", "skipped")
+            
+            # Step 5: Prediction Table (optional lookup table over the whole input domain)
+            if self.prediction_table:
+                logging.info("Step 5: Prediction Table")
+                table_config = self.prediction_table_builder.prediction_table_config
+                table_key = self.stage_cache.make_key(
+                    "prediction_table",
+                    params={"score_min": table_config.score_min, "score_max": table_config.score_max},
+                    upstream=[trainer_key]
+                )
+                table_outputs = {
+                    "table": table_config.table_file_path,
+                    "metadata": table_metadata_path(table_config.table_file_path),
+                }
+                try:
+                    result, _ = self._run_stage(
+                        "prediction_table", table_key, table_outputs,
+                        lambda: ({"table_path": self.prediction_table_builder.initiate_prediction_table(
+                            FEATURE_COLUMNS, NUMERICAL_FEATURES
+                        )}, {}),
+                        progress_callback
+                    )
+                    logging.info(f"Prediction table saved to: {result['table_path']}")
+                except CustomException as e:
+                    logging.info(f"Prediction table skipped: {e}")
+                    if progress_callback is not None:
+                        progress_callback("prediction_table", "skipped")
+            elif progress_callback is not None:
+                progress_callback("prediction_table", "skipped")
+            
+            logging.info(
+                f"Stage cache hits: {self.stage_cache.hits or 'none'}, "
+                f"recomputed: {self.stage_cache.misses or 'none'}"
+            )
+            if self.profiler is not None:
+                self.save_report(trainer_outputs["leaderboard"])
             logging.info("Training pipeline completed successfully!")
             return r2_score
             
         except Exception as e:
             raise CustomException(e, sys)
 
+    def save_report(self, leaderboard_path):
+        """
+        Write the profiling run report, with the per-candidate costs from the leaderboard
+        """
+        if os.path.exists(leaderboard_path):
+            with open(leaderboard_path) as file_obj:
+                self.profiler.record_candidates(json.load(file_obj)["leaderboard"])
+        report = self.profiler.report()
+        report_path = self.profiler.save(report)
+        self.report_summary = report_summary(report)
+        self.report_summary["report_path"] = report_path
+        logging.info(f"Run report saved to {report_path}", extra={"profile": self.report_summary})
+
 if __name__ == "__main__":
     pipeline = TrainPipeline()
     r2_score = pipeline.run_pipeline()
@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import fcntl
+import time
+import uuid
+import signal
+import threading
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.exception import CustomException
+from src.logger import logging
+from src.metrics import TRAINING_STAGE_LATENCY
+
+ACTIVE_STATES = ("queued", "running")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+@dataclass
+class TrainingJobConfig:
+    jobs_dir = os.path.join('artifact', 'jobs')
+    # Training runs at a lower CPU priority than the web workers
+    worker_niceness: int = 10
+
+
+def _write_job(file_path, job):
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w") as file_obj:
+        json.dump(job, file_obj, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+def _read_job(file_path):
+    with open(file_path) as file_obj:
+        return json.load(file_obj)
+
+
+@contextmanager
+def _locked_job(file_path):
+    """
+    Read a job record under an exclusive file lock and write it back on exit.
+    Web workers and the training worker both update the record, so every
+    read-modify-write goes through here.
+    """
+    with open(file_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        job = _read_job(file_path)
+        yield job
+        _write_job(file_path, job)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+
+class TrainingJobManager:
+    """
+    Runs TrainPipeline in a separate worker process per job.
+
+    Every job is a JSON record under artifact/jobs/<job_id>.json that the
+    worker updates as each pipeline stage starts and finishes, so any web
+    worker process can report status or cancel a job, not just the one that
+    started it. Every update holds a lock on <job_id>.json.lock. Only one job
+    runs at a time because all jobs write the same artifacts.
+
+    kind="train" runs TrainPipeline; kind="refresh" only rebuilds the model
+    export and prediction table from the deployed model (after an online update).
+    """
+    def __init__(self, jobs_dir=None, on_success=None):
+        self.training_job_config = TrainingJobConfig()
+        self.jobs_dir = jobs_dir or self.training_job_config.jobs_dir
+        self.on_success = on_success
+        self._processes = {}
+        self._lock = threading.Lock()
+
+    def _job_path(self, job_id):
+        if not job_id or not all(c.isalnum() for c in job_id):
+            raise ValueError(f"Invalid job id '{job_id}'")
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def active_job(self):
+        """
+        Return the record of the queued or running job, or None
+        """
+        for job in self.list_jobs():
+            if job["status"] in ACTIVE_STATES:
+                return job
+        return None
+
+    def submit(self, kind="train", **pipeline_options):
+        """
+        Start a job and return its record; pipeline_options are passed to TrainPipeline
+        (or ModelUpdater.rebuild_derived_artifacts for kind="refresh")
+        """
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            # The file lock keeps other web worker processes from starting a job concurrently
+            with self._lock, open(os.path.join(self.jobs_dir, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                active = self.active_job()
+                if active is not None:
+                    raise RuntimeError(f"Training job {active['job_id']} is already {active['status']}")
+
+                job_id = uuid.uuid4().hex
+                job = {
+                    "job_id": job_id,
+                    "kind": kind,
+                    "status": "queued",
+                    "created": time.time(),
+                    "started": None,
+                    "finished": None,
+                    "pid": None,
+                    "options": pipeline_options,
+                    # Filled in by the worker, so the web process never imports the training code
+                    "stages": {},
+                    "progress": 0.0,
+                    "r2_score": None,
+                    "error": None,
+                }
+                job_path = self._job_path(job_id)
+                _write_job(job_path, job)
+
+                # A fresh interpreter rather than a fork: the web server is
+                # multi-threaded and the worker should not share its memory.
+                # The worker lowers its own priority (see run_job), so nothing
+                # runs in the child between fork and exec.
+                # The artifacts are relative to the working directory, the code is not
+                python_path = os.pathsep.join(filter(None, [str(project_root), os.environ.get("PYTHONPATH")]))
+                process = subprocess.Popen(
+                    [sys.executable, "-m", "src.pipeline.training_jobs", job_path],
+                    cwd=os.getcwd(),
+                    env={**os.environ, "PYTHONPATH": python_path},
+                )
+                job["pid"] = process.pid
+                self._processes[job_id] = process
+                self._update(job_id, pid=process.pid)
+
+            threading.Thread(target=self._watch, args=(job_id, process), daemon=True).start()
+            logging.info(f"Started training job {job_id} (pid {process.pid})")
+            return job
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _update(self, job_id, active_only=False, **fields):
+        """
+        Update a job record; with active_only, only while it is still queued or running
+        """
+        with _locked_job(self._job_path(job_id)) as job:
+            if not active_only or job["status"] in ACTIVE_STATES:
+                job.update(fields)
+        return job
+
+    def _watch(self, job_id, process):
+        """
+        Wait for the worker to exit and record a final status if it could not
+        """
+        exit_code = process.wait()
+        with self._lock:
+            self._processes.pop(job_id, None)
+            job = self._update(
+                job_id,
+                active_only=True,
+                status="failed",
+                finished=time.time(),
+                error=f"Training worker exited with code {exit_code}",
+            )
+        logging.info(f"Training job {job_id} finished with status {job['status']}")
+        self._observe_stages(job)
+
+        if job["status"] == "succeeded" and self.on_success is not None:
+            try:
+                self.on_success(job)
+            except Exception as e:
+                logging.info(f"Post-training hook failed for job {job_id}: {e}")
+
+    @staticmethod
+    def _observe_stages(job):
+        # The worker process exits with the job, so the web process records its stage timings
+        for stage, info in job["stages"].items():
+            if "duration" in info:
+                TRAINING_STAGE_LATENCY.observe(info["duration"], stage=stage, status=info["status"])
+
+    def get(self, job_id):
+        """
+        Return the job record, or None for an unknown job id
+        """
+        try:
+            job_path = self._job_path(job_id)
+            if not os.path.exists(job_path):
+                return None
+            job = _read_job(job_path)
+            # The worker was killed outside of the manager (e.g. a server restart)
+            if job["status"] in ACTIVE_STATES and job["pid"] and not _pid_alive(job["pid"]):
+                with self._lock:
+                    if job_id not in self._processes:
+                        job = self._update(
+                            job_id, active_only=True, status="failed", finished=time.time(),
+                            error="Training worker is no longer running",
+                        )
+            return job
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def cancel(self, job_id):
+        """
+        Stop a queued or running job; returns the updated record or None for an unknown job id
+        """
+        try:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED_STATES:
+                return job
+
+            with self._lock:
+                process = self._processes.get(job_id)
+                if process is not None:
+                    process.terminate()
+                    process.wait(timeout=30)
+                elif job["pid"] and _pid_alive(job["pid"]):
+                    # Started by another web worker process
+                    os.kill(job["pid"], signal.SIGTERM)
+                    deadline = time.time() + 30
+                    while _pid_alive(job["pid"]) and time.time() < deadline:
+                        time.sleep(0.1)
+                job = self._update(job_id, active_only=True, status="cancelled", finished=time.time())
+            logging.info(f"Cancelled training job {job_id}")
+            return job
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def list_jobs(self):
+        if not os.path.isdir(self.jobs_dir):
+            return []
+        jobs = []
+        for file_name in os.listdir(self.jobs_dir):
+            if file_name.endswith(".json"):
+                try:
+                    jobs.append(_read_job(os.path.join(self.jobs_dir, file_name)))
+                except (OSError, ValueError):
+                    continue
+        return sorted(jobs, key=lambda job: job["created"], reverse=True)
+
+
+def job_summary(job):
+    """
+    Job record plus a human readable message, as returned by the /train endpoints
+    """
+    response = {"success": True, **job}
+    if job["status"] == "succeeded" and job["r2_score"] is None:
+        response["message"] = "Model export and prediction table rebuilt"
+    elif job["status"] == "succeeded":
+        response["r2_score"] = round(job["r2_score"], 4)
+        response["message"] = f"Model trained successfully! R² Score: {job['r2_score']:.4f}"
+    elif job["status"] == "failed":
+        response["message"] = f"Training failed: {job['error']}"
+    elif job["status"] == "cancelled":
+        response["message"] = "Training was cancelled"
+    else:
+        running = [stage for stage, info in job["stages"].items() if info["status"] == "running"]
+        response["message"] = f"Training {job['status']}" + (f" ({running[0]})" if running else "")
+    return response
+
+
+def run_job(job_path):
+    """
+    Worker process entry point: run the pipeline and keep the job record up to date
+    """
+    os.nice(TrainingJobConfig().worker_niceness)
+    kind = _read_job(job_path).get("kind", "train")
+    if kind == "refresh":
+        from src.pipeline.model_updater import ModelUpdater
+        stage_names = ModelUpdater.DERIVED_STAGES
+    else:
+        from src.pipeline.train_pipeline import TrainPipeline
+        stage_names = TrainPipeline.STAGES
+
+    def update(**fields):
+        with _locked_job(job_path) as job:
+            if job["status"] == "cancelled":
+                sys.exit(1)
+            job.update(fields)
+        return job
+
+    # Only this process writes the stage entries, so it keeps its own copy
+    stages = {stage: {"status": "pending"} for stage in stage_names}
+    job = update(status="running", started=time.time(), stages=stages)
+    stage_times = {}
+
+    def progress_callback(stage, status):
+        entry = {"status": status}
+        if status == "running":
+            stage_times[stage] = time.time()
+            entry["started"] = stage_times[stage]
+        elif stage in stage_times:
+            entry["started"] = stage_times[stage]
+            entry["duration"] = round(time.time() - stage_times[stage], 3)
+        stages[stage] = entry
+        done = sum(item["status"] in ("completed", "cached", "skipped") for item in stages.values())
+        update(stages=stages, progress=round(done / len(stages), 2))
+
+    try:
+        if kind == "refresh":
+            ModelUpdater().rebuild_derived_artifacts(progress_callback=progress_callback, **job["options"])
+            update(status="succeeded", finished=time.time(), progress=1.0)
+            return
+        pipeline = TrainPipeline(**job["options"])
+        r2_score = pipeline.run_pipeline(progress_callback=progress_callback)
+        fields = {"profile": pipeline.report_summary} if pipeline.report_summary is not None else {}
+        update(status="succeeded", finished=time.time(), progress=1.0, r2_score=float(r2_score), **fields)
+    except Exception as e:
+        logging.info(f"Training job failed: {e}")
+        update(status="failed", finished=time.time(), error=str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_job(sys.argv[1])
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import resource
+import tracemalloc
+from dataclasses import dataclass
+
+MB = 1024 * 1024
+
+
+@dataclass
+class ProfilingConfig:
+    report_file_path: str = os.path.join("artifact", "train_report.json")
+    profiles_dir: str = os.path.join("artifact", "profiles")
+    # Functions with the most own time listed per stage from the cProfile dump
+    top_functions: int = 10
+
+
+def peak_rss_bytes():
+    """
+    High-water mark of this process's resident memory (ru_maxrss is in KiB on Linux)
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryTrace:
+    """
+    Context manager measuring the peak memory traced by tracemalloc during a
+    block, above what was already allocated when it started (peak_bytes).
+    Blocks can nest: an inner block resets the tracemalloc peak, so it hands
+    the peak it saw back to the enclosing block when it exits.
+    """
+    _stack = []
+
+    def __enter__(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        if self._stack:
+            outer = self._stack[-1]
+            outer.folded_peak = max(outer.folded_peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        self.folded_peak = 0
+        self.peak_bytes = None
+        self._stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        peak = max(self.folded_peak, tracemalloc.get_traced_memory()[1])
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1].folded_peak = max(self._stack[-1].folded_peak, peak)
+        if self._started:
+            tracemalloc.stop()
+        self.peak_bytes = max(peak - self.baseline, 0)
+        return False
+
+
+class StageProfile:
+    """
+    Context manager recording wall time, CPU time and (optionally) peak traced
+    memory and a cProfile dump of one block of work
+    """
+    def __init__(self, name, profiles_dir=None, top_functions=10, trace_memory=True):
+        self.name = name
+        self.profiles_dir = profiles_dir
+        self.top_functions = top_functions
+        self.trace_memory = trace_memory
+        self.result = {}
+
+    def __enter__(self):
+        self._memory = MemoryTrace().__enter__() if self.trace_memory else None
+        self._profiler = None
+        if self.profiles_dir is not None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._start, self._cpu_start = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall, cpu = time.perf_counter() - self._start, time.process_time() - self._cpu_start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._memory is not None:
+            self._memory.__exit__(exc_type, exc, tb)
+
+        self.result = {
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "peak_traced_bytes": None if self._memory is None else self._memory.peak_bytes,
+        }
+        if self._profiler is not None:
+            self.result.update(self._dump_profile())
+        return False
+
+    def _dump_profile(self):
+        import pstats
+
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        profile_path = os.path.join(self.profiles_dir, f"{self.name}.prof")
+        self._profiler.dump_stats(profile_path)
+
+        stats = pstats.Stats(self._profiler).stats
+        top = []
+        for (file_name, line, function), (_, n_calls, own, cumulative, _) in sorted(
+            stats.items(), key=lambda item: -item[1][2]
+        )[:self.top_functions]:
+            top.append({
+                "function": f"{os.path.basename(file_name)}:{line}({function})",
+                "calls": n_calls,
+                "own_seconds": round(own, 4),
+                "cumulative_seconds": round(cumulative, 4),
+            })
+        return {"profile_path": profile_path, "top_functions": top}
+
+
+class RunProfiler:
+    """
+    Collects the StageProfile of every TrainPipeline stage and the per-candidate
+    costs of the model search into one JSON run report (artifact/train_report.json)
+    """
+    def __init__(self, cprofile=False, trace_memory=True):
+        self.profiling_config = ProfilingConfig()
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.candidates = []
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def stage(self, name):
+        profiles_dir = self.profiling_config.profiles_dir if self.cprofile else None
+        return StageProfile(name, profiles_dir, self.profiling_config.top_functions, self.trace_memory)
+
+    def record_stage(self, name, profile, status):
+        self.stages[name] = {"status": status, **profile.result}
+
+    def record_candidates(self, leaderboard):
+        self.candidates = [
+            {
+                "model": row["model"],
+                "params": row["params"],
+                "fit_seconds": row.get("fit_time"),
+                "cpu_seconds": row.get("compute_time"),
+                "peak_traced_bytes": row.get("peak_memory"),
+                "status": row.get("status"),
+            }
+            for row in leaderboard
+        ]
+
+    def report(self):
+        return {
+            "created": time.time(),
+            "wall_seconds": round(time.perf_counter() - self._start, 4),
+            "cpu_seconds": round(time.process_time() - self._cpu_start, 4),
+            # Process-lifetime high-water mark, so only meaningful for the whole run
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+            "candidates": self.candidates,
+        }
+
+    def save(self, report=None):
+        report = report or self.report()
+        file_path = self.profiling_config.report_file_path
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(report, file_obj, indent=2, default=str)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+
+def report_summary(report, n_candidates=3):
+    """
+    Compact view of a run report, as returned with the /train job status
+    """
+    candidates = sorted(
+        (c for c in report.get("candidates", []) if c.get("fit_seconds") is not None),
+        key=lambda c: -c["fit_seconds"],
+    )
+    return {
+        "wall_seconds": report["wall_seconds"],
+        "cpu_seconds": report["cpu_seconds"],
+        "peak_rss_mb": round(report["peak_rss_bytes"] / MB, 1),
+        "stages": {
+            name: {
+                "status": stage["status"],
+                "wall_seconds": stage["wall_seconds"],
+                "cpu_seconds": stage["cpu_seconds"],
+                "peak_traced_mb": (
+                    None if stage["peak_traced_bytes"] is None else round(stage["peak_traced_bytes"] / MB, 2)
+                ),
+            }
+            for name, stage in report["stages"].items()
+        },
+        "slowest_candidates": [
+            {
+                "model": c["model"],
+                "params": c["params"],
+                "fit_seconds": round(c["fit_seconds"], 4),
+                "peak_traced_mb": None if c["peak_traced_bytes"] is None else round(c["peak_traced_bytes"] / MB, 2),
+            }
+            for c in candidates[:n_candidates]
+        ],
+    }
@@ -0,0 +1,18 @@
+# Columns of the student performance dataset, shared by the training and
+# serving pipelines (kept free of heavy imports so either can use it)
+TARGET_COLUMN = "math_score"
+NUMERICAL_FEATURES = ["reading_score", "writing_score"]
+CATEGORICAL_FEATURES = [
+    "gender",
+    "race_ethnicity",
+    "parental_level_of_education",
+    "lunch",
+    "test_preparation_course"
+]
+FEATURE_COLUMNS = CATEGORICAL_FEATURES + NUMERICAL_FEATURES
+# Fixed dtypes of the source columns; scores are float64 so that a missing
+# value does not turn an integer column into a float one
+COLUMN_DTYPES = {
+    **{column: "object" for column in CATEGORICAL_FEATURES},
+    **{column: "float64" for column in NUMERICAL_FEATURES + [TARGET_COLUMN]},
+}
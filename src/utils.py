@@ -1,52 +1,229 @@
 import os
 import sys
+import json
+import time
 import pickle
+import hashlib
+import struct
 from src.exception import CustomException
 
-def save_object(file_path: str, obj):
+# Versioned artifact format:
+#   magic | header length (u64) | JSON header | pickle stream | numpy buffers
+# Objects are pickled with protocol 5 and their numpy buffers are written
+# out-of-band, each aligned to ARTIFACT_ALIGNMENT bytes, so an uncompressed
+# artifact can be memory-mapped and its arrays shared read-only between
+# processes. Plain pickle files are still loaded transparently.
+ARTIFACT_MAGIC = b"MLARTF\x00\x01"
+ARTIFACT_VERSION = 1
+ARTIFACT_ALIGNMENT = 64
+ARTIFACT_COMPRESSIONS = (None, "zlib", "lzma")
+
+def manifest_path(file_path: str):
+    return file_path + ".manifest.json"
+
+def _compressor(compression):
+    if compression == "zlib":
+        import zlib
+        return zlib
+    if compression == "lzma":
+        import lzma
+        return lzma
+    raise ValueError(f"Unknown artifact compression '{compression}'")
+
+def _align(offset):
+    return (offset + ARTIFACT_ALIGNMENT - 1) // ARTIFACT_ALIGNMENT * ARTIFACT_ALIGNMENT
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def artifact_sha256(file_path):
     """
-    Save object to pickle file
+    sha256 of an artifact as recorded in its manifest, hashing the file if it has none
+    (e.g. a checked-in model.pkl that save_object never wrote)
+    """
+    try:
+        with open(manifest_path(file_path)) as file_obj:
+            return json.load(file_obj)["sha256"]
+    except (OSError, ValueError, KeyError):
+        return file_sha256(file_path)
+
+def _write_artifact(file_obj, obj, compression):
+    buffers = []
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    pieces = [payload] + [buffer.raw() for buffer in buffers]
+    if compression is not None:
+        codec = _compressor(compression)
+        pieces = [codec.compress(piece) for piece in pieces]
+
+    # Offsets are relative to the aligned start of the data section
+    layout, offset = [], 0
+    for piece in pieces:
+        layout.append([offset, len(piece)])
+        offset = _align(offset + len(piece))
+
+    header = json.dumps({
+        "version": ARTIFACT_VERSION,
+        "compression": compression,
+        "pickle": layout[0],
+        "buffers": layout[1:],
+    }).encode()
+    file_obj.write(ARTIFACT_MAGIC)
+    file_obj.write(struct.pack("<Q", len(header)))
+    file_obj.write(header)
+    data_start = _align(len(ARTIFACT_MAGIC) + 8 + len(header))
+    file_obj.write(b"\x00" * (data_start - file_obj.tell()))
+
+    for (piece_offset, _), piece in zip(layout, pieces):
+        file_obj.write(b"\x00" * (data_start + piece_offset - file_obj.tell()))
+        file_obj.write(piece)
+    return {
+        "compression": compression,
+        "pickle_bytes": len(payload),
+        "n_buffers": len(buffers),
+        "buffer_bytes": sum(len(piece) for piece in pieces[1:]),
+    }
+
+def _read_artifact(file_path, mmap_mode=None):
+    with open(file_path, "rb") as file_obj:
+        magic = file_obj.read(len(ARTIFACT_MAGIC))
+        if magic != ARTIFACT_MAGIC:
+            # Plain pickle written before the artifact format existed
+            file_obj.seek(0)
+            return pickle.load(file_obj)
+        (header_length,) = struct.unpack("<Q", file_obj.read(8))
+        header = json.loads(file_obj.read(header_length))
+        if header["version"] > ARTIFACT_VERSION:
+            raise ValueError(f"Artifact version {header['version']} is newer than supported ({ARTIFACT_VERSION})")
+        data_start = _align(len(ARTIFACT_MAGIC) + 8 + header_length)
+        compression = header["compression"]
+
+        if mmap_mode is not None and compression is None:
+            import numpy as np
+            data = np.memmap(file_path, dtype=np.uint8, mode=mmap_mode)
+            view = memoryview(data)
+        else:
+            file_obj.seek(0)
+            view = memoryview(bytearray(file_obj.read()))
+
+    def piece(offset, length):
+        chunk = view[data_start + offset:data_start + offset + length]
+        if compression is None:
+            return chunk
+        return bytearray(_compressor(compression).decompress(chunk))
+
+    buffers = [piece(offset, length) for offset, length in header["buffers"]]
+    return pickle.loads(piece(*header["pickle"]), buffers=buffers)
+
+def save_object(file_path: str, obj, compression=None, artifact_format=None):
+    """
+    Save object to file, by default in the versioned artifact format.
+    compression ("zlib"/"lzma", or ARTIFACT_COMPRESSION) shrinks artifacts for
+    shipping but disables memory mapping; artifact_format="pickle" writes a
+    plain pickle. A manifest with size and checksum is written next to the file;
+    the first load through ArtifactCache adds its load time (record_load_time).
     """
     try:
         dir_path = os.path.dirname(file_path)
         os.makedirs(dir_path, exist_ok=True)
         
-        with open(file_path, "wb") as file_obj:
-            pickle.dump(obj, file_obj)
+        artifact_format = artifact_format or os.environ.get("ARTIFACT_FORMAT", "artifact")
+        if compression is None:
+            compression = os.environ.get("ARTIFACT_COMPRESSION") or None
+        if compression not in ARTIFACT_COMPRESSIONS:
+            raise ValueError(f"Unknown artifact compression '{compression}'")
+        
+        # Write to a temporary file and rename so readers never see a partial artifact
+        tmp_path = f"{file_path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as file_obj:
+            if artifact_format == "pickle":
+                pickle.dump(obj, file_obj)
+                details = {"compression": None}
+            else:
+                details = _write_artifact(file_obj, obj, compression)
+        os.replace(tmp_path, file_path)
+        
+        manifest = {
+            "format": artifact_format,
+            "format_version": ARTIFACT_VERSION if artifact_format != "pickle" else None,
+            "object_type": f"{type(obj).__module__}.{type(obj).__name__}",
+            "size_bytes": os.path.getsize(file_path),
+            "sha256": file_sha256(file_path),
+            "created": time.time(),
+        }
+        manifest.update(details)
+        with open(manifest_path(file_path), "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2)
             
     except Exception as e:
         raise CustomException(e, sys)
 
-def load_object(file_path: str):
+def record_load_time(file_path: str, seconds: float):
     """
-    Load object from pickle file
+    Add the time of the first load of an artifact to its manifest. Only the
+    first load is written (later ones are warm page-cache reads), and only if
+    the manifest still describes the file on disk. Best effort: a read-only
+    artifact directory just leaves the manifest unchanged.
     """
+    path = manifest_path(file_path)
     try:
-        with open(file_path, "rb") as file_obj:
-            return pickle.load(file_obj)
+        with open(path) as file_obj:
+            manifest = json.load(file_obj)
+        if "load_seconds" in manifest or manifest.get("size_bytes") != os.path.getsize(file_path):
+            return False
+        manifest["load_seconds"] = round(seconds, 6)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def load_object(file_path: str, mmap_mode=None, verify=False):
+    """
+    Load object saved by save_object (or a plain pickle file).
+    mmap_mode="r" maps the numpy buffers of an uncompressed artifact read-only
+    instead of copying them, so processes loading the same file share the pages.
+    verify=True checks the file against the sha256 in its manifest first.
+    """
+    try:
+        if verify:
+            with open(manifest_path(file_path)) as file_obj:
+                expected = json.load(file_obj)["sha256"]
+            if file_sha256(file_path) != expected:
+                raise ValueError(f"Checksum mismatch for {file_path}")
+        
+        return _read_artifact(file_path, mmap_mode=mmap_mode)
             
     except Exception as e:
         raise CustomException(e, sys)
 
-def evaluate_models(X_train, y_train, X_test, y_test, models, param):
+def evaluate_models(X_train, y_train, X_test, y_test, models, param, n_jobs=None,
+                    return_details=False, **search_options):
     """
-    Evaluate multiple models using GridSearchCV
+    Evaluate multiple models with 3-fold cross-validated hyperparameter search.
+    With n_jobs set, candidates and folds of all models run on a shared process pool;
+    search_options (strategy, time_budget, ...) are passed to ModelSearch.
+    The best estimator of each model replaces its entry in `models`.
     """
     try:
-        from sklearn.model_selection import GridSearchCV
         from sklearn.metrics import r2_score
+        from src.components.model_search import search_models
         
         report = {}
         
-        for i in range(len(list(models))):
-            model = list(models.values())[i]
-            para = param[list(models.keys())[i]]
-            
-            gs = GridSearchCV(model, para, cv=3)
-            gs.fit(X_train, y_train)
-            
-            model.set_params(**gs.best_params_)
-            model.fit(X_train, y_train)
+        results, summary = search_models(
+            X_train, y_train, models, param, cv=3, n_jobs=n_jobs, **search_options
+        )
+        
+        for name, result in results.items():
+            # Already refitted on the full training set by the search
+            model = result["estimator"]
+            models[name] = model
             
             # Make predictions
             y_train_pred = model.predict(X_train)
@@ -55,8 +232,12 @@ def evaluate_models(X_train, y_train, X_test, y_test, models, param):
             train_model_score = r2_score(y_train, y_train_pred)
             test_model_score = r2_score(y_test, y_test_pred)
             
-            report[list(models.keys())[i]] = test_model_score
-            
+            report[name] = test_model_score
+            result["train_score"] = train_model_score
+            result["test_score"] = test_model_score
+        
+        if return_details:
+            return report, {"results": results, "summary": summary}
         return report
         
     except Exception as e:
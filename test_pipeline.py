@@ -3,7 +3,12 @@
 Test script to verify the complete ML pipeline
 """
 
+import os
+import json
 import sys
+import shutil
+import tempfile
+import traceback
 from pathlib import Path
 
 # Add the project root to Python path
@@ -13,65 +18,656 @@ sys.path.append(str(project_root))
 from src.pipeline.train_pipeline import TrainPipeline
 from src.pipeline.predict_pipeline import PredictPipeline, CustomData
 
+_workdir = None
+_original_cwd = None
+
+def setup_module(module=None):
+    """Run every test in a temporary copy of artifact/, so the tracked model and preprocessor are not rewritten"""
+    global _workdir, _original_cwd
+    _workdir = tempfile.mkdtemp(prefix="test_pipeline_")
+    shutil.copytree(
+        project_root / "artifact", os.path.join(_workdir, "artifact"),
+        ignore=shutil.ignore_patterns("stage_cache", "jobs", "model_versions")
+    )
+    _original_cwd = os.getcwd()
+    os.chdir(_workdir)
+
+def teardown_module(module=None):
+    os.chdir(_original_cwd)
+    shutil.rmtree(_workdir, ignore_errors=True)
+
 def test_training_pipeline():
     """Test the complete training pipeline"""
     print("Testing Training Pipeline...")
+    pipeline = TrainPipeline()
+    r2_score = pipeline.run_pipeline()
+    # The trainer rejects anything below 0.6
+    assert r2_score >= 0.6, f"R2 score too low: {r2_score:.4f}"
+    print(f"✅ Training completed successfully!")
+    print(f"📊 R2 Score: {r2_score:.4f}")
+
+def test_stage_cache():
+    """Test stage cache hits and misses, alone and for a second training run"""
+    print("\nTesting Stage Cache...")
+    import numpy as np
+    from src.components.stage_cache import StageCache
+
+    workdir = tempfile.mkdtemp(prefix="test_stage_cache_")
     try:
-        pipeline = TrainPipeline()
-        r2_score = pipeline.run_pipeline()
-        print(f"✅ Training completed successfully!")
-        print(f"📊 R2 Score: {r2_score:.4f}")
-        return True
-    except Exception as e:
-        print(f"❌ Training failed: {str(e)}")
-        return False
+        source = os.path.join(workdir, "source.csv")
+        output = os.path.join(workdir, "output.txt")
+        with open(source, "w") as file_obj:
+            file_obj.write("a,b\n1,2\n")
+        calls = []
+
+        def compute():
+            calls.append(1)
+            with open(output, "w") as file_obj:
+                file_obj.write("computed")
+            return {"rows": 1}, {"values": np.arange(3)}
+
+        cache = StageCache(cache_dir=os.path.join(workdir, "cache"))
+        key = cache.make_key("stage", files=[source], params={"seed": 1})
+        cache.run("stage", key, {"output": output}, compute)
+        os.remove(output)
+        result, arrays = cache.run("stage", key, {"output": output}, compute)
+        assert len(calls) == 1 and cache.hits == ["stage"] and cache.misses == ["stage"], (
+            f"Expected one miss then one hit: hits={cache.hits}, misses={cache.misses}"
+        )
+        assert result == {"rows": 1} and np.array_equal(arrays["values"], np.arange(3)) and os.path.exists(output), (
+            "A cache hit did not restore the stage outputs"
+        )
+
+        # Changed parameters or input contents give a new key
+        assert cache.make_key("stage", files=[source], params={"seed": 2}) != key
+        with open(source, "a") as file_obj:
+            file_obj.write("3,4\n")
+        assert cache.make_key("stage", files=[source], params={"seed": 1}) != key
+        assert StageCache(cache_dir=os.path.join(workdir, "cache"), force=True).lookup("stage", key) is None
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # Nothing changed since test_training_pipeline, so every trained stage is reused
+    pipeline = TrainPipeline()
+    pipeline.run_pipeline()
+    for stage in ("data_ingestion", "data_transformation", "model_trainer"):
+        assert stage in pipeline.stage_cache.hits, f"{stage} was recomputed: {pipeline.stage_cache.misses}"
+
+    print(f"✅ Stage cache reused {', '.join(pipeline.stage_cache.hits)}!")
+
+def test_split_stability():
+    """Test that the streaming split assigns each row the same way whatever its chunk"""
+    print("\nTesting Split Stability...")
+    import numpy as np
+    import pandas as pd
+    from src.components.data_ingestion import DataIngestion
+
+    workdir = tempfile.mkdtemp(prefix="test_split_")
+    try:
+        # A missing score makes read_csv infer float for that column in one chunk only
+        data_path = os.path.join(workdir, "stud.csv")
+        df = pd.read_csv("artifact/stud.csv")
+        df.loc[3, "reading_score"] = np.nan
+        df.to_csv(data_path, index=False)
+
+        ingestion = DataIngestion(random_state=42)
+        whole = ingestion.is_test_row(pd.read_csv(data_path))
+        for chunksize in (7, 100, 333):
+            chunked = np.concatenate([
+                ingestion.is_test_row(chunk) for chunk in pd.read_csv(data_path, chunksize=chunksize)
+            ])
+            assert np.array_equal(whole, chunked), f"Chunks of {chunksize} rows changed the split"
+        assert abs(whole.mean() - ingestion.test_size) < 0.05, f"Test fraction {whole.mean():.3f}"
+        other = DataIngestion(random_state=7).is_test_row(pd.read_csv(data_path))
+        assert not np.array_equal(whole, other), "random_state does not change the split"
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"✅ Streaming split is stable across chunk sizes ({whole.sum()} of {len(whole)} rows in test)!")
+
+def test_columnar_round_trip():
+    """Test that a table appended chunk by chunk reads back unchanged from the columnar format"""
+    print("\nTesting Columnar Round Trip...")
+    import numpy as np
+    import pandas as pd
+    from src.columnar import ColumnarWriter, iter_table_chunks, read_columnar
+
+    workdir = tempfile.mkdtemp(prefix="test_columnar_")
+    try:
+        df = pd.read_csv("artifact/stud.csv")
+        df.loc[5, "writing_score"] = np.nan
+        df.loc[6, "lunch"] = np.nan
+        # A category that first appears in a later chunk
+        df.loc[900, "gender"] = "other"
+        path = os.path.join(workdir, "stud.cols")
+        with ColumnarWriter(path) as writer:
+            for start in range(0, len(df), 128):
+                writer.append(df.iloc[start:start + 128])
+
+        def as_plain(table):
+            return table.apply(lambda column: column.astype(np.float64) if pd.api.types.is_numeric_dtype(column)
+                               else column.astype(object))
+
+        expected = as_plain(df)
+        pd.testing.assert_frame_equal(as_plain(read_columnar(path)), expected)
+        chunks = pd.concat(list(iter_table_chunks(path, chunksize=300)), ignore_index=True)
+        pd.testing.assert_frame_equal(as_plain(chunks), expected)
+
+        # The first chunk fixes a column as numeric; a later text value is an error, not a NaN
+        bad = df.iloc[3:4].astype({"reading_score": object})
+        bad.loc[3, "reading_score"] = "n/a"
+        try:
+            with ColumnarWriter(os.path.join(workdir, "bad.cols")) as writer:
+                writer.append(df.head(3))
+                writer.append(bad)
+        except ValueError as e:
+            assert "reading_score" in str(e), f"Unexpected error: {e}"
+        else:
+            raise AssertionError("A text value in a numeric column was accepted")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"✅ Columnar table of {len(df)} rows round-trips (whole and in chunks)!")
+
+def test_lean_transformation():
+    """Test that the lean (streamed, float32) transformation matches the default one"""
+    print("\nTesting Lean Transformation...")
+    import numpy as np
+    import pandas as pd
+    from src.components.data_transformation import DataTransformation
+    from src.utils import load_object
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="test_lean_")
+    try:
+        df = pd.read_csv("artifact/stud.csv")
+        df.loc[[4, 40, 400], "reading_score"] = np.nan
+        # A large offset next to a small spread, where a sum-of-squares variance loses its digits
+        df["writing_score"] += 1e8
+        os.chdir(workdir)
+        os.makedirs("artifact")
+        df.iloc[:800].to_csv("artifact/train.csv", index=False)
+        df.iloc[800:].to_csv("artifact/test.csv", index=False)
+
+        train_arr, test_arr, preprocessor_path = DataTransformation(lean=False).initiate_data_transformation(
+            "artifact/train.csv", "artifact/test.csv"
+        )
+        default = load_object(preprocessor_path)
+        lean = DataTransformation(lean=True)
+        # Small chunks, so the streamed statistics are merged across many of them
+        lean.data_transformation_config.lean_chunk_rows = 64
+        (X_train, y_train), (X_test, y_test), _ = lean.initiate_data_transformation(
+            "artifact/train.csv", "artifact/test.csv"
+        )
+
+        assert X_train.dtype == np.float32, f"Lean features are {X_train.dtype}"
+        assert np.array_equal(y_train, train_arr[:, -1]) and np.array_equal(y_test, test_arr[:, -1])
+        assert np.allclose(X_train, train_arr[:, :-1], rtol=1e-6, atol=1e-5), "Lean train features differ"
+        assert np.allclose(X_test, test_arr[:, :-1], rtol=1e-6, atol=1e-5), "Lean test features differ"
+        scaler = default.named_transformers_["num_pipeline"].named_steps["Scaler"]
+        lean_scaler = load_object(preprocessor_path).named_transformers_["num_pipeline"].named_steps["Scaler"]
+        assert np.allclose(lean_scaler.mean_, scaler.mean_, rtol=1e-12), "Streamed means differ"
+        assert np.allclose(lean_scaler.var_, scaler.var_, rtol=1e-9), (
+            f"Streamed variances differ: {lean_scaler.var_} vs {scaler.var_}"
+        )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"✅ Lean transformation matches the default one on {len(df)} rows!")
 
 def test_prediction_pipeline():
     """Test the prediction pipeline"""
     print("\nTesting Prediction Pipeline...")
+    # Create sample data
+    custom_data = CustomData(
+        gender="female",
+        race_ethnicity="group B",
+        parental_level_of_education="bachelor's degree",
+        lunch="standard",
+        test_preparation_course="none",
+        reading_score=72,
+        writing_score=74
+    )
+
+    df = custom_data.get_data_as_dataframe()
+    pipeline = PredictPipeline()
+    prediction = pipeline.predict(df)
+
+    assert len(prediction) == 1 and 0 <= prediction[0] <= 100, f"Unexpected prediction: {prediction}"
+    print(f"✅ Prediction completed successfully!")
+    print(f"🎯 Predicted Math Score: {prediction[0]:.2f}")
+
+def test_batch_prediction():
+    """Test batch prediction with one valid and one invalid row"""
+    print("\nTesting Batch Prediction...")
+    rows = [
+        {
+            "gender": "female",
+            "race_ethnicity": "group B",
+            "parental_level_of_education": "bachelor's degree",
+            "lunch": "standard",
+            "test_preparation_course": "none",
+            "reading_score": 72,
+            "writing_score": 74
+        },
+        {"gender": "unknown", "reading_score": "n/a"}
+    ]
+
+    pipeline = PredictPipeline()
+    results = pipeline.predict_many(rows)
+
+    assert "prediction" in results[0] and "error" in results[1], f"Unexpected batch results: {results}"
+    print(f"✅ Batch prediction completed successfully!")
+    print(f"🎯 Results: {results}")
+
+def test_micro_batcher():
+    """Test that concurrent requests are batched and each gets its own result or error"""
+    print("\nTesting Micro-Batcher...")
+    import numpy as np
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    from src.pipeline.micro_batcher import MicroBatcher
+    from src.schema import FEATURE_COLUMNS
+
+    pipeline = PredictPipeline()
+    rows = pd.read_csv("artifact/stud.csv")[FEATURE_COLUMNS].head(40).to_dict("records")
+    rows.append(dict(rows[0], gender="unknown"))
+    expected = [pipeline.predict_record(row) for row in rows[:-1]]
+
+    def predict(row):
+        try:
+            return batcher.predict(row, timeout=30)
+        except Exception as e:
+            return e
+
+    batcher = MicroBatcher(pipeline.predict_records, max_batch_size=8, max_wait_ms=50)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(predict, rows))
+    finally:
+        batcher.close()
+
+    assert np.allclose(results[:-1], expected), "Micro-batched predictions differ from single-row ones"
+    assert isinstance(results[-1], Exception), f"The invalid row was scored: {results[-1]}"
+    stats = batcher.stats()
+    assert stats["items"] == len(rows) and stats["batches"] < len(rows), f"Requests were not batched: {stats}"
+    assert stats["batch_size"]["max"] <= 8, f"Batch larger than max_batch_size: {stats}"
     try:
-        # Create sample data
-        custom_data = CustomData(
-            gender="female",
-            race_ethnicity="group B",
-            parental_level_of_education="bachelor's degree",
-            lunch="standard",
-            test_preparation_course="none",
-            reading_score=72,
-            writing_score=74
+        batcher.submit(rows[0])
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("A closed micro-batcher accepted an item")
+
+    print(f"✅ {stats['items']} requests scored in {stats['batches']} micro-batches!")
+
+def test_compiled_preprocessor():
+    """Test that the compiled preprocessor matches the sklearn preprocessor exactly"""
+    print("\nTesting Compiled Preprocessor...")
+    import pandas as pd
+    from src.utils import load_object
+    from src.pipeline.compiled_preprocessor import compile_preprocessor
+    from src.schema import FEATURE_COLUMNS
+
+    preprocessor = load_object("artifact/preprocessor.pkl")
+    rows = pd.read_csv("artifact/stud.csv")[FEATURE_COLUMNS].to_dict("records")
+    # Raises if any row transforms differently from the sklearn preprocessor
+    compiled = compile_preprocessor(preprocessor, FEATURE_COLUMNS, rows=rows)
+
+    print(f"✅ Compiled preprocessor matches on {len(rows)} rows!")
+    print(f"🔢 Output features: {compiled.n_features_out}")
+
+def test_halving_search():
+    """Test that successive halving fits fewer rows than the exhaustive search"""
+    print("\nTesting Halving Search...")
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    from src.components.model_search import ModelSearch
+
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(900, 4))
+    y = X @ np.array([3.0, -2.0, 1.0, 0.5]) + rng.normal(scale=0.5, size=900)
+    models = {
+        "Random Forest": RandomForestRegressor(n_estimators=10, random_state=0),
+        "Decision Tree": DecisionTreeRegressor(random_state=0),
+    }
+    param = {
+        "Random Forest": {"n_estimators": [5, 10, 20], "max_depth": [2, 3, 4, 5, 6, 8]},
+        "Decision Tree": {"max_depth": [2, 3, 4, 5, 6, 8, 10, 12, 14]},
+    }
+
+    summaries = {}
+    for strategy in ("exhaustive", "halving"):
+        results, summaries[strategy] = ModelSearch(models, param, strategy=strategy).search(X, y)
+
+    exhaustive, halving = summaries["exhaustive"], summaries["halving"]
+    assert halving["n_samples_fitted"] < exhaustive["n_samples_fitted"], (
+        f"Halving fitted {halving['n_samples_fitted']} rows, exhaustive {exhaustive['n_samples_fitted']}"
+    )
+    # Forest sizes sharing one warm-start fit are kept or dropped together
+    statuses = {}
+    for candidate in results["Random Forest"]["candidates"]:
+        status = "kept" if candidate["status"] in ("evaluated", "selected") else candidate["status"]
+        statuses.setdefault(candidate["params"]["max_depth"], set()).add(status)
+    assert all(len(status) == 1 for status in statuses.values()), (
+        f"Warm-start groups were split across rungs: {statuses}"
+    )
+
+    print(f"✅ Halving fitted {halving['n_samples_fitted']} rows in {halving['n_fits']} fits "
+          f"(exhaustive: {exhaustive['n_samples_fitted']} rows in {exhaustive['n_fits']} fits)")
+
+def test_warm_start_search():
+    """Test that growing ensembles across n_estimators scores every candidate like fitting it from scratch"""
+    print("\nTesting Warm-Start Search...")
+    import numpy as np
+    from sklearn.ensemble import AdaBoostRegressor, RandomForestRegressor
+    from src.components.model_search import ModelSearch
+
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 4))
+    y = X @ np.array([3.0, -2.0, 1.0, 0.5]) + rng.normal(scale=0.5, size=300)
+    models = {
+        "Random Forest": RandomForestRegressor(random_state=0),
+        "AdaBoost Regressor": AdaBoostRegressor(random_state=0),
+    }
+    param = {
+        "Random Forest": {"n_estimators": [5, 10, 20], "max_depth": [3, 6]},
+        "AdaBoost Regressor": {"n_estimators": [5, 10, 20], "learning_rate": [0.1, 1.0]},
+    }
+
+    scores, summaries = {}, {}
+    for warm_start in (True, False):
+        results, summaries[warm_start] = ModelSearch(models, param, warm_start=warm_start).search(X, y)
+        scores[warm_start] = {
+            (name, json.dumps(c["params"], sort_keys=True)): c["cv_score"]
+            for name, result in results.items() for c in result["candidates"]
+        }
+    assert scores[True].keys() == scores[False].keys()
+    for key, score in scores[False].items():
+        assert np.isclose(scores[True][key], score, rtol=1e-12), f"{key}: {scores[True][key]} != {score}"
+    assert summaries[True]["n_fits"] < summaries[False]["n_fits"], (
+        f"Warm start fitted {summaries[True]['n_fits']} times, from scratch {summaries[False]['n_fits']}"
+    )
+
+    print(f"✅ Warm-started search matches from-scratch scores in {summaries[True]['n_fits']} fits "
+          f"instead of {summaries[False]['n_fits']}!")
+
+def test_random_search_budget():
+    """Test that random search stops at n_iter or the time budget but covers every family"""
+    print("\nTesting Random Search Budget...")
+    import numpy as np
+    from sklearn.ensemble import AdaBoostRegressor, RandomForestRegressor
+    from src.components.model_search import ModelSearch
+
+    rng = np.random.RandomState(0)
+    X = rng.normal(size=(300, 4))
+    y = X @ np.array([3.0, -2.0, 1.0, 0.5]) + rng.normal(scale=0.5, size=300)
+    models = {
+        "Random Forest": RandomForestRegressor(random_state=0),
+        "AdaBoost Regressor": AdaBoostRegressor(random_state=0),
+    }
+    param = {
+        "Random Forest": {"n_estimators": [5, 10], "max_depth": [3, 6, 9]},
+        "AdaBoost Regressor": {"n_estimators": [5, 10], "learning_rate": [0.1, 0.5, 1.0]},
+    }
+
+    for options, n_evaluated in (({"n_iter": 3}, 3), ({"time_budget": 0}, len(models))):
+        results, _ = ModelSearch(models, param, strategy="random", warm_start=False, **options).search(X, y)
+        statuses = [c["status"] for result in results.values() for c in result["candidates"]]
+        evaluated = [status for status in statuses if status in ("evaluated", "selected")]
+        assert len(evaluated) == n_evaluated, f"{options}: {len(evaluated)} candidates evaluated, not {n_evaluated}"
+        assert all(status.startswith("skipped") for status in statuses if status not in evaluated), (
+            f"{options}: candidates left unaccounted for: {statuses}"
+        )
+        for name, result in results.items():
+            assert any(c["status"] == "selected" for c in result["candidates"]), f"{options}: {name} not searched"
+
+    print("✅ Random search respects n_iter and the time budget, with every family searched!")
+
+def test_exported_models():
+    """Test that the numpy serving engine matches sklearn for every exportable model type"""
+    print("\nTesting Exported Models...")
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import AdaBoostRegressor, RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    from src.utils import load_object
+    from src.components.model_exporter import ModelExporter
+    from src.pipeline.inference_engine import ExportedModel, MODEL_PREFIX
+
+    df = pd.read_csv("artifact/stud.csv")
+    X = load_object("artifact/preprocessor.pkl").transform(df.drop(columns=["math_score"]))
+    # Jitter breaks exact distance ties, where KNN may pick either equidistant neighbour
+    X = X + np.random.default_rng(0).normal(scale=1e-3, size=X.shape)
+    y = df["math_score"].to_numpy(dtype=np.float64)
+    X_train, y_train, X_test = X[:800], y[:800], X[800:]
+    models = {
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(max_depth=8, random_state=42),
+        "Random Forest": RandomForestRegressor(n_estimators=20, random_state=42),
+        "AdaBoost Regressor": AdaBoostRegressor(n_estimators=20, random_state=42),
+        "K-Neighbors": KNeighborsRegressor(),
+        "K-Neighbors (distance)": KNeighborsRegressor(weights="distance"),
+    }
+
+    exporter = ModelExporter()
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+        arrays = {MODEL_PREFIX + key: value for key, value in exporter.model_to_arrays(model).items()}
+        expected = model.predict(X_test)
+        actual = ExportedModel(arrays).predict(X_test)
+        assert np.allclose(actual, expected, rtol=1e-9, atol=1e-9), (
+            f"{name}: max difference {np.abs(actual - expected).max():.3g}"
+        )
+
+    print(f"✅ Exported models match sklearn ({', '.join(models)})!")
+
+def test_artifact_format():
+    """Test save_object/load_object round trips and checksum verification"""
+    print("\nTesting Artifact Format...")
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from src.utils import load_object, save_object, manifest_path
+    from src.pipeline.predict_pipeline import ArtifactCache
+
+    workdir = tempfile.mkdtemp(prefix="test_artifacts_")
+    try:
+        rng = np.random.default_rng(0)
+        X, y = rng.normal(size=(200, 5)), rng.normal(size=200)
+        model = RandomForestRegressor(n_estimators=5, random_state=42).fit(X, y)
+        expected = model.predict(X)
+
+        for compression, artifact_format in ((None, None), ("zlib", None), ("lzma", None), (None, "pickle")):
+            path = os.path.join(workdir, f"model_{compression}_{artifact_format}.pkl")
+            save_object(path, model, compression=compression, artifact_format=artifact_format)
+            for mmap_mode in (None, "r"):
+                loaded = load_object(path, mmap_mode=mmap_mode, verify=True)
+                assert np.array_equal(loaded.predict(X), expected), (
+                    f"Round trip changed predictions ({compression}, {artifact_format}, {mmap_mode})"
+                )
+
+        # The first cached load records its time in the manifest, later loads leave it alone
+        cache = ArtifactCache()
+        cache.get(path)
+        with open(manifest_path(path)) as file_obj:
+            first = json.load(file_obj).get("load_seconds")
+        cache.clear()
+        cache.get(path)
+        with open(manifest_path(path)) as file_obj:
+            assert first is not None and json.load(file_obj)["load_seconds"] == first, (
+                "Load time not recorded once in the manifest"
+            )
+
+        with open(path, "r+b") as file_obj:
+            file_obj.seek(-1, os.SEEK_END)
+            last = file_obj.read(1)
+            file_obj.seek(-1, os.SEEK_END)
+            file_obj.write(bytes([last[0] ^ 0xFF]))
+        try:
+            load_object(path, verify=True)
+        except Exception as e:
+            assert "Checksum mismatch" in str(e), f"Unexpected error: {e}"
+        else:
+            raise AssertionError("A corrupted artifact passed verification")
+
+        print("✅ Artifacts round-trip (plain, zlib, lzma, pickle; copied and mmapped) and corruption is detected!")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_model_updates():
+    """Test one online model update per strategy in a copy of the artifacts"""
+    print("\nTesting Online Model Updates...")
+    import time
+    import pandas as pd
+    from sklearn.linear_model import LinearRegression, SGDRegressor
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.tree import DecisionTreeRegressor
+    from src.utils import load_object, save_object, manifest_path
+    from src.components.model_exporter import ModelExporter
+    from src.pipeline.model_updater import ModelUpdater
+    from src.pipeline.training_jobs import TrainingJobManager
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="test_updates_")
+    try:
+        shutil.copytree("artifact", os.path.join(workdir, "artifact"), ignore=shutil.ignore_patterns("stage_cache"))
+        os.chdir(workdir)
+        rows = pd.read_csv("artifact/stud.csv").sample(n=50, random_state=0)
+        preprocessor = load_object("artifact/preprocessor.pkl")
+        X = preprocessor.transform(rows.drop(columns=["math_score"]))
+        models = {
+            "partial_fit": SGDRegressor(random_state=42),
+            "add_trees": RandomForestRegressor(n_estimators=10, random_state=42),
+            "extend_reference_set": KNeighborsRegressor(),
+            "sufficient_statistics": LinearRegression(),
+            "refit": DecisionTreeRegressor(max_depth=5, random_state=42),
+        }
+
+        updater = ModelUpdater()
+        for expected, model in models.items():
+            save_object("artifact/model.pkl", model.fit(X, rows["math_score"]))
+            if expected == "partial_fit":
+                # A model.pkl without a manifest, like the checked-in one
+                os.remove(manifest_path("artifact/model.pkl"))
+            report = updater.update(rows)
+            assert report["strategy"] == expected, (
+                f"{type(model).__name__} was updated with {report['strategy']}, not {expected}"
+            )
+
+        with open("artifact/model_versions/versions.json") as file_obj:
+            versions = json.load(file_obj)
+        assert [entry["strategy"] for entry in versions] == list(models), f"Unexpected versions.json: {versions}"
+        assert all(
+            entry["holdout_r2_before"] is not None and entry["holdout_r2_after"] is not None for entry in versions
+        ), "Holdout R² missing from versions.json"
+
+        # Derived artifacts are rebuilt by a background refresh job, not in the update itself
+        export_path = ModelExporter().initiate_model_export()
+        jobs = TrainingJobManager()
+        report = ModelUpdater(training_jobs=jobs).update(rows)
+        assert report["refresh_job_id"] is not None and not os.path.exists(export_path), (
+            f"The stale export was not invalidated: {report}"
+        )
+        deadline = time.time() + 60
+        while jobs.get(report["refresh_job_id"])["status"] in ("queued", "running") and time.time() < deadline:
+            time.sleep(0.2)
+        job = jobs.get(report["refresh_job_id"])
+        assert job["status"] == "succeeded" and os.path.exists(export_path), (
+            f"Refresh job did not rebuild the export: {job}"
         )
-        
-        df = custom_data.get_data_as_dataframe()
-        pipeline = PredictPipeline()
-        prediction = pipeline.predict(df)
-        
-        print(f"✅ Prediction completed successfully!")
-        print(f"🎯 Predicted Math Score: {prediction[0]:.2f}")
+
+        bad = rows.head(3).assign(gender=["female", "other", "male"])
+        try:
+            updater.update(bad)
+        except Exception as e:
+            assert "'gender': 1" in str(e), f"Unexpected error: {e}"
+        else:
+            raise AssertionError("An unknown category was accepted")
+
+        print(f"✅ {len(versions)} model updates recorded ({', '.join(models)})!")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_training_job_metrics():
+    """Test that a finished background training job shows up in /metrics"""
+    print("\nTesting Training Job Metrics...")
+    import time
+    from app import app, training_jobs
+
+    client = app.test_client()
+    job_id = client.post("/train").get_json()["job_id"]
+    deadline = time.time() + 600
+    while client.get(f"/train/{job_id}").get_json()["status"] in ("queued", "running"):
+        assert time.time() < deadline, f"Training job {job_id} did not finish"
+        time.sleep(0.5)
+
+    job = training_jobs.get(job_id)
+    assert job["status"] == "succeeded", f"Training job {job_id} {job['status']}: {job['error']}"
+    # The watcher thread records the stages just after the job record is final
+    expected = [
+        f'training_stage_duration_seconds_count{{stage="{stage}",status="{info["status"]}"}}'
+        for stage, info in job["stages"].items() if "duration" in info
+    ]
+    while not all(line in client.get("/metrics").get_data(as_text=True) for line in expected):
+        assert time.time() < deadline, "Training stages missing from /metrics"
+        time.sleep(0.1)
+
+    print(f"✅ Training job {job_id} stages recorded in /metrics!")
+
+def _run(test):
+    """Run one test outside pytest; returns whether it passed"""
+    try:
+        test()
         return True
     except Exception as e:
-        print(f"❌ Prediction failed: {str(e)}")
+        traceback.print_exc()
+        print(f"❌ {test.__name__} failed: {e}")
         return False
 
 if __name__ == "__main__":
     print("🚀 Starting ML Pipeline Tests...\n")
-    
+    setup_module()
+
     # Test training pipeline
-    training_success = test_training_pipeline()
-    
+    training_success = _run(test_training_pipeline)
+
     # Test prediction pipeline (only if training was successful)
     if training_success:
-        prediction_success = test_prediction_pipeline()
+        prediction_success = all([
+            _run(test_stage_cache),
+            _run(test_split_stability),
+            _run(test_columnar_round_trip),
+            _run(test_lean_transformation),
+            _run(test_prediction_pipeline),
+            _run(test_batch_prediction),
+            _run(test_micro_batcher),
+            _run(test_compiled_preprocessor),
+            _run(test_halving_search),
+            _run(test_warm_start_search),
+            _run(test_random_search_budget),
+            _run(test_exported_models),
+            _run(test_artifact_format),
+            _run(test_model_updates),
+            _run(test_training_job_metrics),
+        ])
     else:
         print("\n⏭️  Skipping prediction test due to training failure")
         prediction_success = False
-    
+    teardown_module()
+
     # Summary
     print("\n" + "="*50)
     print("📋 TEST SUMMARY")
     print("="*50)
     print(f"Training Pipeline: {'✅ PASS' if training_success else '❌ FAIL'}")
     print(f"Prediction Pipeline: {'✅ PASS' if prediction_success else '❌ FAIL'}")
-    
+
     if training_success and prediction_success:
         print("\n🎉 All tests passed! Your ML pipeline is working correctly.")
     else: